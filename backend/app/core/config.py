@@ -26,9 +26,76 @@ class Settings:
     gemini_basic_model = os.getenv("GEMINI_BASIC_MODEL", "gemini-3.1-flash-lite")
     gemini_adv_model = os.getenv("GEMINI_ADV_MODEL", "gemini-2.5-flash")
 
+    # Gemini admission control (app.services.admission), per model: max calls
+    # in flight and a requests-per-minute budget (0 = no limit). Callers queue
+    # by priority (interactive before background) for at most the timeout.
+    gemini_basic_max_concurrency = int(os.getenv("GEMINI_BASIC_MAX_CONCURRENCY", "16"))
+    gemini_basic_rpm = int(os.getenv("GEMINI_BASIC_RPM", "0"))
+    gemini_adv_max_concurrency = int(os.getenv("GEMINI_ADV_MAX_CONCURRENCY", "8"))
+    gemini_adv_rpm = int(os.getenv("GEMINI_ADV_RPM", "0"))
+    gemini_queue_timeout = float(os.getenv("GEMINI_QUEUE_TIMEOUT", "10"))
+    gemini_background_queue_timeout = float(os.getenv("GEMINI_BACKGROUND_QUEUE_TIMEOUT", "60"))
+
+    # Gemini explicit context caching of the static structure prompt
+    # (app.services.prompt_cache). Off by default: the cache is billed per
+    # hour of storage, and without it prompts are sent inline.
+    gemini_prompt_cache = os.getenv("GEMINI_PROMPT_CACHE", "0") != "0"
+    gemini_prompt_cache_ttl = int(os.getenv("GEMINI_PROMPT_CACHE_TTL", "3600"))
+
+    # Hedged vocab lookups (app.services.hedging): when a lookup is slower than
+    # this percentile of recent lookups (and at least the minimum delay), a
+    # second identical request is sent and the first answer wins.
+    vocab_hedge = os.getenv("VOCAB_HEDGE", "0") != "0"
+    vocab_hedge_percentile = float(os.getenv("VOCAB_HEDGE_PERCENTILE", "95"))
+    vocab_hedge_min_delay = float(os.getenv("VOCAB_HEDGE_MIN_DELAY", "0.5"))
+
     # Text-to-speech voice used by edge-tts for the /api/tts route.
     tts_voice = os.getenv("TTS_VOICE", "en-US-JennyNeural")
 
+    # Optional process pool for spaCy parsing (app.services.nlp_pool). 0 keeps
+    # parsing in-process; each worker holds its own copy of the model.
+    spacy_workers = int(os.getenv("SPACY_WORKERS", "0"))
+    spacy_queue_limit = int(os.getenv("SPACY_QUEUE_LIMIT", "16"))
+    spacy_queue_timeout = float(os.getenv("SPACY_QUEUE_TIMEOUT", "30"))
+
+    # Structure post-processing reads node texts from one parse of the whole
+    # sentence (nlp.SentenceContext). 0 parses each node text alone again.
+    parse_sentence_context = os.getenv("PARSE_SENTENCE_CONTEXT", "1") != "0"
+
+    # Approximate memory budget of the in-process structure-tree cache (the
+    # L1 in front of Supabase); least recently used trees are evicted past it.
+    structure_cache_max_mb = int(os.getenv("STRUCTURE_CACHE_MAX_MB", "64"))
+
+    # Memory-only negative cache of /api/parse outcomes: an incomplete
+    # sentence (422) is answered from it for PARSE_INCOMPLETE_TTL seconds; a
+    # sentence whose analysis attempts were all rejected (502) for
+    # PARSE_FAILURE_BACKOFF seconds, doubling per consecutive failure up to
+    # PARSE_FAILURE_BACKOFF_MAX.
+    parse_incomplete_ttl = int(os.getenv("PARSE_INCOMPLETE_TTL", "300"))
+    parse_failure_backoff = int(os.getenv("PARSE_FAILURE_BACKOFF", "30"))
+    parse_failure_backoff_max = int(os.getenv("PARSE_FAILURE_BACKOFF_MAX", "1800"))
+
+    # Stale-while-revalidate across PARSE_PROMPT_VERSION bumps: serve the
+    # newest older-version tree in sentence_parses and re-analyze it in the
+    # background, at most PARSE_REVALIDATE_RPM a minute (0 = no limit) with
+    # up to PARSE_REVALIDATE_QUEUE sentences waiting.
+    parse_stale_fallback = os.getenv("PARSE_STALE_FALLBACK", "0") != "0"
+    parse_revalidate_rpm = int(os.getenv("PARSE_REVALIDATE_RPM", "30"))
+    parse_revalidate_queue = int(os.getenv("PARSE_REVALIDATE_QUEUE", "1000"))
+
+    # Sentences /api/parse/batch analyzes with Gemini at once (cache misses).
+    parse_batch_concurrency = int(os.getenv("PARSE_BATCH_CONCURRENCY", "4"))
+
+    # Background study packs: after /api/sessions/save, precompute the saved
+    # sentences' structure trees and TTS audio and the session quiz
+    # (app.services.study_pack). Off by default; it spends Gemini quota on
+    # sessions that may never be reopened.
+    study_pack = os.getenv("STUDY_PACK", "0") != "0"
+    study_pack_workers = int(os.getenv("STUDY_PACK_WORKERS", "2"))
+    # Memory budget of the TTS audio study packs precompute (~50KB a
+    # sentence), separate from the 300-clip cache of played audio.
+    tts_pack_cache_mb = int(os.getenv("TTS_PACK_CACHE_MB", "128"))
+
     # Supabase configuration for authenticated session/profile APIs.
     supabase_url = os.getenv("SUPABASE_URL", "")
     supabase_anon_key = os.getenv("SUPABASE_ANON_KEY", "")
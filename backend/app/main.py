@@ -1,4 +1,6 @@
 import logging
+import threading
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from app.routes.translate import router as translate_router
@@ -16,12 +18,25 @@ from app.routes.quiz import router as quiz_router
 from app.routes.share import router as share_router
 from app.routes.link_preview import router as link_preview_router
 from app.core.config import settings
+from app.services import nlp, nlp_pool, study_pack
 from fastapi.middleware.cors import CORSMiddleware
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load and warm the spaCy model (or the spaCy worker pool, see
+    # app.services.nlp_pool) off the event loop so the server starts accepting
+    # connections at once; /api/health stays 503 until it is done.
+    threading.Thread(target=nlp.warm_up, name="spacy-warm-up", daemon=True).start()
+    yield
+    await study_pack.pipeline.shutdown()
+    nlp_pool.shutdown()
+
+
 # Create the FastAPI application with metadata from settings.
-app = FastAPI(title=settings.app_title, version=settings.app_version)
+app = FastAPI(title=settings.app_title, version=settings.app_version, lifespan=lifespan)
 
 # CORS config to allow requests from the frontend origin during development.
 app.add_middleware(
@@ -70,3 +70,22 @@ class ParseRequest(BaseModel):
 class ParseResponse(BaseModel):
     structure: Optional[StructureNode] = None
     sentence_type: Optional[SentenceType] = None
+
+
+# Request body for /api/parse/batch. Capped so the Supabase cache lookup
+# stays a single in.(...) query.
+class ParseBatchRequest(BaseModel):
+    sentences: list[str] = Field(max_length=100, description="Sentences to analyze, in order")
+
+
+# One /api/parse/batch result. A failed sentence carries `error` with the
+# status code /api/parse would have answered instead of a structure.
+class ParseBatchItem(BaseModel):
+    structure: Optional[StructureNode] = None
+    sentence_type: Optional[SentenceType] = None
+    status_code: int = 200
+    error: Optional[str] = None
+
+
+class ParseBatchResponse(BaseModel):
+    results: list[ParseBatchItem]
@@ -10,6 +10,10 @@ class TranslateRequest(BaseModel):
         description="Translation mode: 'normal' for natural translation, 'learner' for explicit, learner-friendly output", 
         examples=["normal", "learner"]
     )
+    pipelined: bool = Field(
+        default=False,
+        description="Translate in chunks that start while later lines are still being split; faster for long texts, but each chunk is translated without the others as context",
+    )
 
 # A single sentence and its translation plus extracted vocab.
 class SentencePair(BaseModel):
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 
 from app.core.auth import require_admin
+from app.services import admission, metrics, nlp, prompt_cache, single_flight, structure, study_pack
 from app.services.supabase import get_usage_stats, list_all_users
+from app.services.vocab_cache import hedge_stats
 
 router = APIRouter()
 
@@ -26,3 +28,35 @@ def get_user_usage(
     _admin: dict = Depends(require_admin),
 ) -> dict:
     return get_usage_stats(target_user_id)
+
+
+@router.get("/admin/metrics")
+async def get_metrics(_admin: dict = Depends(require_admin)) -> dict:
+    """In-process Gemini and upstream-call counters since the last restart.
+    Async so the study-pack pipeline, which lives on the event loop, is read
+    there; the other counters are lock-protected and cheap."""
+    return {
+        "gemini": metrics.gemini.snapshot(),
+        "admission": admission.controller.stats(),
+        "single_flight": single_flight.stats(),
+        "vocab_hedging": hedge_stats(),
+        "prompt_cache": prompt_cache.stats(),
+        "spacy_caches": nlp.cache_stats(),
+        "structure_cache": structure.memory_cache_stats(),
+        "structure_failures": structure.failure_cache_stats(),
+        "structure_revalidation": structure.revalidation_stats(),
+        "study_pack": study_pack.pipeline.stats(),
+    }
+
+
+@router.get("/admin/caches/structure")
+def inspect_structure_cache(limit: int = 20, _admin: dict = Depends(require_admin)) -> dict:
+    return {
+        "stats": structure.memory_cache_stats(),
+        "recent": structure.memory_cache_entries(max(0, min(limit, 200))),
+    }
+
+
+@router.delete("/admin/caches/structure")
+def clear_structure_cache(_admin: dict = Depends(require_admin)) -> dict:
+    return {"cleared": structure.clear_memory_cache()}
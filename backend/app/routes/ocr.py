@@ -1,8 +1,9 @@
 import base64
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.models.ocr import OcrRequest, OcrResponse
-from app.services.gemini import ai_ocr_image
+from app.services.gemini import ai_ocr_image_async
 from app.services.supabase import log_api_usage
 from app.core.config import settings
 from app.core.auth import require_user
@@ -15,7 +16,7 @@ router = APIRouter(tags=["ocr"])
 
 # Extract text from an uploaded image via Gemini vision.
 @router.post("/ocr", response_model=OcrResponse)
-def ocr(req: OcrRequest, user: dict = Depends(require_user)):
+async def ocr(req: OcrRequest, user: dict = Depends(require_user)):
     """
     Decode the base64 image, run OCR through Gemini vision, log token usage,
     and return the extracted text.
@@ -31,7 +32,7 @@ def ocr(req: OcrRequest, user: dict = Depends(require_user)):
     if len(image_bytes) > MAX_IMAGE_BYTES:
         raise HTTPException(status_code=413, detail="Image too large")
 
-    text, usage = ai_ocr_image(image_bytes, req.mime_type)
-    log_api_usage(user["id"], "ocr", settings.gemini_basic_model, usage)
+    text, usage = await ai_ocr_image_async(image_bytes, req.mime_type)
+    await run_in_threadpool(log_api_usage, user["id"], "ocr", settings.gemini_basic_model, usage)
 
     return OcrResponse(text=text)
@@ -1,10 +1,17 @@
 import logging
 
 from fastapi import APIRouter, Depends
+from fastapi.concurrency import run_in_threadpool
 
-from app.models.parse import ParseRequest, ParseResponse
+from app.models.parse import (
+    ParseBatchItem,
+    ParseBatchRequest,
+    ParseBatchResponse,
+    ParseRequest,
+    ParseResponse,
+)
 from app.services.gemini import derive_sentence_type
-from app.services.structure import get_structure
+from app.services.structure import get_structure_async, get_structures_async
 from app.services.supabase import log_api_usage
 from app.core.config import settings
 from app.core.auth import require_user
@@ -19,12 +26,35 @@ router = APIRouter(tags=["parse"])
 # usage, which we bill/log; a cache hit returns usage=None and bills nothing, so
 # a given sentence is analyzed at most once ever. Incomplete input raises 422
 # before Gemini is called; an unusable AI result raises 502 so the UI can retry.
+# Async so a slow multi-attempt analysis waits on the event loop instead of
+# pinning a threadpool worker.
 @router.post("/parse", response_model=ParseResponse)
-def parse(req: ParseRequest, user: dict = Depends(require_user)):
-    structure, usage = get_structure(req.sentence)
+async def parse(req: ParseRequest, user: dict = Depends(require_user)):
+    structure, usage = await get_structure_async(req.sentence)
     if usage is not None:
-        log_api_usage(user["id"], "parse", settings.gemini_adv_model, usage)
+        await run_in_threadpool(log_api_usage, user["id"], "parse", settings.gemini_adv_model, usage)
     # Derived at response time (not cached), so the classification rules can
     # evolve without invalidating cached trees.
     sentence_type = derive_sentence_type(structure) if structure else None
     return ParseResponse(structure=structure, sentence_type=sentence_type)
+
+
+# Analyze a whole article's sentences in one request: one spaCy pass, one
+# Supabase lookup and one write-back for the batch, misses analyzed
+# concurrently. A failing sentence does not fail the others: it carries the
+# status /api/parse would have answered with. Usage is logged once.
+@router.post("/parse/batch", response_model=ParseBatchResponse)
+async def parse_batch(req: ParseBatchRequest, user: dict = Depends(require_user)):
+    outcomes, usage = await get_structures_async(req.sentences)
+    if usage is not None:
+        await run_in_threadpool(log_api_usage, user["id"], "parse", settings.gemini_adv_model, usage)
+    results = [
+        ParseBatchItem(
+            structure=structure,
+            sentence_type=derive_sentence_type(structure) if structure else None,
+        )
+        if error is None
+        else ParseBatchItem(status_code=error.status_code, error=error.detail)
+        for structure, error in outcomes
+    ]
+    return ParseBatchResponse(results=results)
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from google.genai.errors import APIError
 
 from app.core.auth import require_user
@@ -13,7 +14,7 @@ from app.models.quiz import (
     VocabPoolResponse,
     WordMasteryResponse,
 )
-from app.services.gemini import ai_generate_quiz
+from app.services.gemini import ai_generate_quiz_async
 from app.services.supabase import (
     delete_quiz_run,
     get_quiz_questions,
@@ -33,12 +34,12 @@ router = APIRouter(tags=["quiz"])
 # Generate (or return cached) reading-comprehension questions for a session.
 # Answers are included: the frontend grades locally without another AI call.
 @router.post("/quiz/generate", response_model=QuizGenerateResponse)
-def quiz_generate(req: QuizGenerateRequest, user: dict = Depends(require_user)):
+async def quiz_generate(req: QuizGenerateRequest, user: dict = Depends(require_user)):
     # Also enforces ownership: 404 when the session is not the user's.
-    detail = get_session_detail(user["id"], req.session_id)
+    detail = await run_in_threadpool(get_session_detail, user["id"], req.session_id)
 
     if not req.regenerate:
-        cached = get_quiz_questions(user["id"], req.session_id)
+        cached = await run_in_threadpool(get_quiz_questions, user["id"], req.session_id)
         if cached:
             return {"questions": cached}
 
@@ -47,7 +48,7 @@ def quiz_generate(req: QuizGenerateRequest, user: dict = Depends(require_user)):
         raise HTTPException(status_code=422, detail="這個學習紀錄沒有文章內容，無法出題。")
 
     try:
-        questions, usage = ai_generate_quiz(article)
+        questions, usage = await ai_generate_quiz_async(article)
     except APIError as e:
         msg = str(e)
         if "RESOURCE_EXHAUSTED" in msg or "429" in msg:
@@ -56,8 +57,8 @@ def quiz_generate(req: QuizGenerateRequest, user: dict = Depends(require_user)):
             raise HTTPException(status_code=503, detail="AI 服務暫時忙碌，請稍後再試。")
         raise HTTPException(status_code=502, detail="AI 服務發生錯誤，請稍後再試。")
 
-    log_api_usage(user["id"], "quiz", settings.gemini_basic_model, usage)
-    replace_quiz_questions(user["id"], req.session_id, questions)
+    await run_in_threadpool(log_api_usage, user["id"], "quiz", settings.gemini_basic_model, usage)
+    await run_in_threadpool(replace_quiz_questions, user["id"], req.session_id, questions)
     return {"questions": questions}
 
 
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.auth import require_user
+from app.core.config import settings
 from app.models.session import (
     SaveSessionRequest,
     SessionGroupRequest,
     SetSessionGroupRequest,
     UpdateSessionTitleRequest,
 )
+from app.services.study_pack import pipeline as study_packs
 from app.services.supabase import (
     create_session_group,
     delete_session,
@@ -50,13 +53,33 @@ def update_session_title_route(
 
 
 @router.delete("/sessions/{session_id}", status_code=204)
-def delete_session_route(session_id: str, user: dict = Depends(require_user)):
-    delete_session(user["id"], session_id)
+async def delete_session_route(session_id: str, user: dict = Depends(require_user)):
+    await run_in_threadpool(delete_session, user["id"], session_id)
+    study_packs.cancel(user["id"], session_id)
 
 
+# Async so the study pack (see app.services.study_pack) can be queued on the
+# event loop its workers run on; the Supabase writes stay in the threadpool.
 @router.post("/sessions/save")
-def save_session_route(req: SaveSessionRequest, user: dict = Depends(require_user)):
-    return save_session(user["id"], req.text, [s.model_dump() for s in req.sentences], req.session_id)
+async def save_session_route(req: SaveSessionRequest, user: dict = Depends(require_user)):
+    saved = await run_in_threadpool(
+        save_session, user["id"], req.text, [s.model_dump() for s in req.sentences], req.session_id
+    )
+    if settings.study_pack:
+        study_packs.submit(
+            user["id"], str(saved["session"]["id"]), req.text, [s.original for s in req.sentences]
+        )
+    return saved
+
+
+# Progress of the background precomputation queued by the last save. Async:
+# the pipeline's state is only read on the event loop that mutates it.
+@router.get("/sessions/{session_id}/study-pack")
+async def study_pack_progress(session_id: str, user: dict = Depends(require_user)):
+    progress = study_packs.progress(user["id"], session_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="No study pack for this session.")
+    return progress
 
 
 # ── Session groups (topic folders) ──────────────────────────────────────────
@@ -1,14 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from app.models.translate import TranslateRequest
-from app.services.nlp import split_sentences
+from app.services.nlp import cache_stats, split_sentences, warm_up_status
 
 # Lightweight router for health and debugging endpoints.
 router = APIRouter(tags=["test"])
 
-# Health endpoint for uptime checks.
+# Health endpoint for uptime checks. Render's healthCheckPath: answers 503
+# until the spaCy warm-up started in app.main has finished, so a new deploy
+# only takes traffic once the model is loaded.
 @router.get("/health")
-def health_check():
-    return {"status": "ok"}
+def health_check(response: Response):
+    spacy_status = warm_up_status()
+    if spacy_status["status"] != "ready":
+        response.status_code = 503
+        status = "error" if spacy_status["status"] == "failed" else "starting"
+        return {"status": status, "spacy": spacy_status}
+    return {"status": "ok", "spacy": spacy_status}
 
 # Debug endpoint to view how text is sentence-split by spaCy.
 @router.post("/debug/split")
@@ -16,5 +23,6 @@ def debug_split(req: TranslateRequest):
     sentences = split_sentences(req.text)
     return {
         "count": len(sentences),
-        "sentences": sentences
+        "sentences": sentences,
+        "line_cache": cache_stats()["lines"],
     }
@@ -1,17 +1,56 @@
-from fastapi import APIRouter, Depends
+import json
+import logging
+import time
+
+import anyio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app.models.translate import TranslateRequest, TranslateResponse, SentencePair
-from app.services.nlp import split_sentences
-from app.services.gemini import ai_translate_list
+from app.services.nlp import iter_sentences, split_sentences
+from app.services.gemini import ai_translate_pipelined, ai_translate_stream, sum_usage
+from app.services.translation_cache import get_translations, get_translations_async
 from app.services.supabase import log_api_usage
 from app.core.config import settings
 from app.core.auth import require_user
 
+logger = logging.getLogger(__name__)
+
 # Router for translation-related endpoints.
 router = APIRouter(tags=["translate"])
 
+
+# The chunked translations bill each chunk as it finishes, not the summed
+# result: when a later chunk fails, the ones already translated (and cached)
+# are still logged.
+def _billed(translate, spent: list[dict | None]):
+    def run(chunk: list[str], target_lang: str, mode: str):
+        translations, usage = translate(chunk, target_lang, mode)
+        spent.append(usage)
+        return translations, usage
+
+    return run
+
+
+def _billed_async(translate, spent: list[dict | None]):
+    async def run(chunk: list[str], target_lang: str, mode: str):
+        translations, usage = await translate(chunk, target_lang, mode)
+        spent.append(usage)
+        return translations, usage
+
+    return run
+
+
+async def _log_usage(user: dict, spent: list[dict | None]) -> None:
+    usage = sum_usage(spent)
+    if usage is not None:
+        await run_in_threadpool(
+            log_api_usage, user["id"], "translate", settings.gemini_basic_model, usage
+        )
+
 # Translate incoming text into sentence-level results with vocab extraction.
 @router.post("/translate", response_model=TranslateResponse)
-def translate(req: TranslateRequest, user: dict = Depends(require_user)):
+async def translate(req: TranslateRequest, user: dict = Depends(require_user)):
     """
     Split `req.text` into sentences, translate each via Gemini, and return
     sentence pairs with extracted vocabulary. Returns an empty list for blank input.
@@ -20,12 +59,29 @@ def translate(req: TranslateRequest, user: dict = Depends(require_user)):
     if not raw:
         return TranslateResponse(sentences=[])
 
-    # Split into sentences first to preserve order.
-    parts = split_sentences(raw)
+    spent: list[dict | None] = []
+    try:
+        if req.pipelined:
+            # Overlap splitting and translation: Gemini chunks start while later
+            # lines are still being parsed (with SPACY_WORKERS the split runs
+            # in the pool first). The pipeline runs its own worker threads, so
+            # it stays sync and runs as a whole in the threadpool.
+            parts, translations, _ = await run_in_threadpool(
+                ai_translate_pipelined,
+                iter_sentences(raw),
+                req.target_lang,
+                req.mode,
+                translate=_billed(get_translations, spent),
+            )
+        else:
+            # Split into sentences first to preserve order.
+            parts = await run_in_threadpool(split_sentences, raw)
 
-    # Call Gemini to translate each sentence.
-    translations, usage = ai_translate_list(parts, req.target_lang, req.mode)
-    log_api_usage(user["id"], "translate", settings.gemini_basic_model, usage)
+            # Translate each sentence; cached sentences skip Gemini.
+            translations, usage = await get_translations_async(parts, req.target_lang, req.mode)
+            spent.append(usage)
+    finally:
+        await _log_usage(user, spent)
 
     # Build response objects with translations and extracted vocab.
     results: list[SentencePair] = []
@@ -40,3 +96,59 @@ def translate(req: TranslateRequest, user: dict = Depends(require_user)):
                 ))
 
     return TranslateResponse(sentences=results)
+
+
+# Streaming variant of /translate for long inputs: NDJSON, one SentencePair per
+# line in id order, each chunk sent as soon as it (and every chunk before it)
+# is translated.
+@router.post("/translate/stream")
+async def translate_stream(req: TranslateRequest, user: dict = Depends(require_user)):
+    """
+    Same sentences, ids and translations as /translate (`pipelined` is
+    ignored). Splitting and the first chunk finish before the response
+    starts, so their failures are ordinary HTTP errors; a later chunk failure
+    ends the stream with an `{"error": detail}` line.
+    """
+    started = time.perf_counter()
+    raw = req.text.strip()
+    parts = await run_in_threadpool(split_sentences, raw) if raw else []
+    spent: list[dict | None] = []
+    chunks = ai_translate_stream(
+        parts, req.target_lang, req.mode, translate=_billed_async(get_translations_async, spent)
+    )
+    try:
+        first = await anext(chunks, None)
+    except HTTPException:
+        await chunks.aclose()
+        await _log_usage(user, spent)
+        raise
+    first_at = time.perf_counter() - started
+
+    async def body():
+        sent = 0
+        pending = first
+        try:
+            while pending is not None:
+                translations, _ = pending
+                for translation in translations:
+                    pair = SentencePair(id=sent, original=parts[sent], translation=translation, vocab=[])
+                    yield pair.model_dump_json() + "\n"
+                    sent += 1
+                pending = await anext(chunks, None)
+        except HTTPException as e:
+            yield json.dumps({"error": e.detail}, ensure_ascii=False) + "\n"
+        finally:
+            # Shielded so a client disconnect still cancels the remaining
+            # chunks and bills the ones already translated.
+            with anyio.CancelScope(shield=True):
+                await chunks.aclose()
+                logger.info(
+                    "translate stream: first sentence after %.2f s, %d/%d sentences in %.2f s",
+                    first_at,
+                    sent,
+                    len(parts),
+                    time.perf_counter() - started,
+                )
+                await _log_usage(user, spent)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
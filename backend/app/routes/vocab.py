@@ -1,16 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException
 from google.genai.errors import APIError
 from app.models.vocab import VocabLookupRequest, VocabLookupResponse
-from app.services.vocab_cache import get_vocab_lookup
+from app.services.vocab_cache import get_vocab_lookup_async
 from app.core.auth import require_user
 
 router = APIRouter(tags=["vocab"])
 
 # Look up a word in context; AI determines lemma/pos and fills requested fields.
 @router.post("/vocab/lookup", response_model=VocabLookupResponse)
-def vocab_lookup(req: VocabLookupRequest, _user: dict = Depends(require_user)):
+async def vocab_lookup(req: VocabLookupRequest, _user: dict = Depends(require_user)):
     try:
-        return get_vocab_lookup(req, _user["id"])
+        return await get_vocab_lookup_async(req, _user["id"])
     except APIError as e:
         msg = str(e)
         if "RESOURCE_EXHAUSTED" in msg or "429" in msg:
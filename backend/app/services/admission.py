@@ -0,0 +1,251 @@
+import asyncio
+import itertools
+import logging
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is admitted first. Interactive calls back a click the user is
+# waiting on (translate, parse, vocab, OCR); background calls can wait longer.
+PRIORITIES = {"interactive": 0, "background": 1}
+
+_PRIORITY: ContextVar[str] = ContextVar("gemini_priority", default="interactive")
+
+BUSY_MESSAGE = "AI 服務暫時忙碌，請稍後再試。"
+
+
+@contextmanager
+def priority(name: str) -> Iterator[None]:
+    """Run the Gemini calls made inside the block at priority `name`."""
+    reset = _PRIORITY.set(name)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(reset)
+
+
+class _Waiter:
+    """One queued call. Threads block on a threading.Event; coroutines on an
+    asyncio.Event set from whichever thread releases a slot."""
+
+    def __init__(self, priority: str, seq: int, loop: asyncio.AbstractEventLoop | None) -> None:
+        self.priority = priority
+        self.rank = PRIORITIES[priority]
+        self.seq = seq
+        self.loop = loop
+        self.event = asyncio.Event() if loop else threading.Event()
+        self.enqueued = time.monotonic()
+
+    def wake(self) -> None:
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.event.set)
+        else:
+            self.event.set()
+
+
+class _Gate:
+    """Concurrency slots, a requests-per-minute token bucket and a priority
+    queue for one model. Every method runs under AdmissionController._lock."""
+
+    def __init__(self, max_concurrency: int, rpm: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tokens = float(rpm)
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.waiters: list[_Waiter] = []
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def enqueue(self, waiter: _Waiter) -> None:
+        self.waiters.append(waiter)
+        self.waiters.sort(key=lambda w: (w.rank, w.seq))
+
+    def remove(self, waiter: _Waiter) -> None:
+        self.waiters.remove(waiter)
+        if self.waiters:
+            self.waiters[0].wake()
+
+    def try_admit(self, waiter: _Waiter) -> float | None:
+        """Admit `waiter` when it heads the queue and a slot and a token are
+        free; returns 0.0 then. Otherwise returns the seconds until the next
+        token when only a token is missing, or None to wait for a wake-up."""
+        if self.waiters[0] is not waiter:
+            return None
+        if self.max_concurrency and self.in_flight >= self.max_concurrency:
+            return None
+        if self.rpm:
+            now = time.monotonic()
+            self.tokens = min(self.rpm, self.tokens + (now - self.refilled) * self.rpm / 60)
+            self.refilled = now
+            if self.tokens < 1:
+                return (1 - self.tokens) * 60 / self.rpm
+            self.tokens -= 1
+
+        self.waiters.pop(0)
+        self.in_flight += 1
+        self.admitted += 1
+        waited = time.monotonic() - waiter.enqueued
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        # The next caller may fit as well (a free slot and a spare token).
+        if self.waiters:
+            self.waiters[0].wake()
+        return 0.0
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.waiters:
+            self.waiters[0].wake()
+
+    def stats(self) -> dict:
+        queued = {name: 0 for name in PRIORITIES}
+        for waiter in self.waiters:
+            queued[waiter.priority] += 1
+        return {
+            "max_concurrency": self.max_concurrency,
+            "rpm": self.rpm,
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_ms_avg": round(self.wait_total / self.admitted * 1000, 1) if self.admitted else 0.0,
+            "wait_ms_max": round(self.wait_max * 1000, 1),
+        }
+
+
+class AdmissionController:
+    """Central gate in front of every Gemini call (see gemini._call_sync and
+    gemini._call_async).
+
+    Each model gets its own max-concurrency and requests-per-minute budget so
+    a burst is queued here instead of coming back as RESOURCE_EXHAUSTED.
+    Queued calls are admitted by priority, then arrival; a call that cannot
+    be admitted within its priority's timeout is answered with 503."""
+
+    def __init__(self) -> None:
+        self._gates: dict[str, _Gate] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+
+    def _gate(self, model: str) -> _Gate:
+        with self._lock:
+            gate = self._gates.get(model)
+            if gate is None:
+                if model == settings.gemini_adv_model:
+                    limits = (settings.gemini_adv_max_concurrency, settings.gemini_adv_rpm)
+                else:
+                    limits = (settings.gemini_basic_max_concurrency, settings.gemini_basic_rpm)
+                gate = self._gates[model] = _Gate(*limits)
+            return gate
+
+    def _waiter(self, gate: _Gate, loop: asyncio.AbstractEventLoop | None) -> tuple[_Waiter, float]:
+        name = _PRIORITY.get()
+        timeout = (
+            settings.gemini_background_queue_timeout
+            if name == "background"
+            else settings.gemini_queue_timeout
+        )
+        waiter = _Waiter(name, next(self._seq), loop)
+        with self._lock:
+            gate.enqueue(waiter)
+        return waiter, time.monotonic() + timeout
+
+    def _reject(self, gate: _Gate, waiter: _Waiter, model: str) -> HTTPException:
+        with self._lock:
+            gate.remove(waiter)
+            gate.rejected += 1
+        logger.warning("Gemini admission timed out: model=%s priority=%s", model, waiter.priority)
+        return HTTPException(status_code=503, detail=BUSY_MESSAGE)
+
+    def _forget(self, gate: _Gate, waiter: _Waiter) -> None:
+        # A caller that gave up (timeout, cancellation) must not stay at the
+        # head of the queue and block everyone behind it.
+        with self._lock:
+            if waiter in gate.waiters:
+                gate.remove(waiter)
+
+    @contextmanager
+    def admit(self, model: str) -> Iterator[None]:
+        """Hold one call slot for `model` (blocking the calling thread)."""
+        gate = self._gate(model)
+        if not gate.max_concurrency and not gate.rpm:
+            yield
+            return
+        waiter, deadline = self._waiter(gate, None)
+        try:
+            while True:
+                with self._lock:
+                    delay = gate.try_admit(waiter)
+                if delay == 0.0:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._reject(gate, waiter, model)
+                waiter.event.wait(min(remaining, delay) if delay else remaining)
+                waiter.event.clear()
+        except BaseException:
+            self._forget(gate, waiter)
+            raise
+        try:
+            yield
+        finally:
+            with self._lock:
+                gate.release()
+
+    @asynccontextmanager
+    async def admit_async(self, model: str) -> AsyncIterator[None]:
+        """Hold one call slot for `model` without blocking the event loop."""
+        gate = self._gate(model)
+        if not gate.max_concurrency and not gate.rpm:
+            yield
+            return
+        waiter, deadline = self._waiter(gate, asyncio.get_running_loop())
+        try:
+            while True:
+                with self._lock:
+                    delay = gate.try_admit(waiter)
+                if delay == 0.0:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._reject(gate, waiter, model)
+                try:
+                    await asyncio.wait_for(
+                        waiter.event.wait(), min(remaining, delay) if delay else remaining
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                waiter.event.clear()
+        except BaseException:
+            self._forget(gate, waiter)
+            raise
+        try:
+            yield
+        finally:
+            with self._lock:
+                gate.release()
+
+    def stats(self) -> dict:
+        """Per-model slots, queue depth by priority, and queue wait times."""
+        with self._lock:
+            return {model: gate.stats() for model, gate in self._gates.items()}
+
+    def reset(self) -> None:
+        """Forget every gate (limits are re-read from settings on next use)."""
+        with self._lock:
+            self._gates.clear()
+
+
+# Process-wide controller used by the Gemini drivers.
+controller = AdmissionController()
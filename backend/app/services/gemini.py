@@ -1,22 +1,129 @@
+import asyncio
+import contextvars
 import json
 import logging
 import re
-from typing import Literal
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Literal
 
+import numpy
 from fastapi import HTTPException
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from pydantic import BaseModel, ConfigDict, ValidationError
 
 from app.models.vocab import VocabOptions
 from app.core.config import settings
-from app.services.nlp import analyze_tokens, strip_invisible
+from app.services import admission, metrics
+from app.services.prompt_cache import CachedPrefix
+from app.services.nlp import (
+    TokenRow,
+    TokenTable,
+    context_tokens,
+    sentence_context,
+    strip_invisible,
+)
 
 logger = logging.getLogger(__name__)
 
 # Initialize Gemini client with the configured API key.
 client = genai.Client(api_key=settings.gemini_api_key)
 
+# --- Gemini call drivers ------------------------------------------------------
+#
+# Each ai_* function is written once, as a "steps" generator that yields the
+# keyword arguments of every generate_content call it makes and is sent the
+# response back (or has the call's exception thrown in at the yield). The
+# public sync function drives it with the blocking client; its *_async twin
+# drives it with client.aio, so an async route holds no threadpool worker
+# while Gemini is thinking.
+
+def _step(steps: Generator, response: Any = None, error: Exception | None = None) -> tuple[bool, Any]:
+    """Advance `steps` by one call: (True, result) once it returns, else
+    (False, next request kwargs)."""
+    try:
+        if error is not None:
+            return False, steps.throw(error)
+        return False, steps.send(response)
+    except StopIteration as stop:
+        return True, stop.value
+
+
+def _record_call(endpoint: str, model: str, started: float, response: Any, error: Exception | None) -> None:
+    usage = None
+    if response is not None:
+        usage = _extract_usage(response)
+        cached = _cached_tokens(response)
+        if cached:
+            usage["cached_prompt_tokens"] = cached
+    metrics.gemini.record_call(endpoint, model, time.monotonic() - started, usage, error)
+
+
+def _call_sync(steps: Generator, endpoint: str) -> Any:
+    """Drive `steps` with the blocking client. `endpoint` labels the calls
+    in app.services.metrics (the api_usage endpoint name)."""
+    calls = 0
+    try:
+        done, value = _step(steps)
+        while not done:
+            model = value["model"]
+            calls += 1
+            # The slot is held for the call only, not the post-processing.
+            with admission.controller.admit(model):
+                started = time.monotonic()
+                try:
+                    response, error = client.models.generate_content(**value), None
+                except Exception as e:
+                    response, error = None, e
+                _record_call(endpoint, model, started, response, error)
+            done, value = _step(steps, response, error)
+        return value
+    finally:
+        if calls:
+            metrics.gemini.record_attempts(endpoint, model, calls)
+        steps.close()
+
+
+async def _call_async(steps: Generator, endpoint: str, offload: bool = False) -> Any:
+    """Drive `steps` on the event loop with client.aio.
+
+    offload=True runs the generator's own work (spaCy post-processing) in the
+    default executor so it never blocks the loop; every step runs in one
+    copied Context, so ContextVars the steps set (nlp.sentence_context)
+    survive from one step to the next."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+
+    async def advance(function, *args):
+        if offload:
+            return await loop.run_in_executor(None, context.run, function, *args)
+        return function(*args)
+
+    calls = 0
+    try:
+        done, value = await advance(_step, steps)
+        while not done:
+            model = value["model"]
+            calls += 1
+            async with admission.controller.admit_async(model):
+                started = time.monotonic()
+                try:
+                    response, error = await client.aio.models.generate_content(**value), None
+                except Exception as e:
+                    response, error = None, e
+                _record_call(endpoint, model, started, response, error)
+            done, value = await advance(_step, steps, response, error)
+        return value
+    finally:
+        if calls:
+            metrics.gemini.record_attempts(endpoint, model, calls)
+        # Unwinds the generator (its `with` blocks) in the same Context when
+        # the caller is cancelled or not admitted; a no-op once it has returned.
+        await advance(steps.close)
+
+
 # Extract token usage counts from a Gemini response, defaulting missing values to zero.
 def _extract_usage(response) -> dict:
     meta = getattr(response, "usage_metadata", None)
@@ -29,6 +136,12 @@ def _extract_usage(response) -> dict:
     }
 
 
+def _cached_tokens(response) -> int:
+    """Prompt tokens Gemini served from a context cache."""
+    meta = getattr(response, "usage_metadata", None)
+    return getattr(meta, "cached_content_token_count", 0) or 0
+
+
 def _strip_echoed_indices(translations: list[str]) -> list[str]:
     """Remove model-added list indices only when the whole batch has them.
 
@@ -48,10 +161,126 @@ def _strip_echoed_indices(translations: list[str]) -> list[str]:
     ]
 
 
+# Bumped whenever the translation prompt or its post-processing changes in a
+# way that should invalidate cached translations. The translation cache keys
+# on it (see app.services.translation_cache).
+TRANSLATE_PROMPT_VERSION = 1
+
+# Long inputs are translated in chunks bounded by sentence count and
+# characters, a few at a time, so one slow or mismatched answer costs one
+# chunk's retry instead of the whole article's.
+_TRANSLATE_CHUNK_SENTENCES = 40
+_TRANSLATE_CHUNK_CHARS = 6000
+_TRANSLATE_MAX_WORKERS = 4
+
+
+def _translation_chunks(sentences: list[str]) -> list[list[str]]:
+    """Consecutive runs of `sentences` within both chunk bounds; a sentence
+    longer than the character bound gets a chunk of its own."""
+    chunks: list[list[str]] = []
+    chunk: list[str] = []
+    chars = 0
+    for sentence in sentences:
+        if chunk and (
+            len(chunk) == _TRANSLATE_CHUNK_SENTENCES
+            or chars + len(sentence) > _TRANSLATE_CHUNK_CHARS
+        ):
+            chunks.append(chunk)
+            chunk, chars = [], 0
+        chunk.append(sentence)
+        chars += len(sentence)
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
 def ai_translate_list(sentences: list[str], target_lang: str = "zh-TW", mode: str = "normal") -> tuple[list[str], dict]:
+    """Translate `sentences` in order; returns (translations, summed usage).
+
+    Chunks run concurrently (up to _TRANSLATE_MAX_WORKERS) and each retries
+    on its own; the first chunk that still fails raises its HTTPException."""
     if not sentences:
         return [], {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0}
-    
+
+    chunks = _translation_chunks(sentences)
+    if len(chunks) == 1:
+        return _translate_chunk(sentences, target_lang, mode)
+
+    with ThreadPoolExecutor(max_workers=_TRANSLATE_MAX_WORKERS) as pool:
+        futures = [pool.submit(_translate_chunk, chunk, target_lang, mode) for chunk in chunks]
+        try:
+            results = [future.result() for future in futures]
+        except HTTPException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    return _join_chunks(results)
+
+
+async def ai_translate_list_async(
+    sentences: list[str], target_lang: str = "zh-TW", mode: str = "normal"
+) -> tuple[list[str], dict]:
+    """Async ai_translate_list: chunks run concurrently on the event loop,
+    at most _TRANSLATE_MAX_WORKERS at a time."""
+    if not sentences:
+        return [], {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0}
+
+    limit = asyncio.Semaphore(_TRANSLATE_MAX_WORKERS)
+
+    async def translate(chunk: list[str]) -> tuple[list[str], dict]:
+        async with limit:
+            return await _translate_chunk_async(chunk, target_lang, mode)
+
+    tasks = [asyncio.ensure_future(translate(chunk)) for chunk in _translation_chunks(sentences)]
+    try:
+        results = await asyncio.gather(*tasks)
+    except HTTPException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    return _join_chunks(results)
+
+
+def _join_chunks(
+    results: list[tuple[list[str], dict | None]],
+) -> tuple[list[str], dict | None]:
+    """Concatenate per-chunk translations in order and sum their usage. A
+    chunk served without a Gemini call reports usage None; usage stays None
+    only when no chunk made one."""
+    translations: list[str] = []
+    usage: dict | None = None
+    for chunk_translations, chunk_usage in results:
+        translations.extend(chunk_translations)
+        if chunk_usage is None:
+            continue
+        if usage is None:
+            usage = {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0}
+        # Optional counters (repair_saved_tokens) are summed when present.
+        for key, value in chunk_usage.items():
+            usage[key] = usage.get(key, 0) + value
+    return translations, usage
+
+
+def sum_usage(usages: Iterable[dict | None]) -> dict | None:
+    """Sum the token usage of several calls; None when none reported any."""
+    return _join_chunks([([], usage) for usage in usages])[1]
+
+
+def _translate_chunk(sentences: list[str], target_lang: str, mode: str) -> tuple[list[str], dict]:
+    return _call_sync(_translate_chunk_steps(sentences, target_lang, mode), "translate")
+
+
+async def _translate_chunk_async(
+    sentences: list[str], target_lang: str, mode: str
+) -> tuple[list[str], dict]:
+    return await _call_async(_translate_chunk_steps(sentences, target_lang, mode), "translate")
+
+
+def _translate_chunk_steps(
+    sentences: list[str], target_lang: str, mode: str
+) -> Generator[dict, Any, tuple[list[str], dict]]:
     # Adjust prompt style based on mode.
     style_hint = (
         "Use natural, fluent translation."
@@ -61,43 +290,59 @@ def ai_translate_list(sentences: list[str], target_lang: str = "zh-TW", mode: st
         "Avoid omitting subjects or connectors."
     )
 
-    # JSON input keeps item boundaries without adding numeric prefixes that the
-    # model can accidentally copy into its translations.
-    input_json = json.dumps(sentences, ensure_ascii=False)
-    prompt = (
-        f"Translate each sentence into {target_lang}. "
-        f"{style_hint}"
-        "Return ONLY a JSON array of strings. "
-        "The array length and order MUST match the input. "
-        "Preserve line breaks within each string. "
-        "No explanation, no markdown.\n\n"
-        f"Input JSON array:\n{input_json}"
+    # Items are keyed by index instead of listed: the keys keep item
+    # boundaries without numeric prefixes the model could copy into its
+    # translations, and an answer with a few merged or dropped items can be
+    # repaired by re-requesting only those keys.
+    def request(indices: list[int], strict: bool) -> dict:
+        items = json.dumps({str(i): sentences[i] for i in indices}, ensure_ascii=False)
+        prompt = (
+            f"Translate each sentence into {target_lang}. "
+            f"{style_hint}"
+            "Return ONLY a JSON object that maps each input key to the "
+            "translation of that key's sentence. "
+            "Preserve line breaks within each string. "
+            "No explanation, no markdown.\n\n"
+            f"Input JSON object:\n{items}"
+        )
+        if strict:
+            # The usual miss is the model merging neighbouring items, so
+            # restate the one-key-one-sentence constraint more forcefully.
+            prompt += (
+                f"\n\nCRITICAL: The output MUST contain EXACTLY these {len(indices)} "
+                "keys, each holding only its own sentence's translation. "
+                "Do NOT merge, split, drop, or add items."
+            )
+        keys = [str(i) for i in indices]
+        return dict(
+            model=settings.gemini_basic_model,
+            contents=prompt,
+            config={
+                "response_mime_type": "application/json",
+                "response_json_schema": {
+                    "type": "object",
+                    "properties": {key: {"type": "string"} for key in keys},
+                    "required": keys,
+                },
+                "thinking_config": {"thinking_budget": 0},
+            },
         )
-    # Appended on the retry: the first miss is usually the model merging or
-    # dropping items, so restate the count constraint more forcefully.
-    strict_reminder = (
-        "\n\nCRITICAL: The output array MUST contain EXACTLY "
-        f"{len(sentences)} strings, one per input item, in the same order. "
-        "Do NOT merge, split, drop, or add items."
-    )
 
     # Accumulate usage across attempts so token accounting stays accurate even
     # when a retry happens.
     usage = {"prompt_tokens": 0, "response_tokens": 0, "total_tokens": 0}
     last_error: HTTPException | None = None
-
-    # A length/shape mismatch is usually a transient model slip; one retry with a
-    # stronger count constraint recovers it without bothering the user.
+    translations: list[str | None] = [None] * len(sentences)
+    pending = list(range(len(sentences)))
+    # Tokens of the first full request: roughly what a full retry would cost.
+    full_request_tokens = 0
+
+    # A shape mismatch is usually a transient model slip; one retry recovers
+    # it without bothering the user. Unparseable output retries the whole
+    # chunk; missing or merged items re-request just those keys.
     for attempt in range(2):
         try:
-            response = client.models.generate_content(
-                model=settings.gemini_basic_model,
-                contents=prompt + (strict_reminder if attempt else ""),
-                config={
-                    "response_mime_type": "application/json",
-                    "thinking_config": {"thinking_budget": 0},
-                }
-            )
+            response = yield request(pending, strict=bool(attempt))
             text = response.text.strip()
         except Exception as e:
             raise HTTPException(
@@ -108,39 +353,178 @@ def ai_translate_list(sentences: list[str], target_lang: str = "zh-TW", mode: st
         attempt_usage = _extract_usage(response)
         for key in usage:
             usage[key] += attempt_usage[key]
+        if not attempt:
+            full_request_tokens = attempt_usage["total_tokens"]
 
         # Parse and validate; on a recoverable model-output problem, record it
         # and let the loop retry once before surfacing the error.
         try:
-            translations = json.loads(text)
+            answer = json.loads(text)
         except Exception as e:
+            metrics.gemini.record_failure("translate", settings.gemini_basic_model, "json")
             last_error = HTTPException(
                 status_code=502,
                 detail=f"Failed to parse Gemini output as JSON.  Error: {e}.  Output preview: {text[:300]}"
             )
             continue
 
-        if not isinstance(translations, list):
-            last_error = HTTPException(status_code=502, detail="Gemini output is not a JSON array.")
+        if not isinstance(answer, dict):
+            metrics.gemini.record_failure("translate", settings.gemini_basic_model, "json")
+            last_error = HTTPException(status_code=502, detail="Gemini output is not a JSON object.")
             continue
 
-        if len(translations) != len(sentences):
-            last_error = HTTPException(
-                status_code=502,
-                detail=(
-                    "Gemini output length does not match input length: "
-                    f"expected {len(sentences)}, got {len(translations)}."
+        # Only the first, full answer is checked for merges: different short
+        # sentences ("Yes." / "Yeah.") can share a translation, so the
+        # repair's answer is accepted as is rather than failing the request.
+        missing = _unanswered_items(answer, pending, sentences, merges=not attempt)
+        for i in pending:
+            if i not in missing:
+                translations[i] = answer[str(i)]
+        if not missing:
+            if attempt and len(pending) < len(sentences):
+                usage["repair_saved_tokens"] = max(
+                    full_request_tokens - attempt_usage["total_tokens"], 0
+                )
+                logger.info(
+                    "translation repair: re-requested %d of %d items, ~%d tokens saved",
+                    len(pending),
+                    len(sentences),
+                    usage["repair_saved_tokens"],
                 )
+            return _strip_echoed_indices(translations), usage
+
+        metrics.gemini.record_failure("translate", settings.gemini_basic_model, "missing_items")
+        last_error = HTTPException(
+            status_code=502,
+            detail=(
+                f"Gemini output is missing items {missing}: "
+                f"expected {len(sentences)}, got {len(sentences) - len(missing)}."
             )
-            continue
+        )
+        pending = missing
 
-        if not all(isinstance(translation, str) for translation in translations):
-            last_error = HTTPException(status_code=502, detail="Gemini output array must contain only strings.")
-            continue
+    raise last_error
 
-        return _strip_echoed_indices(translations), usage
 
-    raise last_error
+def _unanswered_items(
+    answer: dict, indices: list[int], sentences: list[str], merges: bool = True
+) -> list[int]:
+    """Indices whose translation is absent, not a string, blank for a
+    non-blank sentence, or, with `merges`, identical to the next item's
+    translation of a different sentence (the trace a merge leaves behind).
+    Only neighbours that are both in `indices` are compared; the retry loop
+    skips the merge check on its repair attempt, where an accepted item
+    could be one of the pair."""
+    missing = set()
+    for i in indices:
+        value = answer.get(str(i))
+        if not isinstance(value, str) or (not value.strip() and sentences[i].strip()):
+            missing.add(i)
+            continue
+        neighbour = answer.get(str(i + 1))
+        if (
+            merges
+            and value.strip()
+            and neighbour == value
+            and i + 1 in indices
+            and sentences[i + 1] != sentences[i]
+        ):
+            missing.update((i, i + 1))
+    return sorted(missing)
+
+
+# Pipelined translation (/api/translate with pipelined=true): sentences per
+# Gemini request, and how many requests may be in flight at once.
+_PIPELINE_CHUNK_SIZE = 16
+_PIPELINE_MAX_IN_FLIGHT = 4
+
+
+def ai_translate_pipelined(
+    sentences: Iterable[str],
+    target_lang: str = "zh-TW",
+    mode: str = "normal",
+    translate: Callable[[list[str], str, str], tuple[list[str], dict | None]] | None = None,
+) -> tuple[list[str], list[str], dict | None]:
+    """Translate a lazily produced sentence stream in fixed-size chunks.
+
+    Each chunk's Gemini request starts as soon as the chunk fills, so the
+    producer (e.g. nlp.iter_sentences) keeps splitting while earlier chunks
+    translate. Returns (sentences, translations, summed usage) in input
+    order. Chunks are translated independently, without each other as
+    context. A failed chunk raises only after the other chunks have finished,
+    so their results still reach `translate`'s caches. `translate` replaces
+    the per-chunk call (e.g. with the translation cache's read-through
+    lookup)."""
+    translate = translate or _translate_chunk
+    originals: list[str] = []
+    futures = []
+    with ThreadPoolExecutor(max_workers=_PIPELINE_MAX_IN_FLIGHT) as pool:
+        chunk: list[str] = []
+        for sentence in sentences:
+            originals.append(sentence)
+            chunk.append(sentence)
+            if len(chunk) == _PIPELINE_CHUNK_SIZE:
+                futures.append(pool.submit(translate, chunk, target_lang, mode))
+                chunk = []
+        if chunk:
+            futures.append(pool.submit(translate, chunk, target_lang, mode))
+        results = [future.result() for future in futures]
+
+    translations, usage = _join_chunks(results)
+    return originals, translations, usage
+
+
+# Streamed translation (/api/translate/stream): the first chunk is kept small
+# so the first sentences reach the reader quickly; later chunks use the usual
+# _translation_chunks bounds.
+_STREAM_FIRST_CHUNK = 4
+
+
+async def ai_translate_stream(
+    sentences: list[str],
+    target_lang: str = "zh-TW",
+    mode: str = "normal",
+    translate: Callable[[list[str], str, str], Awaitable[tuple[list[str], dict | None]]] | None = None,
+) -> AsyncIterator[tuple[list[str], dict | None]]:
+    """Translate `sentences` in chunks, yielding (chunk translations, usage so
+    far) in input order as soon as a chunk and every chunk before it are done.
+
+    Up to _TRANSLATE_MAX_WORKERS chunks run at once. A chunk that still fails
+    after its retry raises its HTTPException from the iteration, once the
+    chunks already running have finished (they are paid for, so `translate`
+    still gets to cache them); closing the iterator early cancels the chunks
+    still running. `translate` replaces the per-chunk call (e.g. with the
+    translation cache's async lookup)."""
+    translate = translate or _translate_chunk_async
+    chunks = [sentences[:_STREAM_FIRST_CHUNK]] if sentences else []
+    chunks += _translation_chunks(sentences[_STREAM_FIRST_CHUNK:])
+    limit = asyncio.Semaphore(_TRANSLATE_MAX_WORKERS)
+    started = [False] * len(chunks)
+
+    async def run(index: int, chunk: list[str]) -> tuple[list[str], dict | None]:
+        async with limit:
+            started[index] = True
+            return await translate(chunk, target_lang, mode)
+
+    # Tasks start in order, so the semaphore admits earlier chunks first.
+    tasks = [asyncio.ensure_future(run(index, chunk)) for index, chunk in enumerate(chunks)]
+    usage: dict | None = None
+    try:
+        for task in tasks:
+            translations, chunk_usage = await task
+            _, usage = _join_chunks([([], usage), ([], chunk_usage)])
+            yield translations, usage
+    except Exception:
+        for task, running in zip(tasks, started):
+            if not running:
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Collect the cancelled (or failed) chunks so none is left unawaited.
+        await asyncio.gather(*tasks, return_exceptions=True)
 
 # Exam-layout annotation marks that OCR captures but that are not part of the
 # prose: circled reference markers (①-⑳), footnote superscript digits, and
@@ -165,6 +549,14 @@ def _normalize_ocr_text(text: str) -> str:
 
 # Extract text from an image (OCR) using Gemini vision.
 def ai_ocr_image(image_bytes: bytes, mime_type: str) -> tuple[str, dict]:
+    return _call_sync(_ocr_image_steps(image_bytes, mime_type), "ocr")
+
+
+async def ai_ocr_image_async(image_bytes: bytes, mime_type: str) -> tuple[str, dict]:
+    return await _call_async(_ocr_image_steps(image_bytes, mime_type), "ocr")
+
+
+def _ocr_image_steps(image_bytes: bytes, mime_type: str) -> Generator[dict, Any, tuple[str, dict]]:
     prompt = (
         "Extract all visible text from this image exactly as written. "
         "Preserve paragraph breaks (use a blank line between paragraphs). "
@@ -180,7 +572,7 @@ def ai_ocr_image(image_bytes: bytes, mime_type: str) -> tuple[str, dict]:
     )
 
     try:
-        response = client.models.generate_content(
+        response = yield dict(
             model=settings.gemini_basic_model,
             contents=[
                 types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
@@ -306,6 +698,12 @@ _STRUCTURE_RETRY_HINT = (
     "once, verbatim."
 )
 
+# Explicit context cache for _STRUCTURE_PROMPT (settings.gemini_prompt_cache):
+# each attempt then sends only the sentence and, on retries, the hint and
+# feedback. The response schema is generation config, which a cache cannot
+# hold, so it is still sent with every request.
+_STRUCTURE_PROMPT_CACHE = CachedPrefix(f"structure-prompt-v{PARSE_PROMPT_VERSION}", _STRUCTURE_PROMPT)
+
 
 def _leaf_texts(node: dict) -> list[str]:
     """Surface text of every leaf (childless) node, in order."""
@@ -394,17 +792,17 @@ def _lexical_token_count(text: str) -> int:
 
 def _phrase_requires_hierarchy(
     text: str,
-    tokens: list[dict[str, str | bool | int]] | None = None,
+    tokens: TokenTable | None = None,
 ) -> bool:
     """Whether word children alone would hide meaningful internal structure."""
     if _lexical_token_count(text) > _WORD_ONLY_PHRASE_LIMIT:
         return True
-    tokens = tokens if tokens is not None else analyze_tokens(text)
-    return any(str(token["dep"]) in _HIERARCHICAL_PHRASE_DEPS for token in tokens)
+    tokens = tokens if tokens is not None else context_tokens(text)
+    return bool(tokens.has_dep(_HIERARCHICAL_PHRASE_DEPS).any())
 
 
-def _is_finite_embedded_clause(token: dict[str, str | bool | int]) -> bool:
-    """Whether a token heads a finite subordinate clause (relative, content,
+def _finite_embedded_clauses(tokens: TokenTable) -> numpy.ndarray:
+    """Mask of tokens heading a finite subordinate clause (relative, content,
     or adverb clause) that must appear as a clause node.
 
     Non-finite complements must not qualify: in "allowed those challenges to
@@ -412,15 +810,15 @@ def _is_finite_embedded_clause(token: dict[str, str | bool | int]) -> bool:
     clausal complement with its own subject, but the prompt (rule 4) requires
     O + OC there — demanding a clause node would reject correct analyses."""
     return (
-        str(token["dep"]) in _FINITE_EMBEDDED_CLAUSE_DEPS
-        and bool(token["is_finite"])
-        and (bool(token["has_subject"]) or bool(token["has_marker"]))
+        tokens.has_dep(_FINITE_EMBEDDED_CLAUSE_DEPS)
+        & tokens.is_finite
+        & (tokens.has_subject | tokens.has_marker)
     )
 
 
 def _embedded_finite_clause_count(text: str) -> int:
     """Estimate finite subordinate clauses that must appear as clause nodes."""
-    return sum(1 for token in analyze_tokens(text) if _is_finite_embedded_clause(token))
+    return int(_finite_embedded_clauses(context_tokens(text)).sum())
 
 
 def _descendant_clause_count(node: dict) -> int:
@@ -432,46 +830,48 @@ def _descendant_clause_count(node: dict) -> int:
     return count
 
 
-def _dependency_subtree_indices(
-    root_index: int,
-    children_by_head: dict[int, list[int]],
-) -> set[int]:
-    indices = {root_index}
-    pending = [root_index]
-    while pending:
-        current = pending.pop()
-        for child_index in children_by_head.get(current, []):
-            if child_index not in indices:
-                indices.add(child_index)
-                pending.append(child_index)
-    return indices
+def _dependency_subtree_spans(
+    tokens: TokenTable,
+) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """(start index, end index, projective) of every row's dependency subtree,
+    computed for all rows at once. A subtree is projective when it covers
+    every Doc position between its first and last token."""
+    subtree = tokens.subtree
+    if not len(tokens):
+        empty = numpy.zeros(0, dtype=numpy.int64)
+        return empty, empty, numpy.zeros(0, dtype=bool)
+    first = subtree.argmax(axis=1)
+    last = len(tokens) - 1 - subtree[:, ::-1].argmax(axis=1)
+    starts, ends = tokens.index[first], tokens.index[last]
+    projective = ends - starts + 1 == subtree.sum(axis=1)
+    return starts, ends, projective
 
 
 def _infer_clause_pattern(
-    tokens: list[dict[str, str | bool | int]],
+    tokens: TokenTable,
     content_clause: bool = False,
 ) -> str:
-    root = next((token for token in tokens if bool(token["is_root"])), None)
-    root_index = int(root["index"]) if root is not None else -1
+    root = next((token for token in tokens if token["is_root"]), None)
+    root_index = root["index"] if root is not None else -1
     branches = [
         token
         for token in tokens
-        if int(token["head_index"]) == root_index
-        and int(token["index"]) != root_index
+        if token["head_index"] == root_index
+        and token["index"] != root_index
         if not (
             content_clause
-            and str(token["lower"]) == "that"
-            and str(token["dep"]) in _OBJECT_DEPS
+            and token["lower"] == "that"
+            and token["dep"] in _OBJECT_DEPS
         )
     ]
-    deps = {str(token["dep"]) for token in branches}
+    deps = {token["dep"] for token in branches}
     # Rule 4 of the prompt: a non-finite clausal complement is O + OC, not a
     # clause — "helps him prepare" is SVOC even though spaCy parses "him" as
     # the inner verb's subject rather than as a direct object.
     nonfinite_complements = [
         token
         for token in branches
-        if str(token["dep"]) in {"ccomp", "xcomp"} and not bool(token["is_finite"])
+        if token["dep"] in {"ccomp", "xcomp"} and not token["is_finite"]
     ]
     has_indirect = bool(deps & _INDIRECT_OBJECT_DEPS)
     has_object = bool(deps & _OBJECT_DEPS)
@@ -480,7 +880,7 @@ def _infer_clause_pattern(
         return "SVOO"
     if has_object and (has_complement or nonfinite_complements):
         return "SVOC"
-    if any(bool(token["has_subject"]) for token in nonfinite_complements):
+    if any(token["has_subject"] for token in nonfinite_complements):
         return "SVOC"
     # A finite content clause or an infinitive/gerund complement fills the
     # object slot ("said (that) she left", "wants to go").
@@ -488,99 +888,87 @@ def _infer_clause_pattern(
         return "SVO"
     if has_complement:
         return "SVC"
-    if root is not None and str(root["pos"]) == "AUX":
+    if root is not None and root["pos"] == "AUX":
         # A bare copula with no complement needs its adverbial to be complete:
         # "She is in the kitchen" is SVA, not SVC.
-        if any(str(token["dep"]) in {"prep", "advmod", "npadvmod"} for token in branches):
+        if any(token["dep"] in {"prep", "advmod", "npadvmod"} for token in branches):
             return "SVA"
         return "SVC"
     return "SV"
 
 
 def _dependency_group_candidates(
-    tokens: list[dict[str, str | bool | int]],
+    tokens: TokenTable,
     parent_type: str,
     parent_label: str = "",
 ) -> list[dict[str, int | str]]:
     """Find projective dependency branches worth displaying as nested nodes."""
-    children_by_head: dict[int, list[int]] = {}
-    for token in tokens:
-        index = int(token["index"])
-        head_index = int(token["head_index"])
-        if index != head_index:
-            children_by_head.setdefault(head_index, []).append(index)
+    verbal = tokens.has_dep({"acl", "advcl", "xcomp"}) & tokens.has_pos({"VERB", "AUX"})
+    in_clause = parent_type == "clause"
+    kinds = numpy.select(
+        [
+            _finite_embedded_clauses(tokens),
+            verbal & tokens.has_dep({"xcomp"}),
+            verbal,
+            tokens.has_dep({"prep", "pcomp"}),
+            in_clause & tokens.has_dep(_SUBJECT_DEPS | _OBJECT_DEPS | _INDIRECT_OBJECT_DEPS),
+            in_clause & tokens.has_dep(_COMPLEMENT_DEPS),
+            (parent_type == "phrase") & tokens.has_dep({"pobj"}),
+        ],
+        ["clause", "infinitive", "participle", "preposition", "noun", "complement", "noun"],
+        default="",
+    )
+    starts, ends, projective = _dependency_subtree_spans(tokens)
+    # Non-projective branches cannot safely become one contiguous surface span.
+    rows = numpy.flatnonzero((kinds != "") & ~tokens.is_root & projective)
 
     candidates: list[dict[str, int | str]] = []
-    token_by_index = {int(token["index"]): token for token in tokens}
-    for token in tokens:
-        index = int(token["index"])
-        if bool(token["is_root"]):
-            continue
-        dep = str(token["dep"])
-        pos = str(token["pos"])
-
-        kind: str | None = None
-        if _is_finite_embedded_clause(token):
-            kind = "clause"
-        elif dep in {"acl", "advcl", "xcomp"} and pos in {"VERB", "AUX"}:
-            kind = "infinitive" if dep == "xcomp" else "participle"
-        elif dep in {"prep", "pcomp"}:
-            kind = "preposition"
-        elif parent_type == "clause" and dep in _SUBJECT_DEPS | _OBJECT_DEPS | _INDIRECT_OBJECT_DEPS:
-            kind = "noun"
-        elif parent_type == "clause" and dep in _COMPLEMENT_DEPS:
-            kind = "complement"
-        elif parent_type == "phrase" and dep == "pobj":
-            kind = "noun"
-        if kind is None:
-            continue
-
-        subtree = _dependency_subtree_indices(index, children_by_head)
-        start_index, end_index = min(subtree), max(subtree)
+    first_index = tokens.index[0] if len(tokens) else -1
+    for row in rows:
+        token = tokens[row]
+        kind = str(kinds[row])
+        dep = token["dep"]
+        start_index, end_index = int(starts[row]), int(ends[row])
+        start_row = tokens.row_of(start_index)
         # A clause-initial relative pronoun misparsed as a determiner of the
         # following noun ("that time gives ...") must stay outside the grouped
         # noun phrase so it can be labeled as the clause's opener.
         if (
             parent_label == "關係子句"
             and kind == "noun"
-            and start_index == int(tokens[0]["index"])
-            and str(token_by_index[start_index]["lower"]) in {"that", "which"}
-            and str(token_by_index[start_index]["dep"]) == "det"
+            and start_index == first_index
+            and tokens.lower[start_row] in {"that", "which"}
+            and tokens.value("dep", start_row) == "det"
         ):
             start_index += 1
-        # Non-projective branches cannot safely become one contiguous surface span.
-        if any(i not in subtree for i in range(start_index, end_index + 1)):
-            continue
         if start_index == end_index and kind in {"noun", "complement"}:
             continue
         displayed_dep = dep
-        head = token_by_index.get(int(token["head_index"]))
-        first = token_by_index.get(start_index)
+        head_row = tokens.row_of(token["head_index"])
+        first_row = tokens.row_of(start_index)
         if (
             kind == "clause"
             and dep in {"acl", "relcl"}
-            and head is not None
-            and first is not None
-            and str(head["lower"]) in _CONTENT_CLAUSE_NOUNS
-            and str(first["lower"]) == "that"
+            and head_row is not None
+            and first_row is not None
+            and tokens.lower[head_row] in _CONTENT_CLAUSE_NOUNS
+            and tokens.lower[first_row] == "that"
         ):
             displayed_dep = "content"
-            opener = next(
+            opener_row = next(
                 (
-                    token_by_index.get(i)
+                    tokens.row_of(i)
                     for i in (end_index, end_index + 1)
-                    if token_by_index.get(i) is not None
-                    and str(token_by_index[i]["text"]) in {'"', "“", "‘"}
+                    if tokens.row_of(i) is not None
+                    and tokens.text[tokens.row_of(i)] in {'"', "“", "‘"}
                 ),
                 None,
             )
-            if opener is not None:
-                opener_index = int(opener["index"])
+            if opener_row is not None:
                 closing_quotes = [
-                    int(item["index"])
-                    for item in tokens
-                    if int(item["index"]) > opener_index
-                    and str(item["text"]) in {'"', "”", "’"}
+                    int(tokens.index[i])
+                    for i in range(opener_row + 1, len(tokens))
+                    if tokens.text[i] in {'"', "”", "’"}
                 ]
                 if closing_quotes:
                     end_index = closing_quotes[-1]
@@ -606,21 +994,21 @@ def _dependency_group_candidates(
             continue
         # Token indices should always exist, but checking here keeps malformed
         # parser output from becoming a tree-construction exception.
-        if start in token_by_index and end in token_by_index:
+        if tokens.row_of(start) is not None and tokens.row_of(end) is not None:
             selected.append(candidate)
     return selected
 
 
 def _dependency_group_node(
     parent_text: str,
-    tokens: list[dict[str, str | bool | int]],
+    tokens: TokenTable,
     candidate: dict[str, int | str],
     parent_type: str,
 ) -> dict:
     start = int(candidate["start"])
     end = int(candidate["end"])
-    group_tokens = [token for token in tokens if start <= int(token["index"]) <= end]
-    text = parent_text[int(group_tokens[0]["start"]):int(group_tokens[-1]["end"])]
+    group_tokens = [token for token in tokens if start <= token["index"] <= end]
+    text = parent_text[group_tokens[0]["start"]:group_tokens[-1]["end"]]
     kind = str(candidate["kind"])
     dep = str(candidate["dep"])
 
@@ -632,7 +1020,7 @@ def _dependency_group_node(
             "content": "同位子句",
         }.get(dep, "同位子句")
         role = "ADV" if dep == "advcl" else "MOD"
-        fresh_group_tokens = analyze_tokens(text)
+        fresh_group_tokens = context_tokens(text)
         node = {
             "text": text,
             "role": role,
@@ -653,7 +1041,7 @@ def _dependency_group_node(
         elif kind == "participle":
             # An adverbial branch headed by "to + verb" is a purpose
             # infinitive, not a participle.
-            label = "不定詞片語" if str(group_tokens[0]["lower"]) == "to" else "分詞片語"
+            label = "不定詞片語" if group_tokens[0]["lower"] == "to" else "分詞片語"
             role = "ADV" if parent_type == "clause" else "MOD"
         elif kind == "complement":
             label, role = "形容詞片語", "SC"
@@ -679,7 +1067,7 @@ def _nest_flat_dependency_groups(node: dict) -> None:
     children = node.get("children") or []
     if not children or not all(child.get("type") == "word" for child in children):
         return
-    tokens = analyze_tokens(node["text"])
+    tokens = context_tokens(node["text"])
     if len(tokens) != len(children):
         return
     candidates = _dependency_group_candidates(
@@ -697,7 +1085,7 @@ def _nest_flat_dependency_groups(node: dict) -> None:
     new_children: list[dict] = []
     position = 0
     while position < len(tokens):
-        token_index = int(tokens[position]["index"])
+        token_index = int(tokens.index[position])
         candidate = by_start.get(token_index)
         if candidate is None:
             new_children.append(rebuilt_words[position])
@@ -707,16 +1095,16 @@ def _nest_flat_dependency_groups(node: dict) -> None:
             _dependency_group_node(node["text"], tokens, candidate, str(node["type"]))
         )
         end = int(candidate["end"])
-        while position < len(tokens) and int(tokens[position]["index"]) <= end:
+        while position < len(tokens) and tokens.index[position] <= end:
             position += 1
     node["children"] = new_children
 
 
-def _phrase_word_node(token: dict[str, str | bool | int]) -> dict:
+def _phrase_word_node(token: TokenRow) -> dict:
     """Map a spaCy token to the controlled structure roles and labels."""
-    text = str(token["text"])
-    lower = str(token["lower"])
-    pos = str(token["pos"])
+    text = token["text"]
+    lower = token["lower"]
+    pos = token["pos"]
 
     if pos == "PUNCT":
         role, label = "PUNCT", "標點"
@@ -726,7 +1114,7 @@ def _phrase_word_node(token: dict[str, str | bool | int]) -> dict:
         role, label = "ADJ", "形容詞"
     elif pos == "ADV":
         role, label = "ADV", "副詞"
-    elif pos == "ADP" or lower == "upon" or str(token["dep"]) == "prep":
+    elif pos == "ADP" or lower == "upon" or token["dep"] == "prep":
         role, label = "PREP", "介系詞"
     elif pos in {"CCONJ", "SCONJ"}:
         role, label = "CONJ", "連接詞"
@@ -741,7 +1129,7 @@ def _phrase_word_node(token: dict[str, str | bool | int]) -> dict:
     else:
         role, label = "MOD", "名詞"
 
-    if bool(token["is_root"]) and role not in {"PUNCT", "PREP"}:
+    if token["is_root"] and role not in {"PUNCT", "PREP"}:
         role = "HEAD"
 
     return {"text": text, "role": role, "type": "word", "label": label}
@@ -793,25 +1181,10 @@ _CLAUSE_LABEL_BY_ROLE = {
 }
 
 
-def _clause_branch_dep(
-    token: dict[str, str | bool | int],
-    tokens_by_index: dict[int, dict[str, str | bool | int]],
-    root_index: int,
-) -> str:
-    """Dependency label of the token's top-level branch under the clause root."""
-    current = token
-    visited: set[int] = set()
-    while int(current["index"]) != root_index:
-        current_index = int(current["index"])
-        head_index = int(current["head_index"])
-        if head_index == root_index or head_index == current_index or head_index in visited:
-            break
-        visited.add(current_index)
-        parent = tokens_by_index.get(head_index)
-        if parent is None:
-            break
-        current = parent
-    return str(current["dep"])
+def _clause_branch_deps(tokens: TokenTable, root_row: int) -> list[str]:
+    """Dependency label of every token's top-level branch under the clause
+    root, resolved for all tokens at once."""
+    return [tokens.value("dep", row) for row in tokens.branch_rows(root_row)]
 
 
 def _clause_word_nodes(node: dict) -> list[dict]:
@@ -821,25 +1194,26 @@ def _clause_word_nodes(node: dict) -> list[dict]:
     This fallback only fills an accidentally empty clause so one malformed nested
     node does not discard an otherwise valid analysis.
     """
-    tokens = analyze_tokens(node["text"])
+    tokens = context_tokens(node["text"])
     if not tokens:
         return []
 
-    tokens_by_index = {int(token["index"]): token for token in tokens}
-    root = next((token for token in tokens if bool(token["is_root"])), None)
-    if root is None:
+    root_rows = numpy.flatnonzero(tokens.is_root)
+    if not len(root_rows):
         return [_phrase_word_node(token) for token in tokens]
 
-    root_index = int(root["index"])
+    root_row = int(root_rows[0])
+    root_index = int(tokens.index[root_row])
+    branch_deps = _clause_branch_deps(tokens, root_row)
+    first_index = int(tokens.index[0])
     pattern = node.get("pattern")
     word_nodes: list[dict] = []
 
-    for token in tokens:
-        dep = str(token["dep"])
-        pos = str(token["pos"])
-        lower = str(token["lower"])
-        token_index = int(token["index"])
-        branch_dep = _clause_branch_dep(token, tokens_by_index, root_index)
+    for token, branch_dep in zip(tokens, branch_deps):
+        dep = token["dep"]
+        pos = token["pos"]
+        lower = token["lower"]
+        token_index = token["index"]
 
         if pos == "PUNCT":
             role = "PUNCT"
@@ -853,7 +1227,7 @@ def _clause_word_nodes(node: dict) -> list[dict]:
             node.get("label") == "關係子句"
             and dep == "det"
             and lower in {"that", "which"}
-            and token_index == int(tokens[0]["index"])
+            and token_index == first_index
         ):
             role = "MARK"
         elif dep == "cc":
@@ -861,7 +1235,7 @@ def _clause_word_nodes(node: dict) -> list[dict]:
         elif token_index == root_index:
             # A re-parsed fragment can root at a noun; only a verb may be V.
             role = "V" if pos in {"VERB", "AUX"} else None
-        elif dep in {"aux", "auxpass", "cop", "prt"} and int(token["head_index"]) == root_index:
+        elif dep in {"aux", "auxpass", "cop", "prt"} and token["head_index"] == root_index:
             # Only the root's own verb group is V — an embedded verb's "to" or
             # auxiliary must not be underlined as the clause's verb.
             role = "V"
@@ -902,7 +1276,7 @@ def _expand_missing_details(node: dict) -> None:
     children = node.get("children")
     if node.get("type") == "phrase" and not children:
         if _lexical_token_count(node["text"]) >= 3:
-            tokens = analyze_tokens(node["text"])
+            tokens = context_tokens(node["text"])
             token_nodes = [_phrase_word_node(token) for token in tokens]
             if token_nodes:
                 node["children"] = token_nodes
@@ -1008,18 +1382,18 @@ def _nesting_issue(node: dict, path: str = "ROOT") -> str | None:
 def _phrase_label_from_text(text: str) -> str:
     """Phrase-level label inferred from the span's own syntax, for repairing a
     phrase node that arrived with a word-level label."""
-    tokens = analyze_tokens(text)
+    tokens = context_tokens(text)
     if not tokens:
         return "名詞片語"
     first = tokens[0]
-    if str(first["lower"]) == "to" and str(first["pos"]) == "PART":
+    if first["lower"] == "to" and first["pos"] == "PART":
         return "不定詞片語"
-    if str(first["pos"]) == "ADP" or str(first["dep"]) == "prep":
+    if first["pos"] == "ADP" or first["dep"] == "prep":
         return "介系詞片語"
-    root = next((token for token in tokens if bool(token["is_root"])), first)
-    root_pos = str(root["pos"])
+    root = next((token for token in tokens if token["is_root"]), first)
+    root_pos = root["pos"]
     if root_pos == "VERB":
-        tag = str(root["tag"])
+        tag = root["tag"]
         if tag == "VBG":
             return "動名詞片語"
         if tag == "VB":
@@ -1114,7 +1488,7 @@ def _fix_verbal_word_labels(structure: dict, sentence: str) -> None:
     they act as a gerund (-> 名詞) or a participial adjective (-> 形容詞),
     e.g. 'reading' in 'found spelling and reading difficult' or 'grounded' in
     'described as relatable and grounded'."""
-    tokens = analyze_tokens(sentence)
+    tokens = context_tokens(sentence)
     leaves: list[dict] = []
 
     def collect(node: dict) -> None:
@@ -1139,15 +1513,11 @@ def _fix_verbal_word_labels(structure: dict, sentence: str) -> None:
             or leaf.get("role") == "V"
         ):
             continue
-        covering = [
-            token
-            for token in tokens
-            if int(token["start"]) < cursor and int(token["end"]) > start
-        ]
+        covering = numpy.flatnonzero((tokens.start < cursor) & (tokens.end > start))
         if len(covering) != 1:
             continue  # only single-word leaves are relabeled confidently
-        token = covering[0]
-        pos, tag, dep = str(token["pos"]), str(token["tag"]), str(token["dep"])
+        token = tokens[covering[0]]
+        pos, tag, dep = token["pos"], token["tag"], token["dep"]
         if pos == "ADJ" or (tag == "VBN" and dep in _ADJECTIVAL_PARTICIPLE_DEPS):
             leaf["label"] = "形容詞"
         elif tag == "VBG" and dep in _NOMINAL_GERUND_DEPS:
@@ -1170,19 +1540,19 @@ def _relative_clause_gap_symbol(node: dict) -> str | None:
     the badge reflects the true clause pattern instead of showing SV."""
     if node.get("label") != "關係子句":
         return None
-    tokens = analyze_tokens(str(node.get("text", "")))
+    tokens = context_tokens(str(node.get("text", "")))
     if not tokens:
         return None
     first = tokens[0]
-    if str(first["lower"]) not in _RELATIVIZERS:
+    if first["lower"] not in _RELATIVIZERS:
         return None
-    if str(first["dep"]) in _SUBJECT_DEPS:
+    if first["dep"] in _SUBJECT_DEPS:
         return "S"
-    root = next((token for token in tokens if bool(token["is_root"])), None)
-    if root is None or str(root["pos"]) != "VERB":
+    root = next((token for token in tokens if token["is_root"]), None)
+    if root is None or root["pos"] != "VERB":
         return None
-    has_object = any(str(token["dep"]) in _OBJECT_DEPS for token in tokens)
-    has_subject = any(str(token["dep"]) in _SUBJECT_DEPS for token in tokens)
+    has_object = bool(tokens.has_dep(_OBJECT_DEPS).any())
+    has_subject = bool(tokens.has_dep(_SUBJECT_DEPS).any())
     if has_subject and not has_object:
         return "O"
     return None
@@ -1293,6 +1663,18 @@ _STRUCTURE_RETRY_TEMPERATURE = 0.4
 # Producing a verbatim nested tree for a long compound-complex sentence needs
 # planning room; a small budget makes first attempts drop or merge words.
 _STRUCTURE_THINKING_BUDGET = 4096
+# Status codes Gemini answers for a cached_content that expired or was
+# deleted.
+_CACHE_HANDLE_GONE = (403, 404)
+
+
+class StructureAnalysisError(HTTPException):
+    """502 raised when every structure attempt was answered but rejected.
+    Unlike a failed request (plain HTTPException), asking again at once is
+    unlikely to help, so callers may remember it (see structure._FAILURES)."""
+
+    def __init__(self, detail: str) -> None:
+        super().__init__(status_code=502, detail=detail)
 
 
 def _prune_empty_children(node: dict) -> None:
@@ -1311,9 +1693,36 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
 
     Returns (structure_dict, usage). Retries prefer a fully nested tree; when
     every attempt is well-formed but under-nested, the last such tree is
-    served rather than failing the analysis. Raises HTTPException(502) only
-    when no attempt yields a well-formed tree that reproduces the sentence —
-    the caller surfaces that so the UI can offer a retry."""
+    served rather than failing the analysis. Raises StructureAnalysisError
+    (a 502) only when no attempt yields a well-formed tree that reproduces the
+    sentence — the caller surfaces that so the UI can offer a retry.
+
+    Every node-level spaCy check across all attempts reads from one parse of
+    the sentence (see nlp.SentenceContext).
+
+    With settings.gemini_prompt_cache, _STRUCTURE_PROMPT is read from a
+    Gemini context cache and usage gains `cached_prompt_tokens`."""
+    cached_prompt = _STRUCTURE_PROMPT_CACHE.ensure(client, settings.gemini_adv_model)
+    return _call_sync(_structure_steps(sentence, cached_prompt), "parse")
+
+
+async def ai_analyze_structure_async(sentence: str) -> tuple[dict, dict]:
+    """Async ai_analyze_structure. The spaCy post-processing between attempts
+    runs in the default executor, off the event loop."""
+    cached_prompt = await _STRUCTURE_PROMPT_CACHE.ensure_async(client, settings.gemini_adv_model)
+    return await _call_async(_structure_steps(sentence, cached_prompt), "parse", offload=True)
+
+
+def _structure_steps(
+    sentence: str, cached_prompt: str | None = None
+) -> Generator[dict, Any, tuple[dict, dict]]:
+    with sentence_context(sentence):
+        return (yield from _analyze_structure(sentence, cached_prompt))
+
+
+def _analyze_structure(
+    sentence: str, cached_prompt: str | None = None
+) -> Generator[dict, Any, tuple[dict, dict]]:
     # Imported here to avoid a circular import (models has no service deps).
     from app.models.parse import StructureNode
 
@@ -1327,42 +1736,73 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
     previous_feedback: str | None = None
 
     for attempt in range(_STRUCTURE_ATTEMPTS):
-        contents = _STRUCTURE_PROMPT + sentence
+        suffix = sentence
         temperature = 0.0
         if attempt:
-            contents += _STRUCTURE_RETRY_HINT
+            suffix += _STRUCTURE_RETRY_HINT
             if previous_feedback:
-                contents += f"\n\nPrevious-attempt feedback: {previous_feedback}"
+                suffix += f"\n\nPrevious-attempt feedback: {previous_feedback}"
             temperature = _STRUCTURE_RETRY_TEMPERATURE
 
+        config = {
+            "response_mime_type": "application/json",
+            # Enforce the node shape (role/type/label enums, recursion via
+            # $ref) at the API level so the model cannot mix up fields —
+            # e.g. putting a label value like 介系詞片語 into `type`.
+            # Backend-derived fields are stripped from the schema.
+            "response_json_schema": _gemini_structure_schema(),
+            "temperature": temperature,
+            "thinking_config": {
+                "thinking_budget": _STRUCTURE_THINKING_BUDGET,
+            },
+        }
         try:
-            response = client.models.generate_content(
-                model=settings.gemini_adv_model,
-                contents=contents,
-                config={
-                    "response_mime_type": "application/json",
-                    # Enforce the node shape (role/type/label enums, recursion via
-                    # $ref) at the API level so the model cannot mix up fields —
-                    # e.g. putting a label value like 介系詞片語 into `type`.
-                    # Backend-derived fields are stripped from the schema.
-                    "response_json_schema": _gemini_structure_schema(),
-                    "temperature": temperature,
-                    "thinking_config": {
-                        "thinking_budget": _STRUCTURE_THINKING_BUDGET,
-                    },
-                },
-            )
+            if cached_prompt is None:
+                response = yield dict(
+                    model=settings.gemini_adv_model,
+                    contents=_STRUCTURE_PROMPT + suffix,
+                    config=config,
+                )
+            else:
+                try:
+                    response = yield dict(
+                        model=settings.gemini_adv_model,
+                        contents=suffix,
+                        config={**config, "cached_content": cached_prompt},
+                    )
+                except errors.ClientError as e:
+                    # Only "cached content not found / expired" means the
+                    # handle is gone; a 429 or a bad request fails the
+                    # attempt like any other request error.
+                    if e.code not in _CACHE_HANDLE_GONE:
+                        raise
+                    # The handle expired or was deleted upstream: drop it and
+                    # resend this attempt with the prompt inline.
+                    logger.warning("Cached structure prompt %s rejected: %s", cached_prompt, e)
+                    _STRUCTURE_PROMPT_CACHE.invalidate(cached_prompt)
+                    cached_prompt = None
+                    response = yield dict(
+                        model=settings.gemini_adv_model,
+                        contents=_STRUCTURE_PROMPT + suffix,
+                        config=config,
+                    )
         except Exception as e:
             raise HTTPException(status_code=502, detail=f"Gemini API request failed: {e}")
 
         attempt_usage = _extract_usage(response)
-        for key in usage:
+        for key in attempt_usage:
             usage[key] += attempt_usage[key]
+        if cached_prompt is not None:
+            # Prompt tokens served from the context cache (billed at the
+            # cached rate); they are still counted in prompt_tokens.
+            usage["cached_prompt_tokens"] = usage.get("cached_prompt_tokens", 0) + _cached_tokens(response)
 
         try:
             data = json.loads(response.text)
             node = StructureNode.model_validate(data)
         except (json.JSONDecodeError, ValidationError) as e:
+            reason = "json" if isinstance(e, json.JSONDecodeError) else "validation"
+            metrics.gemini.record_failure("parse", settings.gemini_adv_model, reason)
             last_error = HTTPException(
                 status_code=502,
                 detail=f"Gemini structure analysis returned invalid data: {e}",
@@ -1377,6 +1817,7 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
         _repair_missing_trailing_punct(structure, sentence)
         _lift_trailing_punct(structure)
         if not _reconstructs_sentence(structure, sentence):
+            metrics.gemini.record_failure("parse", settings.gemini_adv_model, "reconstruction")
             leaves = " | ".join(_leaf_texts(structure))
             previous_feedback = (
                 "your answer did not reproduce the sentence verbatim. Its leaf "
@@ -1391,6 +1832,7 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
             continue
         malformed = _malformed_issue(structure)
         if malformed:
+            metrics.gemini.record_failure("parse", settings.gemini_adv_model, "malformed")
             previous_feedback = f"your answer was malformed: {malformed}."
             last_error = HTTPException(
                 status_code=502,
@@ -1405,6 +1847,7 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
         # Well-formed but under-nested: keep it and retry for a fully nested
         # answer. Serving a shallow-but-correct tree beats failing the whole
         # analysis, so this never becomes a hard error on its own.
+        metrics.gemini.record_failure("parse", settings.gemini_adv_model, "nesting")
         previous_feedback = f"your answer was rejected because {nesting_issue}."
         degraded, degraded_issue = structure, nesting_issue
         last_error = HTTPException(
@@ -1416,13 +1859,14 @@ def ai_analyze_structure(sentence: str) -> tuple[dict, dict]:
         )
 
     if degraded is not None:
+        metrics.gemini.record_degraded("parse", settings.gemini_adv_model)
         logger.warning(
             "Serving under-nested structure analysis for %r: %s",
             sentence,
             degraded_issue,
         )
         return _finalize_structure(degraded, sentence), usage
-    raise last_error
+    raise StructureAnalysisError(last_error.detail)
 
 
 # --- Reading-comprehension quiz generation --------------------------------------
@@ -1448,6 +1892,17 @@ def ai_generate_quiz(article: str) -> tuple[list[dict], dict]:
     article. Returns (questions, usage); each question dict matches
     app.models.quiz.ComprehensionQuestion. Raises HTTPException(502) when no
     attempt yields valid questions."""
+    # Nobody is waiting on a click: queue behind interactive calls.
+    with admission.priority("background"):
+        return _call_sync(_quiz_steps(article), "quiz")
+
+
+async def ai_generate_quiz_async(article: str) -> tuple[list[dict], dict]:
+    with admission.priority("background"):
+        return await _call_async(_quiz_steps(article), "quiz")
+
+
+def _quiz_steps(article: str) -> Generator[dict, Any, tuple[list[dict], dict]]:
     prompt = (
         "You are creating a reading-comprehension quiz for an English learner "
         "whose native language is Traditional Chinese (zh-TW).\n\n"
@@ -1479,7 +1934,7 @@ def ai_generate_quiz(article: str) -> tuple[list[dict], dict]:
     # constraint restated recovers it (same policy as ai_translate_list).
     for attempt in range(2):
         try:
-            response = client.models.generate_content(
+            response = yield dict(
                 model=settings.gemini_basic_model,
                 contents=prompt + (strict_reminder if attempt else ""),
                 config={
@@ -1506,6 +1961,8 @@ def ai_generate_quiz(article: str) -> tuple[list[dict], dict]:
                 if not 0 <= item.answer_index <= 3:
                     raise ValueError("answer_index must be 0-3")
         except (json.JSONDecodeError, ValidationError, ValueError) as e:
+            reason = "json" if isinstance(e, json.JSONDecodeError) else "validation"
+            metrics.gemini.record_failure("quiz", settings.gemini_basic_model, reason)
             last_error = HTTPException(
                 status_code=502,
                 detail=f"Gemini quiz generation returned invalid data: {e}",
@@ -1567,6 +2024,18 @@ def normalize_pos(raw: str) -> str:
 
 # Ask Gemini to identify lemma/pos from sentence context and fill requested vocab fields.
 def ai_lookup_word(selected_text: str, sentence: str, options: VocabOptions) -> tuple[dict, dict]:
+    return _call_sync(_lookup_word_steps(selected_text, sentence, options), "vocab_lookup")
+
+
+async def ai_lookup_word_async(
+    selected_text: str, sentence: str, options: VocabOptions
+) -> tuple[dict, dict]:
+    return await _call_async(_lookup_word_steps(selected_text, sentence, options), "vocab_lookup")
+
+
+def _lookup_word_steps(
+    selected_text: str, sentence: str, options: VocabOptions
+) -> Generator[dict, Any, tuple[dict, dict]]:
     tasks = []
     if options.translation:
         tasks.append("translation: Traditional Chinese (zh-TW) meaning of this word in context.")
@@ -1627,7 +2096,7 @@ Rules:
 """
 
     try:
-        response = client.models.generate_content(
+        response = yield dict(
             model=settings.gemini_basic_model,
             contents=prompt,
             config={
@@ -1639,6 +2108,8 @@ Rules:
         raw_result = json.loads(response.text)
         validated = _GeminiVocabResult.model_validate(raw_result)
     except (json.JSONDecodeError, TypeError, AttributeError, ValidationError) as e:
+        reason = "validation" if isinstance(e, ValidationError) else "json"
+        metrics.gemini.record_failure("vocab_lookup", settings.gemini_basic_model, reason)
         logger.warning("Gemini vocabulary lookup returned invalid data: %s", e)
         raise HTTPException(
             status_code=502,
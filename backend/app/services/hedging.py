@@ -0,0 +1,135 @@
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies (seconds) for picking a hedge
+    threshold. percentile() is None until `min_samples` calls are recorded,
+    so a cold process never hedges on a guess."""
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p: float) -> float | None:
+        """Nearest-rank percentile of the window, e.g. p=95."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0}
+        return {
+            "samples": len(samples),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 1),
+            "max_ms": round(samples[-1] * 1000, 1),
+        }
+
+
+class Hedger:
+    """Issue a second identical call when the first is slower than the
+    tracker's recent `percentile` latency (never sooner than `min_delay`).
+
+    The first successful result wins. The other call is not cancelled (its
+    request is already being billed upstream): it runs to completion and a
+    successful result is handed to `on_late`, so the caller can log its
+    usage. If run() itself is cancelled once hedging may start, every call
+    still in flight is handed over the same way. Both calls failing raises
+    the first call's exception. Without `on_late` the call is only timed,
+    never hedged."""
+
+    def __init__(self, percentile: float, min_delay: float, tracker: LatencyTracker | None = None) -> None:
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.tracker = tracker or LatencyTracker()
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> float | None:
+        threshold = self.tracker.percentile(self.percentile)
+        return None if threshold is None else max(threshold, self.min_delay)
+
+    async def _timed(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        result = await call()
+        self.tracker.record(time.monotonic() - started)
+        return result
+
+    async def run(
+        self, call: Callable[[], Awaitable[Any]], on_late: Callable[[Any], None] | None
+    ) -> Any:
+        self.calls += 1
+        delay = None if on_late is None else self.delay()
+        first = asyncio.ensure_future(self._timed(call))
+        if delay is None:
+            return await first
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay)
+            if done:
+                return first.result()
+
+            self.hedged += 1
+            second = asyncio.ensure_future(self._timed(call))
+            tasks.append(second)
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [task for task in tasks if task in done and not task.exception()]
+                if succeeded:
+                    winner = succeeded[0]
+                    self.hedge_wins += winner is second
+                    for late in succeeded[1:]:
+                        on_late(late.result())
+                    for late in pending:
+                        _hand_over_when_done(late, on_late)
+                    return winner.result()
+            raise first.exception()
+        except asyncio.CancelledError:
+            # asyncio.wait does not cancel the calls; nobody awaits them now.
+            for task in tasks:
+                _hand_over_when_done(task, on_late)
+            raise
+
+    def stats(self) -> dict:
+        delay = self.delay()
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "threshold_ms": None if delay is None else round(delay * 1000, 1),
+            "latency": self.tracker.stats(),
+        }
+
+
+# Calls handed over to on_late, kept referenced until they finish (the event
+# loop holds tasks only weakly).
+_HANDED_OVER: set[asyncio.Future] = set()
+
+
+def _hand_over_when_done(task: asyncio.Future, on_late: Callable[[Any], None]) -> None:
+    _HANDED_OVER.add(task)
+    task.add_done_callback(lambda done: _hand_over(done, on_late))
+
+
+def _hand_over(task: asyncio.Future, on_late: Callable[[Any], None]) -> None:
+    _HANDED_OVER.discard(task)
+    # exception() also marks a failure as retrieved.
+    if not task.cancelled() and task.exception() is None:
+        on_late(task.result())
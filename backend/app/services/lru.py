@@ -0,0 +1,114 @@
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any, Hashable
+
+
+def approx_size(value: Any) -> int:
+    """Approximate bytes held by a JSON-like value (nested dicts, lists and
+    scalars), counting containers and their contents once each. Interned
+    strings shared between entries are counted per entry, so this errs high."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approx_size(k) + approx_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(approx_size(item) for item in value)
+    return size
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU map with hit/miss/eviction counters.
+
+    Routes run in FastAPI's threadpool, so unlike the module-level dict
+    caches elsewhere in services, every read reorders under a lock.
+
+    Bounded by entry count, by approximate bytes (`max_bytes`, each value
+    measured once by `sizeof` on put), or both; 0 disables a bound. An entry
+    larger than max_bytes on its own is kept until the next put evicts it."""
+
+    def __init__(
+        self,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        sizeof: Callable[[Any], int] = approx_size,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        # Measured outside the lock: a deep tree takes a while to walk.
+        size = self._sizeof(value) if self.max_bytes else 0
+        with self._lock:
+            self._bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and (
+                (self.max_entries and len(self._entries) > self.max_entries)
+                or (self.max_bytes and self._bytes > self.max_bytes)
+            ):
+                evicted, _ = self._entries.popitem(last=False)
+                self._bytes -= self._sizes.pop(evicted)
+                self.evictions += 1
+
+    def discard(self, key: Hashable) -> None:
+        """Drop `key` if present (not counted as an eviction)."""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def recent(self, limit: int) -> list[tuple[Hashable, Any, int]]:
+        """Up to `limit` (key, value, bytes), most recently used first,
+        without touching the LRU order or the counters."""
+        with self._lock:
+            keys = list(reversed(self._entries))[:limit]
+            return [(key, self._entries[key], self._sizes[key]) for key in keys]
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+            if self.max_bytes:
+                stats["bytes"] = self._bytes
+                stats["max_bytes"] = self.max_bytes
+            return stats
@@ -0,0 +1,104 @@
+import bisect
+import threading
+from collections import Counter
+
+# Upper bounds (ms) of the latency histogram buckets; a final bucket holds
+# everything slower.
+LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class _Series:
+    """Counters for one (endpoint, model) pair."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors: Counter[str] = Counter()
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.tokens: Counter[str] = Counter()
+        self.attempts: Counter[int] = Counter()
+        self.failures: Counter[str] = Counter()
+        self.degraded = 0
+
+    def snapshot(self) -> dict:
+        buckets = [f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "latency": {
+                "buckets": dict(zip(buckets, self.latency_buckets)),
+                "avg_ms": round(self.latency_total / self.calls * 1000, 1) if self.calls else 0.0,
+                "max_ms": round(self.latency_max * 1000, 1),
+            },
+            "tokens": dict(self.tokens),
+            # Gemini calls per operation: {1: n, 2: n, ...}.
+            "attempts": dict(sorted(self.attempts.items())),
+            "failures": dict(self.failures),
+            "degraded": self.degraded,
+        }
+
+
+class GeminiMetrics:
+    """In-process counters for every Gemini call, by endpoint and model.
+
+    The call drivers (gemini._call_sync / gemini._call_async) record each
+    call's latency, tokens and errors plus the calls per operation; the steps
+    generators record why an answer was rejected and when a degraded
+    structure tree is served. Counters are per process and reset on restart;
+    api_usage stays the billing record."""
+
+    def __init__(self) -> None:
+        self._series: dict[tuple[str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint: str, model: str) -> _Series:
+        series = self._series.get((endpoint, model))
+        if series is None:
+            series = self._series[(endpoint, model)] = _Series()
+        return series
+
+    def record_call(
+        self, endpoint: str, model: str, seconds: float, usage: dict | None, error: Exception | None
+    ) -> None:
+        with self._lock:
+            series = self._get(endpoint, model)
+            series.calls += 1
+            series.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, seconds * 1000)] += 1
+            series.latency_total += seconds
+            series.latency_max = max(series.latency_max, seconds)
+            if error is not None:
+                series.errors[type(error).__name__] += 1
+            if usage:
+                series.tokens.update(usage)
+
+    def record_attempts(self, endpoint: str, model: str, attempts: int) -> None:
+        with self._lock:
+            self._get(endpoint, model).attempts[attempts] += 1
+
+    def record_failure(self, endpoint: str, model: str, reason: str) -> None:
+        """Count a rejected answer: json, validation, reconstruction,
+        malformed, nesting or missing_items. A failed request is counted by
+        its exception type under `errors` instead."""
+        with self._lock:
+            self._get(endpoint, model).failures[reason] += 1
+
+    def record_degraded(self, endpoint: str, model: str) -> None:
+        with self._lock:
+            self._get(endpoint, model).degraded += 1
+
+    def snapshot(self) -> dict:
+        """{endpoint: {model: counters}}."""
+        result: dict[str, dict] = {}
+        with self._lock:
+            for (endpoint, model), series in sorted(self._series.items()):
+                result.setdefault(endpoint, {})[model] = series.snapshot()
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+# Process-wide recorder used by the Gemini drivers.
+gemini = GeminiMetrics()
@@ -1,5 +1,21 @@
+import hashlib
+import logging
 import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy
 import spacy
+from spacy.attrs import DEP, HEAD, IDX, IS_SPACE, LENGTH, POS, TAG
+from spacy.strings import get_string_id
+
+from app.core.config import settings
+from app.services import nlp_pool
+from app.services.lru import LRUCache
+
+logger = logging.getLogger(__name__)
 
 # Invisible format characters (BOM/zero-width spaces/joiners, soft hyphen) that
 # ride along when text is copied from PDFs. They are not whitespace, so \s
@@ -14,50 +30,427 @@ def strip_invisible(text: str) -> str:
 
 
 _nlp = None
+_nlp_lock = threading.Lock()
 
 def _get_nlp():
     global _nlp
     if _nlp is None:
-        _nlp = spacy.load("en_core_web_sm")
+        # Requests that arrive while the startup warm-up is still loading wait
+        # for that load instead of starting a second one.
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = spacy.load("en_core_web_sm")
     return _nlp
 
 
-def analyze_tokens(text: str) -> list[dict[str, str | bool | int]]:
-    """Return token attributes needed for deterministic tree fallbacks."""
-    return [
-        {
-            "index": token.i,
-            "head_index": token.head.i,
-            "start": token.idx,
-            "end": token.idx + len(token.text),
-            "text": token.text,
-            "lower": token.lower_,
-            "pos": token.pos_,
-            "tag": token.tag_,
-            "dep": token.dep_,
-            "is_root": token.dep_ == "ROOT",
-            "is_finite": token.morph.get("VerbForm") == ["Fin"] or any(
-                child.dep_ in {"aux", "auxpass"}
-                and (
-                    child.morph.get("VerbForm") == ["Fin"]
-                    or child.tag_ == "MD"
-                )
-                for child in token.children
-            ),
-            "has_subject": any(
-                child.dep_ in {"nsubj", "nsubjpass", "csubj", "expl"}
-                for child in token.children
-            ),
-            "has_marker": any(child.dep_ == "mark" for child in token.children),
-        }
-        for token in _get_nlp()(text)
-        if not token.is_space
-    ]
+# Named pipeline profiles: the components each call site can skip. Every
+# profile shares the one loaded model and skips per call (disable=...), so
+# concurrent requests never mutate shared pipeline state the way
+# nlp.select_pipes() would. Outputs are checked against the full pipeline in
+# benchmarks/bench_profiles.py.
+_PIPELINE_PROFILES: dict[str, tuple[str, ...]] = {
+    # Sentence boundaries come from the dependency parser alone.
+    "split": ("tagger", "attribute_ruler", "lemmatizer", "ner"),
+    # Completeness checks and token tables read POS, tags, morphology and
+    # dependencies, never lemmas or entities.
+    "syntax": ("lemmatizer", "ner"),
+    "full": (),
+}
+
+
+def _disabled(profile: str) -> list[str]:
+    """Components of the loaded model that `profile` skips."""
+    pipe_names = _get_nlp().pipe_names
+    return [name for name in _PIPELINE_PROFILES[profile] if name in pipe_names]
+
+
+# Startup warm-up (see app.main). The first nlp() call on each profile is much
+# slower than the rest, so the warm-up pays it before traffic arrives, and
+# /api/health reports not-ready until it has finished.
+_WARM_UP_TEXT = (
+    "When I arrived in the United States last year, I found reading difficult, "
+    "but I never allowed that challenge to define me."
+)
+_warm_up_state: dict = {"status": "pending", "phases": {}, "error": None}
+
+
+def warm_up() -> None:
+    """Load the model and parse one document with every profile, recording
+    how long each phase took. Never raises; failures land in warm_up_status."""
+    phases: dict[str, float] = {}
+    started = time.perf_counter()
+    _warm_up_state["status"] = "loading"
+    try:
+        if nlp_pool.enabled():
+            # Parsing happens in the workers; this process never needs a model.
+            for name, seconds in nlp_pool.start().items():
+                phases[f"worker {name}"] = seconds
+        else:
+            _get_nlp()
+            phases["load"] = time.perf_counter() - started
+            for profile in _PIPELINE_PROFILES:
+                phase_started = time.perf_counter()
+                # Straight through the model: warm-up Docs should not take up
+                # cache slots.
+                _get_nlp()(_WARM_UP_TEXT, disable=_disabled(profile))
+                phases[f"parse:{profile}"] = time.perf_counter() - phase_started
+    except Exception as exc:  # noqa: BLE001 — reported by /api/health
+        logger.exception("spaCy warm-up failed")
+        _warm_up_state["error"] = str(exc)
+        _warm_up_state["status"] = "failed"
+        return
+    phases["total"] = time.perf_counter() - started
+    _warm_up_state["phases"] = {name: round(seconds, 3) for name, seconds in phases.items()}
+    _warm_up_state["status"] = "ready"
+    logger.info(
+        "spaCy warm-up ready: %s",
+        ", ".join(f"{name} {seconds:.2f}s" for name, seconds in phases.items()),
+    )
+
+
+def warm_up_status() -> dict:
+    """Snapshot of the warm-up: status (pending/loading/ready/failed),
+    per-phase seconds once ready, and the error if it failed."""
+    return {**_warm_up_state, "phases": dict(_warm_up_state["phases"])}
+
+
+# Parsed Docs keyed by (profile, text), and token tables keyed by text. One
+# /api/parse request re-parses the same sentence and node texts many times
+# across validation, retries and post-processing; each repeat is a lookup.
+# Docs are shared across requests and must be treated as read-only.
+_DOC_CACHE = LRUCache(max_entries=512)
+_TOKEN_CACHE = LRUCache(max_entries=1024)
+# spaCy's sentence texts for one split_sentences line, keyed by a digest of
+# the normalized line. Re-translating, re-saving or forking an article only
+# parses the lines that changed; entries are a few short strings, so this
+# holds far more lines than the Doc cache.
+_LINE_CACHE = LRUCache(max_entries=8192)
+
+
+def _parse(text: str, profile: str = "syntax"):
+    """Parse one text with the named pipeline profile, through the Doc cache."""
+    key = (profile, text)
+    doc = _DOC_CACHE.get(key)
+    if doc is None:
+        doc = _get_nlp()(text, disable=_disabled(profile))
+        _DOC_CACHE.put(key, doc)
+    return doc
+
+
+def _parse_many(texts, profile: str, batch_size: int, cache: bool = True):
+    """Lazily parse a stream of texts with the named pipeline profile. Cached
+    Docs are reused in place; only the misses go through nlp.pipe. With
+    cache=False the Doc cache is bypassed entirely, for callers that memoize
+    their own results (split_sentences has _LINE_CACHE)."""
+    texts = list(texts)
+    cached = [_DOC_CACHE.get((profile, text)) if cache else None for text in texts]
+    parsed = _get_nlp().pipe(
+        (text for text, doc in zip(texts, cached) if doc is None),
+        batch_size=batch_size,
+        disable=_disabled(profile),
+    )
+    for text, doc in zip(texts, cached):
+        if doc is None:
+            doc = next(parsed)
+            if cache:
+                _DOC_CACHE.put((profile, text), doc)
+        yield doc
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters of the shared Doc and token-table caches; each Doc
+    hit is one spaCy pipeline run saved."""
+    return {
+        "docs": _DOC_CACHE.stats(),
+        "tokens": _TOKEN_CACHE.stats(),
+        "lines": _LINE_CACHE.stats(),
+    }
+
+
+def clear_caches() -> None:
+    _DOC_CACHE.clear()
+    _TOKEN_CACHE.clear()
+    _LINE_CACHE.clear()
 
 
 _SUBJECT_DEPS = {"nsubj", "nsubjpass", "csubj", "expl"}
 
 
+def _label_ids(labels) -> numpy.ndarray:
+    """String-store IDs of dependency/POS/tag labels, for array comparisons."""
+    return numpy.array([get_string_id(label) for label in labels], dtype=numpy.uint64)
+
+
+_AUX_DEP_IDS = _label_ids({"aux", "auxpass"})
+_SUBJECT_DEP_IDS = _label_ids(_SUBJECT_DEPS)
+_MARK_DEP_ID = get_string_id("mark")
+_ROOT_DEP_ID = get_string_id("ROOT")
+_MODAL_TAG_ID = get_string_id("MD")
+_TABLE_ATTRS = [IDX, LENGTH, HEAD, POS, TAG, DEP, IS_SPACE]
+
+
+class TokenRow:
+    """Dict-style view of one TokenTable row: row["dep"], row["index"], ..."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "TokenTable", row: int) -> None:
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key: str) -> str | bool | int:
+        return self._table.value(key, self._row)
+
+
+class TokenTable:
+    """Columnar token attributes needed for deterministic tree fallbacks.
+
+    Numeric columns are numpy arrays built from Doc.to_array, with pos, tag
+    and dep integer-coded as string-store IDs, so dependency walks run as
+    array operations instead of per-token dict lookups. Whitespace tokens are
+    dropped; `index` and `head_index` keep Doc positions, and `head_row` maps
+    each row to its head's row (itself for a root or a dropped head). Rows
+    read dict-style for the per-token label rules."""
+
+    _INT_COLUMNS = ("index", "head_index", "start", "end")
+    _BOOL_COLUMNS = ("is_root", "is_finite", "has_subject", "has_marker")
+    _LABEL_COLUMNS = ("pos", "tag", "dep")
+
+    def __init__(self, doc) -> None:
+        size = len(doc)
+        columns = doc.to_array(_TABLE_ATTRS).reshape(size, len(_TABLE_ATTRS))
+        positions = numpy.arange(size, dtype=numpy.int64)
+        # HEAD is a relative offset stored as uint64; the signed cast recovers it.
+        heads = positions + columns[:, 2].astype(numpy.int64)
+        tags, deps = columns[:, 4], columns[:, 5]
+
+        finite = numpy.fromiter(
+            (token.morph.get("VerbForm") == ["Fin"] for token in doc), bool, size
+        )
+        is_child = heads != positions
+        is_finite = finite.copy()
+        is_finite[heads[
+            is_child
+            & numpy.isin(deps, _AUX_DEP_IDS)
+            & (finite | (tags == _MODAL_TAG_ID))
+        ]] = True
+        has_subject = numpy.zeros(size, dtype=bool)
+        has_subject[heads[is_child & numpy.isin(deps, _SUBJECT_DEP_IDS)]] = True
+        has_marker = numpy.zeros(size, dtype=bool)
+        has_marker[heads[is_child & (deps == _MARK_DEP_ID)]] = True
+
+        keep = columns[:, 6] == 0
+        self.index = positions[keep]
+        self.head_index = heads[keep]
+        self.start = columns[keep, 0].astype(numpy.int64)
+        self.end = self.start + columns[keep, 1].astype(numpy.int64)
+        self.pos = columns[keep, 3]
+        self.tag = tags[keep]
+        self.dep = deps[keep]
+        self.is_root = self.dep == _ROOT_DEP_ID
+        self.is_finite = is_finite[keep]
+        self.has_subject = has_subject[keep]
+        self.has_marker = has_marker[keep]
+        self.text = tuple(token.text for token in doc if not token.is_space)
+        self.lower = tuple(token.lower_ for token in doc if not token.is_space)
+        self._strings = doc.vocab.strings
+
+        row_by_index = numpy.full(size, -1, dtype=numpy.int64)
+        row_by_index[self.index] = numpy.arange(len(self.index))
+        head_row = row_by_index[self.head_index]
+        self.head_row = numpy.where(
+            head_row >= 0, head_row, numpy.arange(len(self.index))
+        )
+        self._row_by_index = row_by_index
+        self._subtree: numpy.ndarray | None = None
+
+    @classmethod
+    def from_span(cls, span) -> "TokenTable":
+        """Table for a sub-span of a parsed Doc, without re-parsing it. Tokens
+        whose head lies outside the span become roots, as the root of a parse
+        of the span alone would be."""
+        # A model without a parser never stored "ROOT"; value() decodes it.
+        span.doc.vocab.strings.add("ROOT")
+        table = cls(span.as_doc())
+        detached = table.head_index == table.index
+        table.dep = numpy.where(detached, numpy.uint64(_ROOT_DEP_ID), table.dep)
+        table.is_root = detached
+        return table
+
+    def __getstate__(self) -> dict:
+        # Tables cross process boundaries when nlp_pool is enabled: ship only
+        # the labels this table uses rather than the model's string store.
+        state = self.__dict__.copy()
+        ids = numpy.unique(numpy.concatenate([self.pos, self.tag, self.dep]))
+        state["_strings"] = {int(i): self._strings[int(i)] for i in ids}
+        state["_subtree"] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self):
+        return (TokenRow(self, row) for row in range(len(self.index)))
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [TokenRow(self, row) for row in range(len(self.index))[key]]
+        return TokenRow(self, range(len(self.index))[key])
+
+    def value(self, key: str, row: int) -> str | bool | int:
+        column = getattr(self, key)
+        if key in self._LABEL_COLUMNS:
+            return self._strings[int(column[row])]
+        if key in self._INT_COLUMNS:
+            return int(column[row])
+        if key in self._BOOL_COLUMNS:
+            return bool(column[row])
+        return column[row]
+
+    def row_of(self, index: int) -> int | None:
+        """Row holding the token at Doc position `index`, if it was kept."""
+        if 0 <= index < len(self._row_by_index) and self._row_by_index[index] >= 0:
+            return int(self._row_by_index[index])
+        return None
+
+    def has_dep(self, labels) -> numpy.ndarray:
+        return numpy.isin(self.dep, _label_ids(labels))
+
+    def has_pos(self, labels) -> numpy.ndarray:
+        return numpy.isin(self.pos, _label_ids(labels))
+
+    @property
+    def subtree(self) -> numpy.ndarray:
+        """(rows x rows) mask: subtree[i, j] is True when row j lies in the
+        dependency subtree of row i (itself included). Built by walking every
+        row up to its root at once, one array step per tree level."""
+        if self._subtree is None:
+            rows = numpy.arange(len(self.index))
+            subtree = numpy.zeros((len(rows), len(rows)), dtype=bool)
+            current = rows
+            for _ in range(len(rows)):
+                subtree[current, rows] = True
+                parent = self.head_row[current]
+                if numpy.array_equal(parent, current):
+                    break
+                current = parent
+            self._subtree = subtree
+        return self._subtree
+
+    def branch_rows(self, root_row: int) -> numpy.ndarray:
+        """For every row, the row of its ancestor hanging directly under
+        `root_row` (the row itself when it is the root, a direct child, or
+        outside the root's tree)."""
+        current = numpy.arange(len(self.index))
+        for _ in range(len(current)):
+            parent = self.head_row[current]
+            climb = (current != root_row) & (parent != root_row) & (parent != current)
+            if not climb.any():
+                break
+            current = numpy.where(climb, parent, current)
+        return current
+
+
+def analyze_tokens(text: str) -> TokenTable:
+    """Return the token table needed for deterministic tree fallbacks.
+
+    The table is cached and shared between callers; never mutate it."""
+    tokens = _TOKEN_CACHE.get(text)
+    if tokens is None:
+        tokens = nlp_pool.offload(_token_table, text)
+        _TOKEN_CACHE.put(text, tokens)
+    return tokens
+
+
+def _token_table(text: str) -> TokenTable:
+    return TokenTable(_parse(text))
+
+
+class SentenceContext:
+    """One sentence's parse, shared by every node-level check of its analysis.
+
+    Structure post-processing asks for token tables of node texts that are
+    character slices of the sentence. tokens() projects those slices onto the
+    sentence Doc instead of parsing each one alone; a text that is absent,
+    occurs more than once, or does not align to token boundaries falls back
+    to analyze_tokens. Set PARSE_SENTENCE_CONTEXT=0 to parse every node text
+    alone again (the previous behavior), e.g. to compare outputs."""
+
+    def __init__(self, sentence: str) -> None:
+        self.sentence = sentence
+        self._doc = None
+        self.projected = 0
+        self.parsed = 0
+        self._tables: dict[str, TokenTable] = {}
+
+    @property
+    def doc(self):
+        # Parsed on first use: attempts that fail before post-processing
+        # never need it.
+        if self._doc is None:
+            self._doc = _parse(self.sentence)
+        return self._doc
+
+    def tokens(self, text: str) -> TokenTable:
+        table = self._tables.get(text)
+        if table is None:
+            table = self._project(text)
+            self._tables[text] = table
+        return table
+
+    def _project(self, text: str) -> TokenTable:
+        if text == self.sentence:
+            return analyze_tokens(text)
+        start = self.sentence.find(text) if text else -1
+        span = None
+        if start >= 0 and self.sentence.find(text, start + 1) < 0:
+            span = self.doc.char_span(start, start + len(text))
+        if span is None:
+            self.parsed += 1
+            return analyze_tokens(text)
+        self.projected += 1
+        return TokenTable.from_span(span)
+
+
+_SENTENCE_CONTEXT: ContextVar[SentenceContext | None] = ContextVar(
+    "sentence_context", default=None
+)
+
+
+@contextmanager
+def sentence_context(sentence: str):
+    """Make a SentenceContext for `sentence` the one context_tokens reads.
+    Reuses the active context when it is already for this sentence; yields
+    None when the context is switched off or parsing runs in nlp_pool (the
+    sentence Doc would have to be parsed in this process)."""
+    active = _SENTENCE_CONTEXT.get()
+    if active is not None and active.sentence == sentence:
+        yield active
+        return
+    if not settings.parse_sentence_context or nlp_pool.enabled():
+        yield None
+        return
+    context = SentenceContext(sentence)
+    reset = _SENTENCE_CONTEXT.set(context)
+    try:
+        yield context
+    finally:
+        _SENTENCE_CONTEXT.reset(reset)
+        logger.debug(
+            "sentence context: %d node spans projected, %d parsed alone",
+            context.projected,
+            context.parsed,
+        )
+
+
+def context_tokens(text: str) -> TokenTable:
+    """analyze_tokens(text), read from the active sentence context if any."""
+    context = _SENTENCE_CONTEXT.get()
+    if context is None:
+        return analyze_tokens(text)
+    return context.tokens(text)
+
+
 def _span_is_complete_sentence(span) -> bool:
     """Return whether a spaCy sentence span contains an independent clause."""
     root = span.root
@@ -166,12 +559,38 @@ def is_complete_sentence(text: str) -> bool:
     normalized = text.strip()
     if not normalized or not re.search(r"[a-zA-Z]", normalized):
         return False
+    return nlp_pool.offload(_is_complete_sentence, normalized)
 
-    spans = [
-        span
-        for span in _get_nlp()(normalized).sents
-        if re.search(r"[a-zA-Z]", span.text)
+
+def _is_complete_sentence(normalized: str) -> bool:
+    return _doc_is_complete_sentence(_parse(normalized))
+
+
+def are_complete_sentences(texts: list[str]) -> list[bool]:
+    """is_complete_sentence for many texts, parsed in one nlp.pipe stream
+    (one pool round trip when the spaCy pool is enabled)."""
+    normalized = [text.strip() for text in texts]
+    candidates = [text for text in normalized if text and re.search(r"[a-zA-Z]", text)]
+    verdicts = iter(nlp_pool.offload(_are_complete_sentences, candidates) if candidates else [])
+    return [
+        next(verdicts) if text and re.search(r"[a-zA-Z]", text) else False
+        for text in normalized
     ]
+
+
+# Batch size for are_complete_sentences' nlp.pipe stream.
+_COMPLETE_BATCH_SIZE = 32
+
+
+def _are_complete_sentences(texts: list[str]) -> list[bool]:
+    return [
+        _doc_is_complete_sentence(doc)
+        for doc in _parse_many(texts, "syntax", _COMPLETE_BATCH_SIZE)
+    ]
+
+
+def _doc_is_complete_sentence(doc) -> bool:
+    spans = [span for span in doc.sents if re.search(r"[a-zA-Z]", span.text)]
     return len(spans) == 1 and _span_is_complete_sentence(spans[0])
 
 
@@ -186,16 +605,37 @@ _OPTION_MARKER = re.compile(
 _OPTION_LINE_START = re.compile(r"^[(（\[]?\s*[A-Ja-j]\s*[)）\].．。、]")
 
 
-# Split one prose line into sentences, keeping leading numeric labels attached.
-def _split_line(nlp, line: str, pending: str = "") -> tuple[list[str], str]:
-    """Run spaCy sentence detection on a single line. A fragment with no letters
-    (e.g. a question number like "114.") is held and prepended to the next real
-    sentence. The remaining fragment is returned so it can cross a line break."""
+# Lines are parsed through one nlp.pipe stream rather than one nlp() call each:
+# exam papers and OCR output run to hundreds of short lines, where per-call
+# pipeline overhead dominates. See benchmarks/bench_split.py.
+_SPLIT_BATCH_SIZE = 64
+
+
+def _sentence_texts(doc) -> list[str]:
+    """Stripped, non-empty sentence texts of one parsed line."""
+    return [sent.text.strip() for sent in doc.sents if sent.text.strip()]
+
+
+# Only lines with Latin letters go through the English pipeline. None of
+# spaCy's sentences on any other line (a zh-TW heading or teacher note, a
+# question number, a divider) could contain [a-zA-Z], so _split_line would
+# carry the whole line as a label onto the next English sentence; that is
+# done directly. See benchmarks/bench_scripts.py.
+_LATIN = re.compile(r"[a-zA-Z]")
+
+
+def _line_key(line: str) -> bytes:
+    return hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest()
+
+
+# Attach leading numeric labels to the sentences spaCy found on one line.
+def _split_line(line_sentences: list[str], pending: str = "") -> tuple[list[str], str]:
+    """Fold one line's spaCy sentences into output sentences. A fragment with no
+    letters (e.g. a question number like "114.") is held and prepended to the
+    next real sentence. The remaining fragment is returned so it can cross a
+    line break."""
     out: list[str] = []
-    for sent in nlp(line).sents:
-        sentence = sent.text.strip()
-        if not sentence:
-            continue
+    for sentence in line_sentences:
         if re.search(r"[a-zA-Z]", sentence):
             out.append(f"{pending} {sentence}".strip() if pending else sentence)
             pending = ""
@@ -205,6 +645,22 @@ def _split_line(nlp, line: str, pending: str = "") -> tuple[list[str], str]:
     return out, pending
 
 
+def _plan_line(line: str) -> tuple[str | None, str | None]:
+    """Split a line into (prose to sentence-split, option row to attach).
+
+    An option-only row ("A. ... B. ...") has no prose; a question stem followed
+    by packed inline options has both; any other line is all prose."""
+    if _OPTION_LINE_START.match(line):
+        return None, line
+
+    option_markers = list(_OPTION_MARKER.finditer(line))
+    if len(option_markers) >= 2:
+        first_marker = option_markers[0].start()
+        return line[:first_marker].rstrip(), line[first_marker:].strip()
+
+    return line, None
+
+
 # Split a block of text into sentences using spaCy.
 def split_sentences(text: str) -> list[str]:
     """Return a list of non-empty sentences from `text` using spaCy's sentence
@@ -217,6 +673,26 @@ def split_sentences(text: str) -> list[str]:
     """
     if not text:
         return []
+    return nlp_pool.offload(_split_sentences, text)
+
+
+def _split_sentences(text: str) -> list[str]:
+    return list(iter_sentences(text))
+
+
+def iter_sentences(text: str):
+    """Yield split_sentences(text) one sentence at a time, as lines are parsed.
+
+    A sentence is held back until the next line is planned, because an option
+    row on that line may still be merged into it. Parses in-process, so a
+    caller can work on early sentences while later lines are still being
+    parsed; with nlp_pool on, the whole split runs in the pool first instead,
+    keeping spaCy off the request workers."""
+    if not text:
+        return
+    if nlp_pool.enabled():
+        yield from nlp_pool.offload(_split_sentences, text)
+        return
 
     # Normalize non-breaking spaces and Windows line endings, but keep newlines.
     text = strip_invisible(text)
@@ -225,54 +701,73 @@ def split_sentences(text: str) -> list[str]:
 
     # Collect individual lines (each quoted paragraph is typically one line).
     lines = [re.sub(r" +", " ", ln.strip()) for ln in text.splitlines() if ln.strip()]
-
-    nlp = _get_nlp()
-    sentences: list[str] = []
+    plans = [_plan_line(line) for line in lines]
+
+    # Memoized lines skip spaCy; every other prose part goes through one
+    # lazily consumed pipe, in line order.
+    prose_lines = [prose for prose, _ in plans if prose is not None and _LATIN.search(prose)]
+    keys = [_line_key(prose) for prose in prose_lines]
+    memoized = [_LINE_CACHE.get(key) for key in keys]
+    if keys:
+        # Per call only; the process-wide line memo counters are in
+        # cache_stats().
+        logger.debug(
+            "split %d lines: %d memoized",
+            len(keys),
+            sum(texts is not None for texts in memoized),
+        )
+    docs = _parse_many(
+        (prose for prose, texts in zip(prose_lines, memoized) if texts is None),
+        "split",
+        _SPLIT_BATCH_SIZE,
+        # _LINE_CACHE keeps the sentence texts; split Docs would only push
+        # the syntax Docs out of the shared cache.
+        cache=False,
+    )
+    memo = zip(keys, memoized)
+    # The last sentence so far: the only one an option row can still join.
+    held: str | None = None
     pending = ""
 
-    for line in lines:
-        option_markers = list(_OPTION_MARKER.finditer(line))
-
-        if _OPTION_LINE_START.match(line):
-            # Attach the option row to the question stem above it (one card),
-            # unless a question label is waiting from the preceding line.
-            if pending:
-                sentences.append(f"{pending}\n{line}")
-                pending = ""
-            elif sentences:
-                sentences[-1] = f"{sentences[-1]}\n{line}"
+    for prose, options in plans:
+        if prose is not None:
+            if _LATIN.search(prose):
+                key, texts = next(memo)
+                if texts is None:
+                    texts = tuple(_sentence_texts(next(docs)))
+                    _LINE_CACHE.put(key, texts)
+                line_sentences, pending = _split_line(list(texts), pending)
             else:
-                sentences.append(line)
-            continue
-
-        if len(option_markers) >= 2:
-            # A question stem followed by packed inline options is a new item,
-            # not an option-only row belonging to the preceding question.
-            first_marker = option_markers[0].start()
-            stem = line[:first_marker].rstrip()
-            options = line[first_marker:].strip()
-            stem_sentences, pending = _split_line(nlp, stem, pending)
-            sentences.extend(stem_sentences)
+                # What spaCy would find here has no letters: all of it is label.
+                line_sentences, pending = [], f"{pending} {prose}".strip()
+            for sentence in line_sentences:
+                if held is not None:
+                    yield held
+                held = sentence
             if pending and not re.search(r"\w", pending):
                 pending = ""
 
+        if options is not None:
+            # Attach the option row to the question stem above it (one card),
+            # unless a question label is waiting from the preceding line. A
+            # stem with packed inline options starts a new item, so its own
+            # sentences are the ones the options join.
             if pending:
-                sentences.append(f"{pending}\n{options}")
+                if held is not None:
+                    yield held
+                held = f"{pending}\n{options}"
                 pending = ""
-            elif sentences:
-                sentences[-1] = f"{sentences[-1]}\n{options}"
+            elif held is not None:
+                held = f"{held}\n{options}"
             else:
-                sentences.append(options)
-            continue
-
-        line_sentences, pending = _split_line(nlp, line, pending)
-        sentences.extend(line_sentences)
-        if pending and not re.search(r"\w", pending):
-            pending = ""
+                held = options
 
     # Preserve a meaningful trailing number/label while continuing to discard
     # punctuation-only fragments such as a bare ellipsis.
     if pending and re.search(r"\w", pending):
-        sentences.append(pending)
+        if held is not None:
+            yield held
+        held = pending
 
-    return sentences
+    if held is not None:
+        yield held
@@ -0,0 +1,123 @@
+"""Optional process pool for the CPU-bound spaCy entry points.
+
+split_sentences, is_complete_sentence and analyze_tokens hold the GIL for the
+whole parse, so one long article in /api/translate stalls every other sync
+route served by the same worker. With SPACY_WORKERS > 0 those calls run in
+worker processes instead, each with its own preloaded model; with the
+default of 0 they run in-process exactly as before. See
+benchmarks/bench_concurrency.py.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# Calls queued or running in the pool. Bounded so a burst of long articles
+# waits (then fails with 503) instead of piling up unbounded work.
+_slots = threading.BoundedSemaphore(max(settings.spacy_queue_limit, 1))
+# Set in worker processes, where offloaded functions must run inline.
+_in_worker = False
+
+
+def enabled() -> bool:
+    return settings.spacy_workers > 0 and not _in_worker
+
+
+def _init_worker() -> None:
+    global _in_worker
+    _in_worker = True
+    from app.services import nlp
+
+    nlp.warm_up()
+
+
+def _worker_phases() -> dict:
+    from app.services import nlp
+
+    return nlp.warm_up_status()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn, not fork: the server process already runs threads.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.spacy_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def start() -> dict[str, float]:
+    """Start every worker and wait for its warm-up. Returns the slowest
+    worker's seconds for each warm-up phase; raises if a worker failed."""
+    pool = _get_pool()
+    statuses = [
+        future.result()
+        for future in [pool.submit(_worker_phases) for _ in range(settings.spacy_workers)]
+    ]
+    failed = next((status for status in statuses if status["status"] != "ready"), None)
+    if failed is not None:
+        raise RuntimeError(f"spaCy worker warm-up failed: {failed['error']}")
+    return {
+        name: max(status["phases"][name] for status in statuses)
+        for name in statuses[0]["phases"]
+    }
+
+
+def shutdown() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def offload(fn, *args):
+    """Run `fn(*args)` in the pool when it is enabled, else in-process.
+
+    `fn` must be a module-level function so it pickles by reference. Raises
+    503 when the pool stays full for SPACY_QUEUE_TIMEOUT seconds. A crashed
+    pool is discarded (the next call starts a fresh one) and the call falls
+    back to running in-process."""
+    if not enabled():
+        return fn(*args)
+
+    started = time.perf_counter()
+    if not _slots.acquire(timeout=settings.spacy_queue_timeout):
+        logger.warning(
+            "spaCy pool full (%d queued) for %.1fs; rejecting %s",
+            settings.spacy_queue_limit,
+            time.perf_counter() - started,
+            fn.__name__,
+        )
+        raise HTTPException(status_code=503, detail="Text analysis is busy; try again shortly.")
+    pool = _get_pool()
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        logger.exception("spaCy pool crashed; running %s in-process", fn.__name__)
+        _discard_pool(pool)
+        return fn(*args)
+    finally:
+        _slots.release()
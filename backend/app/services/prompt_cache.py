@@ -0,0 +1,165 @@
+import logging
+import time
+
+from google.genai import types
+
+from app.core.config import settings
+from app.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Extend a live handle once less than this share of its TTL is left, so a
+# request never races the expiry.
+_REFRESH_AT = 0.2
+# After a failed create (model without caching, prefix under the minimum
+# token count, quota) wait this long before trying again; until then every
+# request sends its prompt inline.
+_RETRY_AFTER = 300.0
+
+_REFRESHES = SingleFlight("prompt_cache")
+
+# Every CachedPrefix by display name, for stats().
+_PREFIXES: dict[str, "CachedPrefix"] = {}
+
+
+class CachedPrefix:
+    """A Gemini explicit context cache holding one static prompt prefix.
+
+    ensure() returns the cached-content name to pass as the request config's
+    `cached_content` (the request then sends only what follows the prefix),
+    creating the cache or extending its TTL when needed. It returns None when
+    caching is off or unavailable, and the caller sends the prompt inline.
+    Concurrent refreshes share one API call."""
+
+    def __init__(self, display_name: str, text: str) -> None:
+        self.display_name = display_name
+        self.text = text
+        self._name: str | None = None
+        self._model: str | None = None
+        self._expires = 0.0
+        self._retry_at = 0.0
+        # A handle Gemini rejected, deleted upstream before the next create
+        # so an orphan does not keep billing storage until its TTL.
+        self._stale: str | None = None
+        self.created = 0
+        self.refreshed = 0
+        self.failures = 0
+        _PREFIXES[display_name] = self
+
+    def _current(self, model: str) -> tuple[str | None, bool]:
+        """(usable handle or None, whether to call the API first)."""
+        if not settings.gemini_prompt_cache:
+            return None, False
+        now = time.monotonic()
+        live = self._name is not None and self._model == model and now < self._expires
+        if live and self._expires - now > settings.gemini_prompt_cache_ttl * _REFRESH_AT:
+            return self._name, False
+        if not live and now < self._retry_at:
+            return None, False
+        return (self._name if live else None), True
+
+    def ensure(self, client, model: str) -> str | None:
+        name, refresh = self._current(model)
+        if refresh:
+            name, _ = _REFRESHES.do((self.display_name, model), self._refresh, client, model)
+        return name
+
+    async def ensure_async(self, client, model: str) -> str | None:
+        name, refresh = self._current(model)
+        if refresh:
+            name, _ = await _REFRESHES.do_async(
+                (self.display_name, model), self._refresh_async, client, model
+            )
+        return name
+
+    def invalidate(self, name: str) -> None:
+        """Forget `name` after Gemini answered 403/404 for it; the next
+        ensure() deletes it (best effort) and creates a fresh handle."""
+        if self._name == name:
+            self._name = None
+            self._stale = name
+
+    def _refresh(self, client, model: str) -> str | None:
+        if self._stale is not None:
+            stale, self._stale = self._stale, None
+            try:
+                client.caches.delete(name=stale)
+            except Exception as e:
+                logger.info("Prompt cache %s could not be deleted: %s", stale, e)
+        if self._name is not None and self._model == model:
+            try:
+                client.caches.update(name=self._name, config=self._update_config())
+                return self._refreshed()
+            except Exception as e:
+                logger.info("Prompt cache %s could not be extended: %s", self._name, e)
+        try:
+            cached = client.caches.create(model=model, config=self._create_config())
+        except Exception as e:
+            return self._failed(model, e)
+        return self._created(model, cached.name)
+
+    async def _refresh_async(self, client, model: str) -> str | None:
+        if self._stale is not None:
+            stale, self._stale = self._stale, None
+            try:
+                await client.aio.caches.delete(name=stale)
+            except Exception as e:
+                logger.info("Prompt cache %s could not be deleted: %s", stale, e)
+        if self._name is not None and self._model == model:
+            try:
+                await client.aio.caches.update(name=self._name, config=self._update_config())
+                return self._refreshed()
+            except Exception as e:
+                logger.info("Prompt cache %s could not be extended: %s", self._name, e)
+        try:
+            cached = await client.aio.caches.create(model=model, config=self._create_config())
+        except Exception as e:
+            return self._failed(model, e)
+        return self._created(model, cached.name)
+
+    def _create_config(self) -> types.CreateCachedContentConfig:
+        return types.CreateCachedContentConfig(
+            display_name=self.display_name,
+            contents=[self.text],
+            ttl=f"{settings.gemini_prompt_cache_ttl}s",
+        )
+
+    def _update_config(self) -> types.UpdateCachedContentConfig:
+        return types.UpdateCachedContentConfig(ttl=f"{settings.gemini_prompt_cache_ttl}s")
+
+    def _created(self, model: str, name: str) -> str:
+        self._name, self._model = name, model
+        self.created += 1
+        logger.info("Prompt cache %s created for %s: %s", self.display_name, model, name)
+        return self._refreshed(counted=False)
+
+    def _refreshed(self, counted: bool = True) -> str:
+        self._expires = time.monotonic() + settings.gemini_prompt_cache_ttl
+        self.refreshed += counted
+        return self._name
+
+    def _failed(self, model: str, error: Exception) -> None:
+        self._name = None
+        self._retry_at = time.monotonic() + _RETRY_AFTER
+        self.failures += 1
+        logger.warning(
+            "Prompt cache %s unavailable for %s, sending prompts inline: %s",
+            self.display_name,
+            model,
+            error,
+        )
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.gemini_prompt_cache,
+            "live": self._name is not None and time.monotonic() < self._expires,
+            "created": self.created,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+        }
+
+
+def stats() -> dict:
+    """Counters for every CachedPrefix, by display name."""
+    return {name: prefix.stats() for name, prefix in _PREFIXES.items()}
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from collections.abc import Awaitable, Callable
+from concurrent.futures import Future
+from typing import Any, Hashable
+
+# Every SingleFlight by name, for stats().
+_GROUPS: dict[str, "SingleFlight"] = {}
+
+
+class SingleFlight:
+    """Coalesce concurrent identical upstream calls onto one in-flight call.
+
+    The first caller for a key (the leader) makes the call; callers that
+    arrive with the same key while it is running wait for it and get its
+    result or exception. Nothing is kept once the call finishes: that is the
+    caches' job. do() is for threads, do_async() for the event loop; the two
+    keep separate in-flight maps.
+
+    Both return (value, joined): joined is True for a caller that waited on
+    another caller's call, so it must not bill the call's usage again."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: dict[Hashable, Future] = {}
+        self._tasks: dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        _GROUPS[name] = self
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            return call.result(), True
+
+        try:
+            value = fn(*args)
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    async def do_async(
+        self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any
+    ) -> tuple[Any, bool]:
+        task = self._tasks.get(key)
+        if task is not None:
+            self.coalesced += 1
+            # Shielded: one waiter being cancelled (a client disconnect) must
+            # not cancel the call the others are waiting on.
+            return await asyncio.shield(task), True
+
+        task = self._tasks[key] = asyncio.ensure_future(fn(*args))
+        self.leaders += 1
+
+        def finished(done: asyncio.Future) -> None:
+            if self._tasks.get(key) is done:
+                del self._tasks[key]
+            # Marks a failure as retrieved when every caller was cancelled.
+            if not done.cancelled():
+                done.exception()
+
+        task.add_done_callback(finished)
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._tasks),
+            }
+
+    def reset(self) -> None:
+        """Zero the counters (in-flight calls are left alone)."""
+        with self._lock:
+            self.leaders = self.coalesced = 0
+
+
+def stats() -> dict:
+    """Counters for every SingleFlight, by name."""
+    return {name: group.stats() for name, group in _GROUPS.items()}
@@ -1,19 +1,195 @@
+import asyncio
 import hashlib
+import logging
+import math
+import queue
 import re
+import threading
+import time
 
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.services.gemini import PARSE_PROMPT_VERSION, ai_analyze_structure
-from app.services.nlp import is_complete_sentence, strip_invisible
-from app.services.supabase import get_cached_parse, save_parse
+from app.services import admission
+from app.services.gemini import (
+    PARSE_PROMPT_VERSION,
+    StructureAnalysisError,
+    ai_analyze_structure,
+    ai_analyze_structure_async,
+)
+from app.services.lru import LRUCache
+from app.services.nlp import (
+    are_complete_sentences,
+    cache_stats,
+    is_complete_sentence,
+    strip_invisible,
+)
+from app.services.single_flight import SingleFlight
+from app.services.supabase import (
+    get_cached_parse,
+    get_cached_parses,
+    get_latest_parse,
+    get_latest_parses,
+    save_parse,
+    save_parses,
+)
+
+logger = logging.getLogger(__name__)
 
 INCOMPLETE_SENTENCE_MESSAGE = "分析句構只適用於完整的句子"
 
 # In-memory L1 cache in front of Supabase (L2), keyed by (sentence_hash,
 # prompt_version). Avoids the network round-trip for hot sentences within a
-# process; resets on restart (Supabase remains the durable cache).
-_MEM_CACHE: dict[tuple[str, int], dict] = {}
+# process; resets on restart (Supabase remains the durable cache). Trees vary
+# from a few hundred bytes to tens of kilobytes, so the bound is in bytes.
+_MEM_CACHE = LRUCache(max_bytes=settings.structure_cache_max_mb * 1024 * 1024)
+
+# Concurrent misses for one sentence (a shared article opened by a whole
+# class) share a single Gemini analysis, keyed like the cache.
+_ANALYSES = SingleFlight("structure")
+
+
+class _FailureCache:
+    """Memory-only negative cache, keyed like _MEM_CACHE, so a student
+    clicking "analyze" again on a heading or on a sentence Gemini keeps
+    getting wrong is answered without spaCy or Gemini. Failures are never
+    written to sentence_parses.
+
+    A 422 (incomplete sentence) is kept for settings.parse_incomplete_ttl.
+    A StructureAnalysisError is kept for settings.parse_failure_backoff
+    seconds, doubling with each consecutive failure of the same sentence up
+    to settings.parse_failure_backoff_max; the count survives expiry until
+    the sentence is analyzed successfully (forget) or evicted."""
+
+    def __init__(self, max_entries: int) -> None:
+        # key -> (status_code, detail, expires_at, consecutive 502s)
+        self._entries = LRUCache(max_entries=max_entries)
+        self.served = 0
+
+    def check(self, key: tuple[str, int]) -> None:
+        """Raise the remembered HTTPException while its entry is live."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        status_code, detail, expires_at, _ = entry
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            return
+        self.served += 1
+        headers = {"Retry-After": str(math.ceil(remaining))} if status_code == 502 else None
+        raise HTTPException(status_code=status_code, detail=detail, headers=headers)
+
+    def record(self, key: tuple[str, int], error: HTTPException) -> None:
+        failures = 0
+        ttl = settings.parse_incomplete_ttl
+        if error.status_code != 422:
+            previous = self._entries.get(key)
+            failures = (previous[3] if previous else 0) + 1
+            ttl = min(
+                settings.parse_failure_backoff * 2 ** (failures - 1),
+                settings.parse_failure_backoff_max,
+            )
+            logger.warning(
+                "structure analysis failed %d time(s) for %s; answering 502 for %ds",
+                failures,
+                key[0][:12],
+                ttl,
+            )
+        self._entries.put(key, (error.status_code, error.detail, time.monotonic() + ttl, failures))
+
+    def forget(self, key: tuple[str, int]) -> None:
+        self._entries.discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.served = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "served": self.served}
+
+
+_FAILURES = _FailureCache(max_entries=4096)
+
+
+class _Revalidator:
+    """Background re-analysis of sentences served from an older prompt
+    version's tree (settings.parse_stale_fallback), so a PARSE_PROMPT_VERSION
+    bump does not turn every sentence into a blocking Gemini call.
+
+    One daemon thread works through a bounded queue, starting at most
+    settings.parse_revalidate_rpm analyses a minute at admission priority
+    "background", and writes each fresh tree to both cache levels. Keys
+    already queued are not queued twice; a full queue drops the request (the
+    next stale hit queues it again). A sentence the new prompt cannot analyze
+    keeps being served its old tree without being retried until restart.
+    Fresh analyses are nobody's click, so they are not billed to a user."""
+
+    def __init__(self, max_queued: int) -> None:
+        self._queue: queue.Queue[tuple[tuple[str, int], str]] = queue.Queue(maxsize=max_queued)
+        self._pending: set[tuple[str, int]] = set()
+        self._given_up = LRUCache(max_entries=4096)
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self.queued = 0
+        self.dropped = 0
+        self.refreshed = 0
+        self.failed = 0
+
+    def submit(self, key: tuple[str, int], normalized: str) -> None:
+        with self._lock:
+            if key in self._pending or key in self._given_up:
+                return
+            try:
+                self._queue.put_nowait((key, normalized))
+            except queue.Full:
+                self.dropped += 1
+                return
+            self._pending.add(key)
+            self.queued += 1
+            if self._thread is None:
+                self._start()
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="parse-revalidate", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            self._run_one()
+            if settings.parse_revalidate_rpm:
+                time.sleep(max(0.0, 60 / settings.parse_revalidate_rpm - (time.monotonic() - started)))
+
+    def _run_one(self) -> None:
+        key, normalized = self._queue.get()
+        try:
+            with admission.priority("background"):
+                structure, _ = ai_analyze_structure(normalized)
+            _write_cache(key, normalized, structure)
+            self.refreshed += 1
+        except Exception as e:
+            self.failed += 1
+            if isinstance(e, StructureAnalysisError):
+                self._given_up.put(key, True)
+            logger.warning("stale structure re-analysis failed for %s: %s", key[0][:12], e)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": settings.parse_stale_fallback,
+            "rpm": settings.parse_revalidate_rpm,
+            "pending": len(self._pending),
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+        }
+
+
+_REVALIDATIONS = _Revalidator(max_queued=settings.parse_revalidate_queue)
 
 
 def _normalize(sentence: str) -> str:
@@ -27,6 +203,13 @@ def _hash(normalized: str) -> str:
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
+def parse_key(sentence: str) -> tuple[str, str]:
+    """(normalized sentence, sentence_hash) as sentence_parses stores them,
+    for offline jobs (scripts/rewarm_parses.py)."""
+    normalized = _normalize(sentence)
+    return normalized, _hash(normalized)
+
+
 def get_structure(sentence: str) -> tuple[dict | None, dict | None]:
     """Return (structure, usage) for a sentence.
 
@@ -34,30 +217,261 @@ def get_structure(sentence: str) -> tuple[dict | None, dict | None]:
       it is a token-usage dict when a fresh Gemini call happened.
 
     Read-through cache: memory L1 -> Supabase L2 -> Gemini, writing back on miss.
+    With settings.parse_stale_fallback, an L2 row from an older prompt version
+    is served (usage None) and the sentence re-analyzed in the background.
+    Callers that miss while an analysis of the same sentence is in flight wait
+    for it and get usage None, like a cache hit.
     Raises HTTPException(422) before cache/AI access for incomplete sentences and
     propagates HTTPException(502) from the AI layer."""
-    normalized = _normalize(sentence)
-    if not is_complete_sentence(normalized):
-        raise HTTPException(status_code=422, detail=INCOMPLETE_SENTENCE_MESSAGE)
+    normalized, key, cached = _read_cache(sentence)
+    if cached is not None:
+        return cached, None
+
+    (structure, usage), joined = _ANALYSES.do(key, _analyze, key, normalized)
+    return structure, None if joined else usage
+
+
+async def get_structure_async(sentence: str) -> tuple[dict | None, dict | None]:
+    """Async get_structure: the Gemini call is awaited on the event loop; the
+    spaCy check and the Supabase reads/writes run in the threadpool."""
+    normalized, key, cached = await run_in_threadpool(_read_cache, sentence)
+    if cached is not None:
+        return cached, None
+
+    (structure, usage), joined = await _ANALYSES.do_async(key, _analyze_async, key, normalized)
+    return structure, None if joined else usage
+
+
+async def get_structures_async(
+    sentences: list[str],
+) -> tuple[list[tuple[dict | None, HTTPException | None]], dict | None]:
+    """Batch get_structure_async. Returns one (structure, None) or
+    (None, HTTPException) per sentence, in order, and the summed usage of the
+    fresh Gemini analyses (None when every sentence was served without one).
+
+    Sentences in the negative cache are answered from it; the completeness
+    check of the rest is one spaCy pipe, the Supabase lookup one query
+    and the write-back one upsert; misses are analyzed concurrently, at most
+    settings.parse_batch_concurrency at a time. Repeated sentences share one
+    entry."""
+    keyed = [(_hash(normalized), normalized) for normalized in map(_normalize, sentences)]
+    keys = [(sentence_hash, PARSE_PROMPT_VERSION) for sentence_hash, _ in keyed]
+    texts = {key: normalized for key, (_, normalized) in zip(keys, keyed)}
+
+    outcomes: dict[tuple[str, int], tuple[dict | None, HTTPException | None]] = {}
+    for key in texts:
+        try:
+            _FAILURES.check(key)
+        except HTTPException as e:
+            outcomes[key] = None, e
+
+    unchecked = [key for key in texts if key not in outcomes]
+    if unchecked:
+        complete = await run_in_threadpool(are_complete_sentences, [texts[key] for key in unchecked])
+        for key, is_complete in zip(unchecked, complete):
+            if not is_complete:
+                error = HTTPException(status_code=422, detail=INCOMPLETE_SENTENCE_MESSAGE)
+                _FAILURES.record(key, error)
+                outcomes[key] = None, error
+            elif (cached := _MEM_CACHE.get(key)) is not None:
+                outcomes[key] = cached, None
 
+    lookup = [key for key in texts if key not in outcomes]
+    if lookup:
+        hashes = [key[0] for key in lookup]
+        if settings.parse_stale_fallback:
+            found = await run_in_threadpool(get_latest_parses, hashes, PARSE_PROMPT_VERSION)
+        else:
+            stored = await run_in_threadpool(get_cached_parses, hashes, PARSE_PROMPT_VERSION)
+            found = {sentence_hash: (PARSE_PROMPT_VERSION, tree) for sentence_hash, tree in stored.items()}
+        for key in lookup:
+            if key[0] not in found:
+                continue
+            version, tree = found[key[0]]
+            if version == PARSE_PROMPT_VERSION:
+                _MEM_CACHE.put(key, tree)
+            else:
+                _REVALIDATIONS.submit(key, texts[key])
+            outcomes[key] = tree, None
+
+    misses = [key for key in texts if key not in outcomes]
+    limit = asyncio.Semaphore(settings.parse_batch_concurrency)
+
+    async def analyze(key: tuple[str, int]) -> tuple[tuple[dict, dict], bool]:
+        async with limit:
+            return await _ANALYSES.do_async(key, _analyze_batched_async, key, texts[key])
+
+    usage: dict | None = None
+    rows = []
+    results = await asyncio.gather(*map(analyze, misses), return_exceptions=True)
+    for key, result in zip(misses, results):
+        if isinstance(result, HTTPException):
+            outcomes[key] = None, result
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        (structure, item_usage), joined = result
+        outcomes[key] = structure, None
+        # A joined analysis belongs to another request, which bills and
+        # saves it.
+        if not joined:
+            usage = usage or {}
+            for name, value in item_usage.items():
+                usage[name] = usage.get(name, 0) + value
+            rows.append(_parse_row(key, texts[key], structure))
+    if rows:
+        await run_in_threadpool(save_parses, rows)
+
+    logger.info(
+        "parse batch: %d sentences, %d unique, %d analyzed",
+        len(sentences),
+        len(texts),
+        len(misses),
+    )
+    return [outcomes[key] for key in keys], usage
+
+
+def _analyze(key: tuple[str, int], normalized: str) -> tuple[dict, dict]:
+    docs_before = cache_stats()["docs"]
+    try:
+        structure, usage = ai_analyze_structure(normalized)
+    except StructureAnalysisError as e:
+        _FAILURES.record(key, e)
+        raise
+    _FAILURES.forget(key)
+    _log_parsed_docs(docs_before)
+    _write_cache(key, normalized, structure)
+    return structure, usage
+
+
+async def _analyze_async(key: tuple[str, int], normalized: str) -> tuple[dict, dict]:
+    docs_before = cache_stats()["docs"]
+    try:
+        structure, usage = await ai_analyze_structure_async(normalized)
+    except StructureAnalysisError as e:
+        _FAILURES.record(key, e)
+        raise
+    _FAILURES.forget(key)
+    _log_parsed_docs(docs_before)
+    await run_in_threadpool(_write_cache, key, normalized, structure)
+    return structure, usage
+
+
+async def _analyze_batched_async(key: tuple[str, int], normalized: str) -> tuple[dict, dict]:
+    """_analyze_async without the Supabase write: get_structures_async saves
+    the whole batch in one upsert."""
+    try:
+        structure, usage = await ai_analyze_structure_async(normalized)
+    except StructureAnalysisError as e:
+        _FAILURES.record(key, e)
+        raise
+    _FAILURES.forget(key)
+    _MEM_CACHE.put(key, structure)
+    return structure, usage
+
+
+def _read_cache(sentence: str) -> tuple[str, tuple[str, int], dict | None]:
+    """(normalized sentence, cache key, cached structure or None). Raises a
+    remembered failure before spaCy runs."""
+    normalized = _normalize(sentence)
     key = (_hash(normalized), PARSE_PROMPT_VERSION)
+    _FAILURES.check(key)
+
+    if not is_complete_sentence(normalized):
+        error = HTTPException(status_code=422, detail=INCOMPLETE_SENTENCE_MESSAGE)
+        _FAILURES.record(key, error)
+        raise error
 
     cached = _MEM_CACHE.get(key)
     if cached is not None:
-        return cached, None
+        return normalized, key, cached
 
-    stored = get_cached_parse(key[0], key[1])
+    if settings.parse_stale_fallback:
+        found = get_latest_parse(key[0], key[1])
+        if found is not None and found[0] != key[1]:
+            # Kept out of L1, which holds current-version trees only: the
+            # re-analysis replaces it there and in Supabase.
+            _REVALIDATIONS.submit(key, normalized)
+            return normalized, key, found[1]
+        stored = found[1] if found is not None else None
+    else:
+        stored = get_cached_parse(key[0], key[1])
     if stored is not None:
-        _MEM_CACHE[key] = stored
-        return stored, None
-
-    structure, usage = ai_analyze_structure(normalized)
-    _MEM_CACHE[key] = structure
-    save_parse(
-        sentence_hash=key[0],
-        prompt_version=key[1],
-        model=settings.gemini_adv_model,
-        sentence=normalized,
-        structure=structure,
+        _MEM_CACHE.put(key, stored)
+    return normalized, key, stored
+
+
+def refresh_structure(sentence: str) -> dict:
+    """Analyze a sentence under the current prompt version and store the
+    tree, whatever the caches hold; returns the usage. For offline re-warming
+    ahead of a deploy (scripts/rewarm_parses.py). Raises HTTPException(422)
+    for incomplete sentences and StructureAnalysisError like get_structure."""
+    normalized = _normalize(sentence)
+    if not is_complete_sentence(normalized):
+        raise HTTPException(status_code=422, detail=INCOMPLETE_SENTENCE_MESSAGE)
+    _, usage = _analyze((_hash(normalized), PARSE_PROMPT_VERSION), normalized)
+    return usage
+
+
+def _log_parsed_docs(docs_before: dict) -> None:
+    # Counters are process-wide, so concurrent parses blur this per-request
+    # figure; it is a log-level estimate of the spaCy runs the Doc cache saved.
+    docs_after = cache_stats()["docs"]
+    logger.info(
+        "parse spaCy docs: %d cached, %d parsed",
+        docs_after["hits"] - docs_before["hits"],
+        docs_after["misses"] - docs_before["misses"],
     )
-    return structure, usage
+
+
+def _write_cache(key: tuple[str, int], normalized: str, structure: dict) -> None:
+    _MEM_CACHE.put(key, structure)
+    save_parse(**_parse_row(key, normalized, structure))
+
+
+def _parse_row(key: tuple[str, int], normalized: str, structure: dict) -> dict:
+    """A sentence_parses row (save_parse's keyword arguments)."""
+    return {
+        "sentence_hash": key[0],
+        "prompt_version": key[1],
+        "model": settings.gemini_adv_model,
+        "sentence": normalized,
+        "structure": structure,
+    }
+
+
+def memory_cache_stats() -> dict:
+    """Hit/miss/eviction counters and approximate size of the L1 cache."""
+    return _MEM_CACHE.stats()
+
+
+def failure_cache_stats() -> dict:
+    """Entries and answers served by the negative cache."""
+    return _FAILURES.stats()
+
+
+def revalidation_stats() -> dict:
+    """Counters of the stale-tree background re-analysis."""
+    return _REVALIDATIONS.stats()
+
+
+def memory_cache_entries(limit: int) -> list[dict]:
+    """The `limit` most recently used L1 entries, for the admin view."""
+    return [
+        {
+            "sentence_hash": sentence_hash,
+            "prompt_version": prompt_version,
+            "sentence": structure.get("text"),
+            "bytes": size,
+        }
+        for (sentence_hash, prompt_version), structure, size in _MEM_CACHE.recent(limit)
+    ]
+
+
+def clear_memory_cache() -> dict:
+    """Empty the L1 cache (Supabase keeps every tree); returns the stats it
+    had just before."""
+    stats = _MEM_CACHE.stats()
+    _MEM_CACHE.clear()
+    logger.info("structure L1 cache cleared: %d entries", stats["entries"])
+    return stats
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+from collections import Counter, OrderedDict, deque
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services import admission
+from app.services.gemini import ai_generate_quiz_async
+from app.services.structure import get_structure_async
+from app.services.supabase import get_quiz_questions, log_api_usage, replace_quiz_questions
+from app.services.tts import synthesize_speech
+
+logger = logging.getLogger(__name__)
+
+ARTIFACTS = ("structure", "tts", "quiz")
+
+# Finished and cancelled packs kept for the progress endpoint; the oldest
+# are forgotten past this.
+_KEEP_FINISHED = 1000
+
+
+class _Pack:
+    """The precomputation for one saved session: one step per artifact
+    (a structure tree or TTS clip per sentence, one quiz per article)."""
+
+    def __init__(self, user_id: str, session_id: str, text: str, sentences: list[str]) -> None:
+        self.user_id = user_id
+        self.session_id = session_id
+        unique = list(dict.fromkeys(s.strip() for s in sentences if s.strip()))
+        self.steps: deque[tuple[str, str]] = deque(
+            [("structure", s) for s in unique] + [("tts", s) for s in unique]
+        )
+        if text.strip():
+            self.steps.append(("quiz", text.strip()))
+        self.totals = Counter(kind for kind, _ in self.steps)
+        # Per artifact: "done", "skipped" (nothing to do, e.g. an incomplete
+        # sentence has no tree) or "failed".
+        self.outcomes: dict[str, Counter[str]] = {kind: Counter() for kind in ARTIFACTS}
+        self.running = 0
+        self.cancelled = False
+
+    @property
+    def state(self) -> str:
+        if self.cancelled:
+            return "cancelled"
+        if not self.steps and not self.running:
+            return "done"
+        finished = sum(sum(counts.values()) for counts in self.outcomes.values())
+        return "running" if finished or self.running else "queued"
+
+    def cancel(self) -> None:
+        """Drop the steps not started yet; a running step finishes (its
+        result lands in the shared caches) but is not written to the session."""
+        self.cancelled = True
+        self.steps.clear()
+
+    def progress(self) -> dict:
+        finished = sum(sum(counts.values()) for counts in self.outcomes.values())
+        return {
+            "session_id": self.session_id,
+            "state": self.state,
+            "total": sum(self.totals.values()),
+            "finished": finished,
+            "artifacts": {
+                kind: {
+                    "total": self.totals[kind],
+                    **{outcome: self.outcomes[kind][outcome] for outcome in ("done", "skipped", "failed")},
+                }
+                for kind in ARTIFACTS
+            },
+        }
+
+
+class StudyPackPipeline:
+    """Background precomputation of a saved session's structure trees, TTS
+    audio and quiz, so opening it later is served from the caches.
+
+    A fixed pool of worker tasks on the event loop takes one step at a time,
+    rotating over the users with queued work, so a long article never holds
+    back someone else's short one. Gemini calls run at admission priority
+    "background", behind every interactive click. Re-saving a session
+    replaces its pack and deleting it cancels it. State is per process and
+    lost on restart, like the other in-memory caches."""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        # user_id -> that user's packs with steps left, in rotation order.
+        self._queues: OrderedDict[str, deque[_Pack]] = OrderedDict()
+        # (user_id, session_id) -> latest pack, including finished ones.
+        self._packs: OrderedDict[tuple[str, str], _Pack] = OrderedDict()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    def submit(self, user_id: str, session_id: str, text: str, sentences: list[str]) -> dict:
+        """Queue a pack for a just-saved session, replacing any earlier one.
+        Must be called on the event loop."""
+        self.cancel(user_id, session_id)
+        pack = _Pack(user_id, session_id, text, sentences)
+        key = (user_id, session_id)
+        self._packs.pop(key, None)
+        self._packs[key] = pack
+        self._forget_finished()
+        if pack.steps:
+            self._queues.setdefault(user_id, deque()).append(pack)
+            self._start()
+            self._wakeup.set()
+        return pack.progress()
+
+    def cancel(self, user_id: str, session_id: str) -> None:
+        pack = self._packs.get((user_id, session_id))
+        if pack is not None and pack.state in ("queued", "running"):
+            pack.cancel()
+            logger.info("study pack cancelled: session %s", session_id)
+
+    def progress(self, user_id: str, session_id: str) -> dict | None:
+        pack = self._packs.get((user_id, session_id))
+        return pack.progress() if pack is not None else None
+
+    def stats(self) -> dict:
+        states = Counter(pack.state for pack in self._packs.values())
+        return {
+            "enabled": settings.study_pack,
+            "workers": self.workers,
+            "queued_users": len(self._queues),
+            "queued_steps": sum(len(p.steps) for packs in self._queues.values() for p in packs),
+            "packs": dict(states),
+        }
+
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def _start(self) -> None:
+        # Workers live on the loop that first submits; a new loop (tests run
+        # one per asyncio.run) gets a fresh pool.
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            loop.create_task(self._work(), name=f"study-pack-{i}") for i in range(self.workers)
+        ]
+
+    def _forget_finished(self) -> None:
+        finished = [key for key, pack in self._packs.items() if pack.state in ("done", "cancelled")]
+        for key in finished[: max(0, len(finished) - _KEEP_FINISHED)]:
+            del self._packs[key]
+
+    def _next_step(self) -> tuple[_Pack, str, str] | None:
+        """The next step of the user at the head of the rotation, who then
+        moves to the back. Cancelled and drained packs are dropped here."""
+        while self._queues:
+            user_id, packs = next(iter(self._queues.items()))
+            self._queues.move_to_end(user_id)
+            while packs and not packs[0].steps:
+                packs.popleft()
+            if not packs:
+                del self._queues[user_id]
+                continue
+            pack = packs[0]
+            kind, payload = pack.steps.popleft()
+            pack.running += 1
+            return pack, kind, payload
+        return None
+
+    async def _work(self) -> None:
+        while True:
+            picked = self._next_step()
+            if picked is None:
+                # No await between the empty check and clear(): a submit
+                # cannot slip in and lose its wake-up.
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            pack, kind, payload = picked
+            try:
+                with admission.priority("background"):
+                    outcome = await _STEPS[kind](pack, payload)
+            except asyncio.CancelledError:
+                # Shutdown stopped the step mid-way: the pack will not finish.
+                pack.cancel()
+                raise
+            except Exception as e:
+                outcome = "failed"
+                logger.info("study pack %s step failed for session %s: %s", kind, pack.session_id, e)
+            finally:
+                pack.running -= 1
+            pack.outcomes[kind][outcome] += 1
+            if pack.state == "done":
+                logger.info("study pack done: session %s %s", pack.session_id, pack.progress()["artifacts"])
+
+
+async def _structure_step(pack: _Pack, sentence: str) -> str:
+    try:
+        _, usage = await get_structure_async(sentence)
+    except HTTPException as e:
+        if e.status_code == 422:
+            return "skipped"
+        raise
+    if usage is not None:
+        await run_in_threadpool(log_api_usage, pack.user_id, "parse", settings.gemini_adv_model, usage)
+    return "done"
+
+
+async def _tts_step(pack: _Pack, sentence: str) -> str:
+    await synthesize_speech(sentence, precompute=True)
+    return "done"
+
+
+async def _quiz_step(pack: _Pack, article: str) -> str:
+    if await run_in_threadpool(get_quiz_questions, pack.user_id, pack.session_id):
+        return "skipped"
+    questions, usage = await ai_generate_quiz_async(article)
+    await run_in_threadpool(log_api_usage, pack.user_id, "quiz", settings.gemini_basic_model, usage)
+    if pack.cancelled:
+        return "skipped"
+    await run_in_threadpool(replace_quiz_questions, pack.user_id, pack.session_id, questions)
+    return "done"
+
+
+_STEPS = {"structure": _structure_step, "tts": _tts_step, "quiz": _quiz_step}
+
+# Process-wide pipeline used by the session routes.
+pipeline = StudyPackPipeline(settings.study_pack_workers)
@@ -555,6 +555,27 @@ def get_cached_parse(sentence_hash: str, prompt_version: int) -> dict | None:
     return rows[0]["structure"] if rows else None
 
 
+def get_latest_parse(sentence_hash: str, max_version: int) -> tuple[int, dict] | None:
+    """(prompt_version, structure) of the newest cached tree for a sentence
+    at or below `max_version`, or None. One query serves both the current
+    version and the stale fallback (settings.parse_stale_fallback)."""
+    query = parse.urlencode(
+        {
+            "sentence_hash": f"eq.{sentence_hash}",
+            "prompt_version": f"lte.{max_version}",
+            "select": "prompt_version,structure",
+            "order": "prompt_version.desc",
+            "limit": 1,
+        }
+    )
+    rows = _request_json(
+        "GET",
+        f"{settings.supabase_url}/rest/v1/sentence_parses?{query}",
+        headers=_service_headers(),
+    ) or []
+    return (rows[0]["prompt_version"], rows[0]["structure"]) if rows else None
+
+
 def save_parse(
     sentence_hash: str,
     prompt_version: int,
@@ -583,6 +604,150 @@ def save_parse(
         logger.warning("Failed to cache sentence parse (hash=%s)", sentence_hash)
 
 
+def get_cached_parses(sentence_hashes: list[str], prompt_version: int) -> dict[str, dict]:
+    """Cached structure trees for many sentences in one in.(...) query, as
+    {sentence_hash: structure}; misses are simply absent. Callers keep the
+    list short (see ParseBatchRequest) so the filter URL stays small."""
+    if not sentence_hashes:
+        return {}
+    query = parse.urlencode(
+        {
+            "sentence_hash": f"in.({','.join(sentence_hashes)})",
+            "prompt_version": f"eq.{prompt_version}",
+            "select": "sentence_hash,structure",
+        }
+    )
+    rows = _request_json(
+        "GET",
+        f"{settings.supabase_url}/rest/v1/sentence_parses?{query}",
+        headers=_service_headers(),
+    ) or []
+    return {row["sentence_hash"]: row["structure"] for row in rows}
+
+
+# Rows per get_latest_parses page: every stored version of each sentence
+# matches the filter, so one query could return far more rows than hashes.
+_PARSE_PAGE = 1000
+
+
+def get_latest_parses(sentence_hashes: list[str], max_version: int) -> dict[str, tuple[int, dict]]:
+    """get_latest_parse for many sentences, as {sentence_hash:
+    (prompt_version, structure)}; misses are absent. Read in pages of
+    _PARSE_PAGE rows."""
+    latest: dict[str, tuple[int, dict]] = {}
+    if not sentence_hashes:
+        return latest
+    offset = 0
+    while True:
+        query = parse.urlencode(
+            {
+                "sentence_hash": f"in.({','.join(sentence_hashes)})",
+                "prompt_version": f"lte.{max_version}",
+                "select": "sentence_hash,prompt_version,structure",
+                # Stable across pages; the newest version of a hash comes first.
+                "order": "sentence_hash.asc,prompt_version.desc",
+                "limit": _PARSE_PAGE,
+                "offset": offset,
+            }
+        )
+        rows = _request_json(
+            "GET",
+            f"{settings.supabase_url}/rest/v1/sentence_parses?{query}",
+            headers=_service_headers(),
+        ) or []
+        for row in rows:
+            latest.setdefault(row["sentence_hash"], (row["prompt_version"], row["structure"]))
+        if len(rows) < _PARSE_PAGE:
+            return latest
+        offset += _PARSE_PAGE
+
+
+def list_saved_sentences(limit: int, offset: int = 0) -> list[str]:
+    """One page of original sentence texts across every user's saved
+    sessions, for offline jobs (scripts/rewarm_parses.py)."""
+    query = parse.urlencode(
+        {
+            "select": "original_text",
+            "order": "session_id.asc,sentence_index.asc",
+            "limit": limit,
+            "offset": offset,
+        }
+    )
+    rows = _request_json(
+        "GET",
+        f"{settings.supabase_url}/rest/v1/session_sentences?{query}",
+        headers=_service_headers(),
+    ) or []
+    return [row["original_text"] for row in rows]
+
+
+def save_parses(rows: list[dict]) -> None:
+    """save_parse for many analyses in one upsert. Each row carries
+    sentence_hash, prompt_version, model, sentence and structure."""
+    if not rows:
+        return
+    try:
+        _request_json(
+            "POST",
+            f"{settings.supabase_url}/rest/v1/sentence_parses"
+            "?on_conflict=sentence_hash,prompt_version",
+            headers=_service_headers("resolution=merge-duplicates,return=minimal"),
+            payload=rows,
+        )
+    except Exception:
+        logger.warning("Failed to cache %d sentence parses", len(rows))
+
+
+# Hashes per translation-cache read: keeps the in.(...) filter URL well under
+# proxy URL-length limits on long articles.
+_TRANSLATION_LOOKUP_BATCH = 100
+
+
+def get_cached_translations(translation_hashes: list[str]) -> dict[str, str]:
+    """Cached translations for the given keys, as {translation_hash: text};
+    misses are simply absent. A failed read degrades to all-miss rather than
+    failing the translation."""
+    found: dict[str, str] = {}
+    for start in range(0, len(translation_hashes), _TRANSLATION_LOOKUP_BATCH):
+        batch = translation_hashes[start:start + _TRANSLATION_LOOKUP_BATCH]
+        query = parse.urlencode(
+            {
+                "translation_hash": f"in.({','.join(batch)})",
+                "select": "translation_hash,translation",
+            }
+        )
+        try:
+            rows = _request_json(
+                "GET",
+                f"{settings.supabase_url}/rest/v1/sentence_translations?{query}",
+                headers=_service_headers(),
+            ) or []
+        except HTTPException:
+            logger.warning("Failed to read cached translations (%d keys)", len(batch))
+            continue
+        found.update((row["translation_hash"], row["translation"]) for row in rows)
+    return found
+
+
+def save_translations(rows: list[dict]) -> None:
+    """Persist translations in one request. Each row carries translation_hash,
+    prompt_version, model, target_lang, mode, sentence and translation.
+    Upserts on translation_hash so concurrent first-time requests can't 409;
+    a cache-write failure must not fail the user's request."""
+    if not rows:
+        return
+    try:
+        _request_json(
+            "POST",
+            f"{settings.supabase_url}/rest/v1/sentence_translations"
+            "?on_conflict=translation_hash",
+            headers=_service_headers("resolution=merge-duplicates,return=minimal"),
+            payload=rows,
+        )
+    except Exception:
+        logger.warning("Failed to cache %d sentence translations", len(rows))
+
+
 def get_quiz_questions(user_id: str, session_id: str) -> list[dict]:
     """Cached comprehension questions for a session, ordered by index."""
     query = parse.urlencode(
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import re
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.gemini import (
+    TRANSLATE_PROMPT_VERSION,
+    ai_translate_list,
+    ai_translate_list_async,
+)
+from app.services.lru import LRUCache
+from app.services.nlp import strip_invisible
+from app.services.supabase import get_cached_translations, save_translations
+
+logger = logging.getLogger(__name__)
+
+# In-memory L1 cache in front of Supabase (L2), keyed by translation hash.
+# Bounded because translations accumulate per sentence across every user's
+# articles; Supabase remains the durable, shared cache.
+_MEM_CACHE = LRUCache(max_entries=4096)
+
+
+def _normalize(sentence: str) -> str:
+    """Collapse whitespace within each line and drop invisible format
+    characters so trivial variants share one cache entry. Line breaks are
+    kept: the translator preserves them (e.g. option lists)."""
+    lines = (re.sub(r"\s+", " ", line).strip() for line in strip_invisible(sentence).split("\n"))
+    return "\n".join(lines).strip()
+
+
+def _hash(normalized: str, target_lang: str, mode: str) -> str:
+    key = "\x1f".join(
+        (normalized, target_lang, mode, settings.gemini_basic_model, str(TRANSLATE_PROMPT_VERSION))
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def get_translations(
+    sentences: list[str], target_lang: str = "zh-TW", mode: str = "normal"
+) -> tuple[list[str], dict | None]:
+    """Return (translations, usage) for sentences, in input order.
+
+    Read-through cache: memory L1 -> Supabase L2 -> Gemini, writing back on
+    miss. Only the misses (deduplicated) go to ai_translate_list, so usage is
+    None when every sentence was cached. Propagates HTTPException(502) from
+    the AI layer; nothing is cached for a failed batch."""
+    lookup = _read_cache(sentences, target_lang, mode)
+    usage = None
+    if lookup.misses:
+        translations, usage = ai_translate_list(list(lookup.misses.values()), target_lang, mode)
+        _write_cache(lookup, translations, target_lang, mode)
+    return lookup.result(), usage
+
+
+async def get_translations_async(
+    sentences: list[str], target_lang: str = "zh-TW", mode: str = "normal"
+) -> tuple[list[str], dict | None]:
+    """Async get_translations: Gemini is awaited on the event loop; the
+    Supabase reads/writes run in the threadpool."""
+    lookup = await run_in_threadpool(_read_cache, sentences, target_lang, mode)
+    usage = None
+    if lookup.misses:
+        translations, usage = await ai_translate_list_async(
+            list(lookup.misses.values()), target_lang, mode
+        )
+        await run_in_threadpool(_write_cache, lookup, translations, target_lang, mode)
+    return lookup.result(), usage
+
+
+class _Lookup:
+    """Cache state for one batch: per-sentence keys, the translations found
+    so far, and the first sentence for each missing key."""
+
+    def __init__(self, keys: list[str], found: dict[str, str], sentences: list[str]) -> None:
+        self.keys = keys
+        self.found = found
+        # The translator sees the original sentence so its output matches an
+        # uncached request exactly.
+        self.misses = {key: sentence for key, sentence in zip(keys, sentences) if key not in found}
+
+    def result(self) -> list[str]:
+        return [self.found[key] for key in self.keys]
+
+
+def _read_cache(sentences: list[str], target_lang: str, mode: str) -> _Lookup:
+    keys = [_hash(_normalize(sentence), target_lang, mode) for sentence in sentences]
+
+    found: dict[str, str] = {}
+    for key in keys:
+        cached = _MEM_CACHE.get(key)
+        if cached is not None:
+            found[key] = cached
+    memory_hits = len(found)
+
+    remote = [key for key in dict.fromkeys(keys) if key not in found]
+    stored = get_cached_translations(remote) if remote else {}
+    for key, translation in stored.items():
+        _MEM_CACHE.put(key, translation)
+    found.update(stored)
+
+    lookup = _Lookup(keys, found, sentences)
+    logger.info(
+        "translate cache: %d memory, %d supabase, %d translated of %d sentences (hit rate %.2f)",
+        memory_hits,
+        len(stored),
+        len(lookup.misses),
+        len(sentences),
+        1 - len(lookup.misses) / len(sentences) if sentences else 1.0,
+    )
+    return lookup
+
+
+def _write_cache(lookup: _Lookup, translations: list[str], target_lang: str, mode: str) -> None:
+    rows = []
+    for (key, sentence), translation in zip(lookup.misses.items(), translations):
+        lookup.found[key] = translation
+        _MEM_CACHE.put(key, translation)
+        rows.append(
+            {
+                "translation_hash": key,
+                "prompt_version": TRANSLATE_PROMPT_VERSION,
+                "model": settings.gemini_basic_model,
+                "target_lang": target_lang,
+                "mode": mode,
+                "sentence": _normalize(sentence),
+                "translation": translation,
+            }
+        )
+    save_translations(rows)
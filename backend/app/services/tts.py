@@ -4,6 +4,8 @@ from collections import OrderedDict
 import edge_tts
 
 from app.core.config import settings
+from app.services.lru import LRUCache
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -12,17 +14,42 @@ logger = logging.getLogger(__name__)
 _MAX_ENTRIES = 300
 AUDIO_CACHE: OrderedDict[str, bytes] = OrderedDict()
 
+# Audio precomputed by study packs (app.services.study_pack), kept apart from
+# AUDIO_CACHE so a large pack and ordinary plays cannot evict each other
+# before the session is opened. Bounded by bytes, by default room for a few
+# thousand sentences.
+PACK_AUDIO = LRUCache(max_bytes=settings.tts_pack_cache_mb * 1024 * 1024, sizeof=len)
 
-async def synthesize_speech(text: str) -> bytes:
-    """Return MP3 audio for the given text, using the cache when possible."""
+# Concurrent misses for the same voice|text share one synthesis.
+_SYNTHESES = SingleFlight("tts")
+
+
+async def synthesize_speech(text: str, precompute: bool = False) -> bytes:
+    """Return MP3 audio for the given text, using the cache when possible.
+    `precompute` (study packs) stores a miss in PACK_AUDIO, not AUDIO_CACHE."""
     key = f"{settings.tts_voice}|{text}"
     cached = AUDIO_CACHE.get(key)
     if cached is not None:
         AUDIO_CACHE.move_to_end(key)
         logger.info("tts cache HIT len=%d", len(text))
         return cached
+    cached = PACK_AUDIO.get(key)
+    if cached is not None:
+        logger.info("tts pack cache HIT len=%d", len(text))
+        return cached
 
     logger.info("tts cache MISS len=%d", len(text))
+    audio, _joined = await _SYNTHESES.do_async(key, _synthesize, text)
+    if precompute:
+        PACK_AUDIO.put(key, audio)
+    else:
+        AUDIO_CACHE[key] = audio
+        if len(AUDIO_CACHE) > _MAX_ENTRIES:
+            AUDIO_CACHE.popitem(last=False)
+    return audio
+
+
+async def _synthesize(text: str) -> bytes:
     communicate = edge_tts.Communicate(text, settings.tts_voice)
     audio = b""
     async for chunk in communicate.stream():
@@ -31,8 +58,4 @@ async def synthesize_speech(text: str) -> bytes:
 
     if not audio:
         raise RuntimeError("edge-tts returned no audio")
-
-    AUDIO_CACHE[key] = audio
-    if len(AUDIO_CACHE) > _MAX_ENTRIES:
-        AUDIO_CACHE.popitem(last=False)
     return audio
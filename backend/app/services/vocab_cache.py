@@ -1,7 +1,13 @@
+import asyncio
 import logging
+from functools import partial
+
+from fastapi.concurrency import run_in_threadpool
 
 from app.models.vocab import CachedLookup, VocabLookupRequest, VocabLookupResponse, VocabOptions
-from app.services.gemini import ai_lookup_word, normalize_pos
+from app.services.gemini import ai_lookup_word, ai_lookup_word_async, normalize_pos
+from app.services.hedging import Hedger
+from app.services.single_flight import SingleFlight
 from app.services.supabase import log_api_usage
 from app.core.config import settings
 
@@ -10,7 +16,73 @@ logger = logging.getLogger(__name__)
 # In-memory cache keyed by session|sentence_id|word_index to avoid repeated AI calls.
 LOOKUP_CACHE: dict[str, CachedLookup] = {}
 
+# The cache above is per session and position, so classmates tapping the same
+# word in a shared article all miss; identical in-flight lookups share one call.
+_LOOKUPS = SingleFlight("vocab")
+
+# Tail-latency hedging for the async route (settings.vocab_hedge). The
+# tracker learns from every lookup, so the threshold is ready once enabled.
+_HEDGER = Hedger(settings.vocab_hedge_percentile, settings.vocab_hedge_min_delay)
+
 def get_vocab_lookup(req: VocabLookupRequest, user_id: str) -> VocabLookupResponse:
+    key, cached, missing = _read_cache(req)
+    if missing is not None:
+        (ai_data, usage), joined = _LOOKUPS.do(
+            _lookup_key(req, missing), ai_lookup_word, req.selected_text, req.sentence, missing
+        )
+        if not joined:
+            log_api_usage(user_id, "vocab_lookup", settings.gemini_basic_model, usage)
+        cached = _write_cache(req, key, cached, ai_data)
+    return _response(req, cached)
+
+
+async def get_vocab_lookup_async(req: VocabLookupRequest, user_id: str) -> VocabLookupResponse:
+    """Async get_vocab_lookup: Gemini is awaited on the event loop and the
+    usage row is written from the threadpool."""
+    key, cached, missing = _read_cache(req)
+    if missing is not None:
+        (ai_data, _), _ = await _LOOKUPS.do_async(
+            _lookup_key(req, missing), _lookup_async, user_id, req.selected_text, req.sentence, missing
+        )
+        cached = _write_cache(req, key, cached, ai_data)
+    return _response(req, cached)
+
+
+async def _lookup_async(
+    user_id: str, selected_text: str, sentence: str, missing: VocabOptions
+) -> tuple[dict, dict | None]:
+    """ai_lookup_word_async, hedged when settings.vocab_hedge is on, with its
+    usage logged. Runs as the single-flight task, which a cancelled caller
+    does not cancel, so the lookup is billed even when nobody waits for it.
+    A losing hedge still cost tokens: its usage is logged once it finishes."""
+    call = partial(ai_lookup_word_async, selected_text, sentence, missing)
+    bill_late = None
+    if settings.vocab_hedge:
+        loop = asyncio.get_running_loop()
+
+        def bill_late(result: tuple[dict, dict | None]) -> None:
+            loop.run_in_executor(
+                None, log_api_usage, user_id, "vocab_lookup", settings.gemini_basic_model, result[1]
+            )
+
+    ai_data, usage = await _HEDGER.run(call, on_late=bill_late)
+    await run_in_threadpool(log_api_usage, user_id, "vocab_lookup", settings.gemini_basic_model, usage)
+    return ai_data, usage
+
+
+def hedge_stats() -> dict:
+    """Hedged-lookup counters and the current threshold."""
+    return {"enabled": settings.vocab_hedge, **_HEDGER.stats()}
+
+
+def _lookup_key(req: VocabLookupRequest, missing: VocabOptions) -> tuple:
+    """Fingerprint of the Gemini request: same word, sentence and fields."""
+    return (req.selected_text, req.sentence, tuple(missing.model_dump().values()))
+
+
+def _read_cache(req: VocabLookupRequest) -> tuple[str, CachedLookup | None, VocabOptions | None]:
+    """(cache key, cached lookup, fields to ask the AI for); the fields are
+    None when the cache already holds everything requested."""
     session_prefix = req.session_id if req.session_id else "unsaved"
     key = f"{session_prefix}|{req.sentence_id}|{req.word_index}"
     cached = LOOKUP_CACHE.get(key)
@@ -25,34 +97,40 @@ def get_vocab_lookup(req: VocabLookupRequest, user_id: str) -> VocabLookupRespon
     )
     need_ai = cached is None or any([missing.translation, missing.definition, missing.example, missing.level])
 
-    if need_ai:
-        if cached is None:
-            logger.info("cache MISS key=%s word=%r", key, req.selected_text)
-        else:
-            missing_fields = [f for f in ["translation", "definition", "example", "level"] if getattr(missing, f)]
-            logger.info("cache PARTIAL key=%s word=%r missing=%s", key, req.selected_text, missing_fields)
-
-        ai_data, usage = ai_lookup_word(req.selected_text, req.sentence, missing)
-        log_api_usage(user_id, "vocab_lookup", settings.gemini_basic_model, usage)
-
-        if cached is None:
-            cached = CachedLookup(
-                sentence=req.sentence,
-                text=ai_data.get("text") or req.selected_text,
-                lemma=ai_data.get("lemma") or req.selected_text.lower(),
-                pos=normalize_pos(ai_data.get("pos") or ""),
-            )
-
-        for field in ["translation", "definition", "example", "example_translation", "level"]:
-            value = ai_data.get(field)
-            if value:
-                setattr(cached, field, value)
+    if not need_ai:
+        logger.info("cache HIT key=%s word=%r", key, req.selected_text)
+        return key, cached, None
 
-        LOOKUP_CACHE[key] = cached
-        logger.debug("cache SET key=%s size=%d", key, len(LOOKUP_CACHE))
+    if cached is None:
+        logger.info("cache MISS key=%s word=%r", key, req.selected_text)
     else:
-        logger.info("cache HIT key=%s word=%r", key, req.selected_text)
+        missing_fields = [f for f in ["translation", "definition", "example", "level"] if getattr(missing, f)]
+        logger.info("cache PARTIAL key=%s word=%r missing=%s", key, req.selected_text, missing_fields)
+    return key, cached, missing
+
+
+def _write_cache(
+    req: VocabLookupRequest, key: str, cached: CachedLookup | None, ai_data: dict
+) -> CachedLookup:
+    if cached is None:
+        cached = CachedLookup(
+            sentence=req.sentence,
+            text=ai_data.get("text") or req.selected_text,
+            lemma=ai_data.get("lemma") or req.selected_text.lower(),
+            pos=normalize_pos(ai_data.get("pos") or ""),
+        )
+
+    for field in ["translation", "definition", "example", "example_translation", "level"]:
+        value = ai_data.get(field)
+        if value:
+            setattr(cached, field, value)
+
+    LOOKUP_CACHE[key] = cached
+    logger.debug("cache SET key=%s size=%d", key, len(LOOKUP_CACHE))
+    return cached
+
 
+def _response(req: VocabLookupRequest, cached: CachedLookup) -> VocabLookupResponse:
     return VocabLookupResponse(
         text=cached.text,
         lemma=cached.lemma,
@@ -0,0 +1,93 @@
+"""Light-route latency while heavy spaCy parses run, with and without nlp_pool.
+
+Mimics one uvicorn worker: a thread pool serves a light Supabase-only route
+(get_usage_stats against canned rows, no network) in a steady loop while
+other threads split long articles. Reports light-route p50/p99 with spaCy
+in-process and with SPACY_WORKERS worker processes. Needs en_core_web_sm;
+makes no network calls. Run manually:
+
+    cd backend && poetry run python -m benchmarks.bench_concurrency
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import threading
+import time
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.services import nlp, nlp_pool, supabase
+from benchmarks.bench_split import _PAGE
+
+_USAGE_ROWS = [
+    {"created_at": f"2026-06-07T{hour:02d}:{minute:02d}:00Z", "total_tokens": 120}
+    for hour in range(24)
+    for minute in range(0, 60, 5)
+]
+
+
+def _light_route() -> None:
+    supabase.get_usage_stats("bench-user")
+
+
+def _run(args, workers: int) -> list[float]:
+    text = "\n".join([_PAGE] * args.pages)
+    stop = threading.Event()
+
+    def heavy() -> None:
+        while not stop.is_set():
+            nlp.clear_caches()
+            nlp.split_sentences(text)
+
+    with (
+        patch.object(settings, "spacy_workers", workers),
+        patch.object(supabase, "_request_json", return_value=_USAGE_ROWS),
+    ):
+        if workers:
+            nlp_pool.start()
+        else:
+            nlp._get_nlp()
+        threads = [threading.Thread(target=heavy) for _ in range(args.heavy)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.5)  # let the heavy parses get going
+
+        latencies = []
+        for _ in range(args.requests):
+            started = time.perf_counter()
+            _light_route()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(args.interval)
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        nlp_pool.shutdown()
+    return latencies
+
+
+def _report(name: str, latencies: list[float]) -> None:
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(
+        f"  {name:<18} p50 {cuts[49] * 1000:8.2f} ms  p99 {cuts[98] * 1000:8.2f} ms  "
+        f"max {max(latencies) * 1000:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--heavy", type=int, default=2, help="concurrent long-article parses")
+    parser.add_argument("--pages", type=int, default=20, help="exam pages per article")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    print(f"light-route latency with {args.heavy} concurrent {args.pages}-page splits:")
+    _report("in-process", _run(args, 0))
+    _report(f"pool ({args.workers} workers)", _run(args, args.workers))
+
+
+if __name__ == "__main__":
+    main()
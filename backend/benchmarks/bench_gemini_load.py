@@ -0,0 +1,152 @@
+"""Concurrent vocab lookups under slow Gemini: threadpool routes vs async routes.
+
+Replays the FastAPI dispatch of /api/vocab/lookup for a burst of concurrent
+requests with Gemini replaced by a stand-in that answers after --latency
+seconds: once as the former sync route (the handler runs in the threadpool
+and each call blocks a worker on client.models.generate_content), once as
+the async route (client.aio). While the burst runs, a light sync route
+(get_usage_stats against canned rows) is polled through the same threadpool.
+Reports burst wall time, peak concurrent Gemini calls and light-route p50/p99.
+Makes no network calls and needs no spaCy model. Run manually:
+
+    cd backend && poetry run python -m benchmarks.bench_gemini_load
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.models.vocab import VocabLookupRequest, VocabOptions
+from app.routes import vocab as vocab_route
+from app.services import gemini, supabase, vocab_cache
+from benchmarks.bench_concurrency import _USAGE_ROWS
+
+_ANSWER = SimpleNamespace(
+    text=json.dumps(
+        {
+            "text": "abandon",
+            "lemma": "abandon",
+            "pos": "verb",
+            "translation": "放棄",
+            "definition": "give up",
+            "example": "They abandoned the plan.",
+            "example_translation": "他們放棄了計畫。",
+            "level": "B1",
+        }
+    ),
+    usage_metadata=None,
+)
+
+
+class _FakeGemini:
+    """Answers every call after a fixed delay and tracks peak concurrency."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _enter(self) -> None:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.active -= 1
+
+    def generate_content(self, **_kwargs):
+        self._enter()
+        time.sleep(self.latency)
+        self._exit()
+        return _ANSWER
+
+    async def generate_content_async(self, **_kwargs):
+        self._enter()
+        await asyncio.sleep(self.latency)
+        self._exit()
+        return _ANSWER
+
+
+def _sync_vocab_lookup(req: VocabLookupRequest, user: dict):
+    # The route as it was before it became async.
+    return vocab_cache.get_vocab_lookup(req, user["id"])
+
+
+def _request(i: int) -> VocabLookupRequest:
+    return VocabLookupRequest(
+        selected_text="abandon",
+        sentence="They abandoned the plan.",
+        sentence_id=i,
+        word_index=i,
+        options=VocabOptions(translation=True, definition=True, example=True, level=True),
+    )
+
+
+async def _burst(args, use_async: bool, fake: _FakeGemini) -> tuple[float, list[float]]:
+    vocab_cache.LOOKUP_CACHE.clear()
+    user = {"id": "bench-user"}
+    done = asyncio.Event()
+
+    async def one(i: int) -> None:
+        if use_async:
+            await vocab_route.vocab_lookup(_request(i), user)
+        else:
+            await run_in_threadpool(_sync_vocab_lookup, _request(i), user)
+
+    async def light() -> list[float]:
+        latencies = []
+        while not done.is_set():
+            started = time.perf_counter()
+            await run_in_threadpool(supabase.get_usage_stats, "bench-user")
+            latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(args.interval)
+        return latencies
+
+    poller = asyncio.ensure_future(light())
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    return elapsed, await poller
+
+
+def _report(name: str, elapsed: float, peak: int, latencies: list[float]) -> None:
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    print(
+        f"  {name:<11} burst {elapsed:6.2f} s  peak Gemini calls {peak:4d}  "
+        f"light route p50 {cuts[49] * 1000:8.2f} ms  p99 {cuts[98] * 1000:8.2f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="concurrent lookups")
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per Gemini call")
+    parser.add_argument("--interval", type=float, default=0.05, help="light-route poll gap")
+    args = parser.parse_args()
+
+    print(f"{args.requests} concurrent vocab lookups, {args.latency:.1f} s per Gemini call:")
+    for name, use_async in (("threadpool", False), ("async", True)):
+        fake = _FakeGemini(args.latency)
+        with (
+            patch.object(gemini.client.models, "generate_content", fake.generate_content),
+            patch.object(gemini.client.aio.models, "generate_content", fake.generate_content_async),
+            patch.object(vocab_cache, "log_api_usage"),
+            patch.object(supabase, "_request_json", return_value=_USAGE_ROWS),
+        ):
+            elapsed, latencies = asyncio.run(_burst(args, use_async, fake))
+        _report(name, elapsed, fake.peak, latencies)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Token-table build and subtree-walk cost: list of dicts vs TokenTable.
+
+Rebuilds the old list-of-dicts token table and its per-token dependency walk
+here, times them against the array-backed TokenTable and the vectorized
+subtree spans on the golden sentences, reports the memory each table keeps
+alive, and checks both compute the same subtree spans. Needs en_core_web_sm;
+makes no network calls. Run manually:
+
+    cd backend && poetry run python -m benchmarks.bench_postprocess
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+from app.services import gemini, nlp
+from benchmarks.bench_split import _PAGE
+from tests.test_parse_golden import GOLDEN_SENTENCES
+
+
+def _dict_table(doc) -> list[dict]:
+    """The token table as analyze_tokens built it before TokenTable."""
+    return [
+        {
+            "index": token.i,
+            "head_index": token.head.i,
+            "start": token.idx,
+            "end": token.idx + len(token.text),
+            "text": token.text,
+            "lower": token.lower_,
+            "pos": token.pos_,
+            "tag": token.tag_,
+            "dep": token.dep_,
+            "is_root": token.dep_ == "ROOT",
+            "is_finite": token.morph.get("VerbForm") == ["Fin"] or any(
+                child.dep_ in {"aux", "auxpass"}
+                and (child.morph.get("VerbForm") == ["Fin"] or child.tag_ == "MD")
+                for child in token.children
+            ),
+            "has_subject": any(
+                child.dep_ in {"nsubj", "nsubjpass", "csubj", "expl"}
+                for child in token.children
+            ),
+            "has_marker": any(child.dep_ == "mark" for child in token.children),
+        }
+        for token in doc
+        if not token.is_space
+    ]
+
+
+def _dict_spans(tokens: list[dict]) -> list[tuple[int, int, bool]]:
+    """Per-token subtree walk, as _dependency_group_candidates used to do."""
+    children_by_head: dict[int, list[int]] = {}
+    for token in tokens:
+        if not token["is_root"]:
+            children_by_head.setdefault(token["head_index"], []).append(token["index"])
+    spans = []
+    for token in tokens:
+        indices = {token["index"]}
+        pending = [token["index"]]
+        while pending:
+            for child in children_by_head.get(pending.pop(), []):
+                if child not in indices:
+                    indices.add(child)
+                    pending.append(child)
+        start, end = min(indices), max(indices)
+        spans.append((start, end, end - start + 1 == len(indices)))
+    return spans
+
+
+def _table_spans(tokens: nlp.TokenTable) -> list[tuple[int, int, bool]]:
+    starts, ends, projective = gemini._dependency_subtree_spans(tokens)
+    return [(int(s), int(e), bool(p)) for s, e, p in zip(starts, ends, projective)]
+
+
+def _time(fn, docs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _retained(build, docs) -> int:
+    tracemalloc.start()
+    tables = [build(doc) for doc in docs]
+    size, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tables
+    return size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [sentence for _, sentence, _ in GOLDEN_SENTENCES]
+    texts += nlp.split_sentences(_PAGE)
+    docs = [nlp._parse(text) for text in texts]
+    tokens = sum(len(_dict_table(doc)) for doc in docs)
+
+    for doc in docs:
+        if _dict_spans(_dict_table(doc)) != _table_spans(nlp.TokenTable(doc)):
+            raise SystemExit(f"subtree spans differ for {doc.text!r}")
+    print(f"subtree spans match on {len(docs)} sentences ({tokens} tokens)")
+
+    rows = (
+        ("build", _dict_table, nlp.TokenTable),
+        (
+            "build+spans",
+            lambda doc: _dict_spans(_dict_table(doc)),
+            lambda doc: gemini._dependency_subtree_spans(nlp.TokenTable(doc)),
+        ),
+    )
+    for name, legacy, table in rows:
+        before = _time(legacy, docs, args.repeat)
+        after = _time(table, docs, args.repeat)
+        print(
+            f"  {name:<12} dicts {before / len(docs) * 1e6:8.1f} us/sentence  "
+            f"table {after / len(docs) * 1e6:8.1f} us/sentence  x{before / after:.2f}"
+        )
+
+    before = _retained(_dict_table, docs)
+    after = _retained(nlp.TokenTable, docs)
+    print(
+        f"  retained     dicts {before / tokens:8.0f} B/token       "
+        f"table {after / tokens:8.0f} B/token"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-profile latency and output parity for the slim spaCy pipelines.
+
+Times each named profile in app.services.nlp._PIPELINE_PROFILES on the golden
+sentences, then proves the slim profiles change nothing: split_sentences,
+is_complete_sentence and analyze_tokens must return exactly what the full
+pipeline returns. Needs en_core_web_sm; makes no network calls. Run manually:
+
+    cd backend && poetry run python -m benchmarks.bench_profiles
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from unittest.mock import patch
+
+from app.services import nlp
+from benchmarks.bench_split import _PAGE
+from tests.test_parse_golden import GOLDEN_SENTENCES
+
+_FULL_ONLY = {name: () for name in nlp._PIPELINE_PROFILES}
+
+
+def _table_values(table: nlp.TokenTable) -> tuple:
+    """A TokenTable's columns as plain values: the table compares by
+    identity, so two equal parses would otherwise always differ."""
+    columns = (
+        *nlp.TokenTable._INT_COLUMNS,
+        *nlp.TokenTable._BOOL_COLUMNS,
+        *nlp.TokenTable._LABEL_COLUMNS,
+        "head_row",
+    )
+    return tuple(getattr(table, name).tolist() for name in columns) + (table.text, table.lower)
+
+
+def _outputs(sentences: list[str]) -> tuple:
+    nlp.clear_caches()
+    return (
+        nlp.split_sentences(_PAGE),
+        [nlp.split_sentences(sentence) for sentence in sentences],
+        [nlp.is_complete_sentence(sentence) for sentence in sentences],
+        [_table_values(nlp.analyze_tokens(sentence)) for sentence in sentences],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sentences = [sentence for _, sentence, _ in GOLDEN_SENTENCES]
+    model = nlp._get_nlp()
+    print(f"pipeline: {', '.join(model.pipe_names)}")
+
+    for profile in nlp._PIPELINE_PROFILES:
+        nlp._parse(sentences[0], profile)  # warm up before timing
+        best = float("inf")
+        for _ in range(args.repeat):
+            nlp.clear_caches()  # measure parsing, not Doc-cache hits
+            started = time.perf_counter()
+            for sentence in sentences:
+                nlp._parse(sentence, profile)
+            best = min(best, time.perf_counter() - started)
+        skipped = ", ".join(nlp._disabled(profile)) or "-"
+        print(
+            f"  {profile:<7} {best / len(sentences) * 1000:7.2f} ms/sentence  "
+            f"skips: {skipped}"
+        )
+
+    slim = _outputs(sentences)
+    with patch.object(nlp, "_PIPELINE_PROFILES", _FULL_ONLY):
+        full = _outputs(sentences)
+    names = ("split_sentences(page)", "split_sentences", "is_complete_sentence", "analyze_tokens")
+    mismatched = [name for name, a, b in zip(names, slim, full) if a != b]
+    if mismatched:
+        raise SystemExit(f"slim profiles differ from the full pipeline: {', '.join(mismatched)}")
+    print(f"outputs match the full pipeline on {len(sentences)} golden sentences")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Throughput benchmark for split_sentences on long, many-line inputs.
+
+Compares the batched engine (one nlp.pipe stream per article) against the
+previous per-line engine (one nlp() call per line), checks both produce the
+same sentences, and sweeps nlp.pipe batch sizes. Needs en_core_web_sm; makes
+no network calls. Run manually:
+
+    cd backend && poetry run python -m benchmarks.bench_split
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from unittest.mock import patch
+
+from app.services import nlp
+
+# One exam-paper "page": numbered questions with option rows, a passage, and
+# short labels — the shape that made per-line parsing expensive.
+_PAGE = """Reading Comprehension
+The ocean covers more than 70 percent of Earth's surface. Yet more than 80 percent of it remains unexplored.
+Scientists use robots to study the deep sea, where sunlight never reaches.
+113.
+What is the main idea of the passage?
+(A) Robots are cheap (B) The ocean is mostly unexplored
+(C) Sunlight reaches the deep sea (D) Scientists dislike robots
+114. Which word is closest in meaning to "unexplored"? (A) unknown (B) famous (C) crowded (D) dry
+During the Cold War, the U.S. had a tracking station in Seychelles to monitor Russian satellites.
+As a child, he found spelling and reading difficult, but he never allowed those challenges to define him.
+..."""
+
+
+def _split_per_line(text: str) -> list[str]:
+    """split_sentences with the old engine: a separate nlp() call per line."""
+
+    def per_line(texts, profile, batch_size):
+        return (nlp._parse(text, profile) for text in texts)
+
+    with patch.object(nlp, "_parse_many", per_line):
+        return nlp.split_sentences(text)
+
+
+def _time(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        nlp.clear_caches()  # measure parsing, not Doc-cache hits
+        started = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 40])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    nlp._get_nlp()  # exclude model loading from every measurement
+
+    for pages in args.pages:
+        text = "\n".join([_PAGE] * pages)
+        lines = len([line for line in text.splitlines() if line.strip()])
+        nlp.clear_caches()
+        batched_output = nlp.split_sentences(text)
+        nlp.clear_caches()
+        if batched_output != _split_per_line(text):
+            raise SystemExit(f"{pages} page(s): batched output differs from per-line output")
+
+        per_line = _time(_split_per_line, text, args.repeat)
+        batched = _time(nlp.split_sentences, text, args.repeat)
+        print(
+            f"{pages:>3} page(s) {lines:>5} lines  per-line {lines / per_line:8.0f} lines/s  "
+            f"batched {lines / batched:8.0f} lines/s  x{per_line / batched:.2f}"
+        )
+
+    text = "\n".join([_PAGE] * max(args.pages))
+    lines = len([line for line in text.splitlines() if line.strip()])
+    print(f"\nbatch-size sweep ({lines} lines):")
+    for batch_size in args.batch_sizes:
+        with patch.object(nlp, "_SPLIT_BATCH_SIZE", batch_size):
+            elapsed = _time(nlp.split_sentences, text, args.repeat)
+        marker = "  <- current" if batch_size == nlp._SPLIT_BATCH_SIZE else ""
+        print(f"  batch_size={batch_size:<4} {lines / elapsed:8.0f} lines/s{marker}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare structure post-processing with and without the sentence context.
+
+Runs every *_TREE fixture in tests/test_structure.py through
+ai_analyze_structure (Gemini replaced by the fixture, as the tests do) twice:
+once reading node texts from the one sentence parse (nlp.SentenceContext),
+once parsing every node text alone, which is what PARSE_SENTENCE_CONTEXT=0
+does. Reports spaCy runs per mode and any fixture whose output differs, then
+runs tests/test_structure.py under both modes. Needs en_core_web_sm; makes
+no network calls. Run manually:
+
+    cd backend && poetry run python -m benchmarks.compare_parse_context
+"""
+from __future__ import annotations
+
+import copy
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import gemini, nlp
+from tests import test_structure
+
+_FIXTURES = {
+    name: tree
+    for name, tree in vars(test_structure).items()
+    if name.endswith("_TREE") and isinstance(tree, dict)
+}
+
+
+def _analyze(tree: dict) -> tuple[object, int]:
+    """(output or error detail, spaCy runs) for one fixture, from cold caches."""
+    nlp.clear_caches()
+    with patch.object(
+        gemini.client.models,
+        "generate_content",
+        return_value=test_structure._response(copy.deepcopy(tree)),
+    ):
+        try:
+            output = gemini.ai_analyze_structure(tree["text"])[0]
+        except HTTPException as exc:
+            output = f"HTTP {exc.status_code}: {exc.detail}"
+    return output, nlp.cache_stats()["docs"]["misses"]
+
+
+def _failing_tests() -> set[str]:
+    suite = unittest.defaultTestLoader.loadTestsFromModule(test_structure)
+    result = unittest.TestResult()
+    suite.run(result)
+    return {str(test) for test, _ in result.failures + result.errors}
+
+
+def main() -> None:
+    differing = []
+    parses = {True: 0, False: 0}
+    for name, tree in _FIXTURES.items():
+        outputs = {}
+        for enabled in (True, False):
+            with patch.object(settings, "parse_sentence_context", enabled):
+                outputs[enabled], runs = _analyze(tree)
+            parses[enabled] += runs
+        if outputs[True] != outputs[False]:
+            differing.append(name)
+
+    print(
+        f"{len(_FIXTURES)} fixtures: {parses[True]} spaCy runs with the sentence "
+        f"context, {parses[False]} parsing node texts alone"
+    )
+    print(f"outputs differ: {', '.join(differing) or 'none'}")
+
+    failing = {}
+    for enabled in (True, False):
+        with patch.object(settings, "parse_sentence_context", enabled):
+            failing[enabled] = _failing_tests()
+    print(f"test_structure.py failures with the context only: {sorted(failing[True] - failing[False]) or 'none'}")
+    print(f"test_structure.py failures without it only: {sorted(failing[False] - failing[True]) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
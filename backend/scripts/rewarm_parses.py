@@ -0,0 +1,93 @@
+"""Re-warm sentence_parses for the current PARSE_PROMPT_VERSION before a deploy.
+
+Ranks the sentences in every user's saved sessions by how many times they
+were saved (a shared article forked by a class counts once per copy), skips
+those that already have a current-version row and analyzes the top --limit
+of the rest with Gemini, at most --rpm a minute. Run it from the commit that
+bumps PARSE_PROMPT_VERSION, against the production .env, so the new version's
+rows exist when the deploy goes live; PARSE_STALE_FALLBACK covers the rest.
+Needs the spaCy model and the backend .env (Gemini and Supabase keys):
+
+    cd backend && poetry run python -m scripts.rewarm_parses --limit 500 --dry-run
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.services.gemini import PARSE_PROMPT_VERSION
+from app.services.structure import parse_key, refresh_structure
+from app.services.supabase import get_cached_parses, list_saved_sentences
+
+# Rows per session_sentences page and hashes per sentence_parses lookup
+# (keeps the in.(...) filter URL short).
+_PAGE = 1000
+_LOOKUP_BATCH = 100
+
+
+def _most_saved(scan: int) -> list[tuple[tuple[str, str], int]]:
+    """((normalized sentence, sentence_hash), times saved), most saved first,
+    over at most `scan` saved sentences."""
+    counts: Counter[tuple[str, str]] = Counter()
+    for offset in range(0, scan, _PAGE):
+        page = list_saved_sentences(min(_PAGE, scan - offset), offset)
+        counts.update(key for key in map(parse_key, page) if key[0])
+        if len(page) < _PAGE:
+            break
+    return counts.most_common()
+
+
+def _missing(ranked: list[tuple[tuple[str, str], int]], limit: int) -> list[tuple[tuple[str, str], int]]:
+    """The first `limit` of `ranked` without a current-version row."""
+    missing = []
+    for start in range(0, len(ranked), _LOOKUP_BATCH):
+        batch = ranked[start : start + _LOOKUP_BATCH]
+        stored = get_cached_parses([sentence_hash for (_, sentence_hash), _ in batch], PARSE_PROMPT_VERSION)
+        missing.extend(item for item in batch if item[0][1] not in stored)
+        if len(missing) >= limit:
+            break
+    return missing[:limit]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--limit", type=int, default=200, help="sentences to analyze at most")
+    parser.add_argument("--scan", type=int, default=50000, help="saved sentences to rank at most")
+    parser.add_argument("--rpm", type=int, default=30, help="analyses started per minute (0 = no limit)")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be analyzed and stop")
+    args = parser.parse_args()
+
+    ranked = _most_saved(args.scan)
+    todo = _missing(ranked, args.limit)
+    print(f"prompt version {PARSE_PROMPT_VERSION}: {len(ranked)} distinct saved sentences, {len(todo)} to analyze")
+    if args.dry_run:
+        for (sentence, _), saved in todo:
+            print(f"  {saved:5d}  {sentence[:100]}")
+        return
+
+    done = skipped = failed = 0
+    tokens: Counter[str] = Counter()
+    for index, ((sentence, _), _) in enumerate(todo, 1):
+        started = time.monotonic()
+        try:
+            tokens.update(refresh_structure(sentence))
+            done += 1
+        except HTTPException as e:
+            if e.status_code == 422:
+                skipped += 1
+            else:
+                failed += 1
+                print(f"  failed ({e.status_code}): {sentence[:80]} - {e.detail}")
+        if index % 10 == 0:
+            print(f"  {index}/{len(todo)}")
+        if args.rpm and index < len(todo):
+            time.sleep(max(0.0, 60 / args.rpm - (time.monotonic() - started)))
+
+    print(f"analyzed {done}, incomplete {skipped}, failed {failed}; tokens {dict(tokens)}")
+
+
+if __name__ == "__main__":
+    main()
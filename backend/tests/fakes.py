@@ -1,3 +1,8 @@
+from types import SimpleNamespace
+
+from google.genai import errors
+
+
 class FakeRequestJson:
     """Replaces supabase._request_json. Matches each call against a queue of
     (method, url_substring, response) rules, consuming the first hit so the
@@ -14,3 +19,72 @@ class FakeRequestJson:
                 self.rules.pop(i)
                 return response
         raise AssertionError(f"Unexpected request: {method} {url}")
+
+
+class FakeGeminiClient:
+    """Local stand-in for genai.Client covering generate_content and explicit
+    context caches, sync and under .aio. Every request is recorded; answers
+    come from `answer(contents)`. A request naming an unknown cached_content
+    fails the way Gemini does, with a 404 ClientError. Token counts are one
+    per four characters, cached ones reported as cached_content_token_count."""
+
+    def __init__(self, answer, create_error=None):
+        self.answer = answer
+        self.create_error = create_error
+        self.requests = []
+        self.caches_created = []
+        self.cache_updates = []
+        self.caches_deleted = []
+        self.live_caches = {}
+        self.models = SimpleNamespace(generate_content=self._generate)
+        self.caches = SimpleNamespace(create=self._create, update=self._update, delete=self._delete)
+
+        async def generate(**kwargs):
+            return self._generate(**kwargs)
+
+        async def create(**kwargs):
+            return self._create(**kwargs)
+
+        async def update(**kwargs):
+            return self._update(**kwargs)
+
+        async def delete(**kwargs):
+            return self._delete(**kwargs)
+
+        self.aio = SimpleNamespace(
+            models=SimpleNamespace(generate_content=generate),
+            caches=SimpleNamespace(create=create, update=update, delete=delete),
+        )
+
+    def _generate(self, *, model, contents, config):
+        self.requests.append({"model": model, "contents": contents, "config": config})
+        cached = ""
+        name = config.get("cached_content")
+        if name is not None:
+            if name not in self.live_caches:
+                raise errors.ClientError(404, {"error": {"code": 404, "message": f"{name} not found"}})
+            cached = self.live_caches[name]
+        prompt_tokens = (len(cached) + len(contents)) // 4
+        usage = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            cached_content_token_count=len(cached) // 4 or None,
+            candidates_token_count=10,
+            total_token_count=prompt_tokens + 10,
+        )
+        return SimpleNamespace(text=self.answer(contents), usage_metadata=usage)
+
+    def _create(self, *, model, config):
+        if self.create_error is not None:
+            raise self.create_error
+        name = f"cachedContents/{len(self.caches_created)}"
+        self.caches_created.append({"model": model, "config": config})
+        self.live_caches[name] = "".join(config.contents)
+        return SimpleNamespace(name=name)
+
+    def _update(self, *, name, config):
+        self.cache_updates.append(name)
+        return SimpleNamespace(name=name)
+
+    def _delete(self, *, name):
+        self.caches_deleted.append(name)
+        self.live_caches.pop(name, None)
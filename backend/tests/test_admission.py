@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import admission
+
+MODEL = settings.gemini_basic_model
+
+
+def _limits(concurrency=1, rpm=0, timeout=5.0):
+    return patch.multiple(
+        settings,
+        gemini_basic_max_concurrency=concurrency,
+        gemini_basic_rpm=rpm,
+        gemini_queue_timeout=timeout,
+        gemini_background_queue_timeout=timeout,
+    )
+
+
+class AdmissionControllerTests(unittest.TestCase):
+    def test_threads_never_exceed_the_concurrency_cap(self):
+        controller = admission.AdmissionController()
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def call():
+            with controller.admit(MODEL):
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.01)
+                with lock:
+                    active.pop()
+
+        with _limits(concurrency=2), ThreadPoolExecutor(max_workers=6) as pool:
+            for future in [pool.submit(call) for _ in range(6)]:
+                future.result()
+
+        self.assertLessEqual(max(peak), 2)
+        stats = controller.stats()[MODEL]
+        self.assertEqual((stats["admitted"], stats["in_flight"]), (6, 0))
+
+    def test_interactive_calls_jump_queued_background_calls(self):
+        controller = admission.AdmissionController()
+        order = []
+
+        async def call(name, priority):
+            with admission.priority(priority):
+                async with controller.admit_async(MODEL):
+                    order.append(name)
+                    await asyncio.sleep(0.01)
+
+        async def run():
+            first = asyncio.ensure_future(call("first", "interactive"))
+            await asyncio.sleep(0)
+            background = asyncio.ensure_future(call("quiz", "background"))
+            await asyncio.sleep(0)
+            interactive = asyncio.ensure_future(call("vocab", "interactive"))
+            await asyncio.sleep(0)
+            queued = controller.stats()[MODEL]["queued"]
+            await asyncio.gather(first, background, interactive)
+            return queued
+
+        with _limits(concurrency=1):
+            queued = asyncio.run(run())
+
+        self.assertEqual(queued, {"interactive": 1, "background": 1})
+        self.assertEqual(order, ["first", "vocab", "quiz"])
+
+    def test_queue_timeout_is_a_503_and_leaves_the_queue(self):
+        controller = admission.AdmissionController()
+
+        async def run():
+            async with controller.admit_async(MODEL):
+                async with controller.admit_async(MODEL):
+                    pass
+
+        with _limits(concurrency=1, timeout=0.02), self.assertRaises(HTTPException) as raised:
+            asyncio.run(run())
+
+        self.assertEqual(raised.exception.status_code, 503)
+        stats = controller.stats()[MODEL]
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["queued"], {"interactive": 0, "background": 0})
+
+    def test_requests_per_minute_budget_is_enforced(self):
+        controller = admission.AdmissionController()
+        with _limits(concurrency=0, rpm=2, timeout=0.02):
+            for _ in range(2):
+                with controller.admit(MODEL):
+                    pass
+            with self.assertRaises(HTTPException), controller.admit(MODEL):
+                pass
+
+        self.assertEqual(controller.stats()[MODEL]["admitted"], 2)
+
+    def test_no_limits_means_no_gate(self):
+        controller = admission.AdmissionController()
+        with _limits(concurrency=0, rpm=0), controller.admit(MODEL):
+            self.assertEqual(controller.stats()[MODEL]["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
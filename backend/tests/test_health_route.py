@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch
+
+import spacy
+from fastapi import Response
+
+from app.routes.test import health_check
+from app.services import nlp
+
+
+class HealthRouteTests(unittest.TestCase):
+    def setUp(self):
+        state = {"status": "pending", "phases": {}, "error": None}
+        patcher = patch.object(nlp, "_warm_up_state", state)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_not_ready_before_warm_up(self):
+        response = Response()
+        body = health_check(response)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(body["status"], "starting")
+        self.assertEqual(body["spacy"]["status"], "pending")
+
+    def test_ready_after_warm_up_with_phase_timings(self):
+        with patch.object(nlp, "_get_nlp", return_value=spacy.blank("en")):
+            nlp.warm_up()
+        response = Response()
+        body = health_check(response)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body["status"], "ok")
+        phases = body["spacy"]["phases"]
+        self.assertIn("load", phases)
+        self.assertIn("total", phases)
+        self.assertEqual(
+            {name for name in phases if name.startswith("parse:")},
+            {f"parse:{profile}" for profile in nlp._PIPELINE_PROFILES},
+        )
+
+    def test_failed_warm_up_stays_unhealthy(self):
+        with (
+            patch.object(nlp, "_get_nlp", side_effect=OSError("model missing")),
+            self.assertLogs("app.services.nlp", level="ERROR"),
+        ):
+            nlp.warm_up()
+        response = Response()
+        body = health_check(response)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(body["status"], "error")
+        self.assertEqual(body["spacy"]["error"], "model missing")
+
+
+if __name__ == "__main__":
+    unittest.main()
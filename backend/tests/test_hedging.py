@@ -0,0 +1,194 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.models.vocab import VocabLookupRequest, VocabOptions
+from app.services import vocab_cache
+from app.services.hedging import Hedger, LatencyTracker
+
+USER_ID = "user-1"
+USAGE = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+
+
+def _warm(hedger, seconds=0.01, samples=20):
+    for _ in range(samples):
+        hedger.tracker.record(seconds)
+
+
+class LatencyTrackerTests(unittest.TestCase):
+    def test_percentile_waits_for_enough_samples(self):
+        tracker = LatencyTracker(window=10, min_samples=3)
+        tracker.record(1.0)
+        tracker.record(2.0)
+        self.assertIsNone(tracker.percentile(50))
+        tracker.record(3.0)
+        self.assertEqual(tracker.percentile(50), 2.0)
+        self.assertEqual(tracker.percentile(100), 3.0)
+
+    def test_window_adapts_to_recent_latency(self):
+        tracker = LatencyTracker(window=4, min_samples=1)
+        for seconds in [5.0, 5.0, 5.0, 5.0, 0.1, 0.1, 0.1, 0.1]:
+            tracker.record(seconds)
+        self.assertEqual(tracker.percentile(95), 0.1)
+
+
+class HedgerTests(unittest.TestCase):
+    def test_fast_call_is_not_hedged(self):
+        hedger = Hedger(percentile=95, min_delay=0.05)
+        _warm(hedger)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            return "answer"
+
+        self.assertEqual(asyncio.run(hedger.run(call, on_late=calls.append)), "answer")
+        self.assertEqual((len(calls), hedger.hedged), (1, 0))
+
+    def test_slow_call_is_hedged_and_the_loser_handed_over(self):
+        hedger = Hedger(percentile=95, min_delay=0.01)
+        _warm(hedger)
+        delays = [0.2, 0.0]
+        late = []
+
+        async def call():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return f"slept {delay}"
+
+        async def run():
+            result = await hedger.run(call, on_late=late.append)
+            await asyncio.sleep(0.3)
+            return result
+
+        self.assertEqual(asyncio.run(run()), "slept 0.0")
+        self.assertEqual(late, ["slept 0.2"])
+        self.assertEqual((hedger.hedged, hedger.hedge_wins), (1, 1))
+
+    def test_failed_hedge_leaves_the_first_call_to_win(self):
+        hedger = Hedger(percentile=95, min_delay=0.01)
+        _warm(hedger)
+        attempts = []
+
+        async def call():
+            attempts.append(1)
+            if len(attempts) == 2:
+                raise RuntimeError("hedge failed")
+            await asyncio.sleep(0.05)
+            return "first"
+
+        self.assertEqual(asyncio.run(hedger.run(call, on_late=attempts.append)), "first")
+        self.assertEqual(hedger.hedge_wins, 0)
+
+    def test_cancelled_run_hands_both_calls_over(self):
+        hedger = Hedger(percentile=95, min_delay=0.01)
+        _warm(hedger)
+        delays = [0.1, 0.05]
+        late = []
+
+        async def call():
+            delay = delays.pop(0)
+            await asyncio.sleep(delay)
+            return f"slept {delay}"
+
+        async def run():
+            task = asyncio.ensure_future(hedger.run(call, on_late=late.append))
+            await asyncio.sleep(0.03)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        self.assertEqual(sorted(late), ["slept 0.05", "slept 0.1"])
+
+    def test_cold_tracker_or_no_on_late_never_hedges(self):
+        hedger = Hedger(percentile=95, min_delay=0.0)
+        calls = []
+
+        async def call():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        asyncio.run(hedger.run(call, on_late=calls.append))
+        _warm(hedger, seconds=0.001)
+        asyncio.run(hedger.run(call, on_late=None))
+        self.assertEqual((len(calls), hedger.hedged), (2, 0))
+        self.assertEqual(hedger.tracker.stats()["samples"], 22)
+
+
+class HedgedVocabLookupTests(unittest.TestCase):
+    def setUp(self):
+        vocab_cache.LOOKUP_CACHE.clear()
+
+    def test_both_hedged_lookups_are_billed(self):
+        hedger = Hedger(percentile=95, min_delay=0.01)
+        _warm(hedger)
+        delays = [0.2, 0.0]
+
+        async def lookup(selected_text, sentence, missing):
+            await asyncio.sleep(delays.pop(0))
+            return {"translation": "蘋果"}, USAGE
+
+        async def run():
+            request = VocabLookupRequest(
+                selected_text="apple",
+                sentence="An apple.",
+                sentence_id=0,
+                word_index=1,
+                options=VocabOptions(translation=True),
+            )
+            response = await vocab_cache.get_vocab_lookup_async(request, USER_ID)
+            await asyncio.sleep(0.3)
+            return response
+
+        with (
+            patch.object(settings, "vocab_hedge", True),
+            patch.object(vocab_cache, "_HEDGER", hedger),
+            patch.object(vocab_cache, "ai_lookup_word_async", side_effect=lookup),
+            patch.object(vocab_cache, "log_api_usage") as log,
+        ):
+            response = asyncio.run(run())
+
+        self.assertEqual(response.translation, "蘋果")
+        self.assertEqual(log.call_count, 2)
+        for call in log.call_args_list:
+            self.assertEqual(call.args, (USER_ID, "vocab_lookup", settings.gemini_basic_model, USAGE))
+
+    def test_cancelled_caller_still_bills_both_hedged_lookups(self):
+        hedger = Hedger(percentile=95, min_delay=0.01)
+        _warm(hedger)
+        delays = [0.1, 0.05]
+
+        async def lookup(selected_text, sentence, missing):
+            await asyncio.sleep(delays.pop(0))
+            return {"translation": "蘋果"}, USAGE
+
+        async def run():
+            request = VocabLookupRequest(
+                selected_text="apple",
+                sentence="An apple.",
+                sentence_id=0,
+                word_index=1,
+                options=VocabOptions(translation=True),
+            )
+            task = asyncio.ensure_future(vocab_cache.get_vocab_lookup_async(request, USER_ID))
+            await asyncio.sleep(0.03)
+            task.cancel()
+            await asyncio.sleep(0.3)
+
+        with (
+            patch.object(settings, "vocab_hedge", True),
+            patch.object(vocab_cache, "_HEDGER", hedger),
+            patch.object(vocab_cache, "ai_lookup_word_async", side_effect=lookup),
+            patch.object(vocab_cache, "log_api_usage") as log,
+        ):
+            asyncio.run(run())
+
+        self.assertEqual(log.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from app.services.lru import LRUCache, approx_size
+
+
+class LRUCacheTests(unittest.TestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")  # "b" is now the least recently used
+        cache.put("c", 3)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_counters_track_hits_and_misses(self):
+        cache = LRUCache(max_entries=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("missing")
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_clear_resets_entries_and_counters(self):
+        cache = LRUCache(max_entries=4)
+        cache.put("a", 1)
+        cache.get("a")
+        cache.clear()
+
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_byte_bound_evicts_least_recently_used_entries(self):
+        cache = LRUCache(max_bytes=100, sizeof=len)
+        cache.put("a", "x" * 40)
+        cache.put("b", "x" * 40)
+        cache.get("a")
+        cache.put("c", "x" * 40)
+
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        stats = cache.stats()
+        self.assertEqual((stats["bytes"], stats["max_bytes"], stats["evictions"]), (80, 100, 1))
+
+    def test_replacing_an_entry_updates_its_size(self):
+        cache = LRUCache(max_bytes=100, sizeof=len)
+        cache.put("a", "x" * 40)
+        cache.put("a", "x" * 10)
+
+        self.assertEqual(cache.stats()["bytes"], 10)
+
+    def test_oversized_entry_is_kept_alone(self):
+        cache = LRUCache(max_bytes=10, sizeof=len)
+        cache.put("a", "x" * 5)
+        cache.put("b", "x" * 50)
+
+        self.assertEqual([key for key, _, _ in cache.recent(5)], ["b"])
+
+    def test_recent_lists_most_recent_first_without_counting(self):
+        cache = LRUCache(max_entries=4)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+
+        self.assertEqual([key for key, _, _ in cache.recent(5)], ["a", "b"])
+        self.assertEqual(cache.stats()["hits"], 1)
+
+    def test_approx_size_grows_with_nesting(self):
+        leaf = {"text": "books", "role": "O"}
+        self.assertGreater(approx_size({"children": [leaf, leaf]}), approx_size(leaf) * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.routes import admin as admin_route
+from app.services import gemini, metrics
+from app.services.metrics import GeminiMetrics
+
+MODEL = settings.gemini_basic_model
+
+
+def _response(payload, prompt_tokens=5):
+    usage = SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=2,
+        total_token_count=prompt_tokens + 2,
+        cached_content_token_count=None,
+    )
+    return SimpleNamespace(text=json.dumps(payload), usage_metadata=usage)
+
+
+class GeminiMetricsTests(unittest.TestCase):
+    def test_calls_fill_latency_buckets_and_tokens(self):
+        recorder = GeminiMetrics()
+        recorder.record_call("ocr", MODEL, 0.05, {"prompt_tokens": 3, "total_tokens": 4}, None)
+        recorder.record_call("ocr", MODEL, 3.0, {"prompt_tokens": 1, "total_tokens": 2}, None)
+        recorder.record_call("ocr", MODEL, 60.0, None, TimeoutError())
+
+        series = recorder.snapshot()["ocr"][MODEL]
+        self.assertEqual(series["calls"], 3)
+        self.assertEqual(series["errors"], {"TimeoutError": 1})
+        buckets = series["latency"]["buckets"]
+        self.assertEqual((buckets["<=100ms"], buckets["<=5000ms"], buckets[">30000ms"]), (1, 1, 1))
+        self.assertEqual(series["tokens"], {"prompt_tokens": 4, "total_tokens": 6})
+        self.assertEqual(series["latency"]["max_ms"], 60000.0)
+
+
+class DriverInstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.recorder = GeminiMetrics()
+        patcher = patch.object(metrics, "gemini", self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_translation_repair_records_attempts_and_reason(self):
+        with patch.object(
+            gemini.client.models,
+            "generate_content",
+            side_effect=[_response({"0": "一"}), _response({"1": "二"}, prompt_tokens=3)],
+        ):
+            translations, _ = gemini._translate_chunk(["One.", "Two."], "zh-TW", "normal")
+
+        self.assertEqual(translations, ["一", "二"])
+        series = self.recorder.snapshot()["translate"][MODEL]
+        self.assertEqual(series["calls"], 2)
+        self.assertEqual(series["attempts"], {2: 1})
+        self.assertEqual(series["failures"], {"missing_items": 1})
+        self.assertEqual(series["tokens"]["prompt_tokens"], 8)
+
+    def test_async_request_error_is_counted_by_type(self):
+        async def fail(**kwargs):
+            raise ConnectionError("reset")
+
+        with (
+            patch.object(gemini.client.aio.models, "generate_content", side_effect=fail),
+            self.assertRaises(Exception),
+        ):
+            asyncio.run(gemini.ai_ocr_image_async(b"img", "image/png"))
+
+        series = self.recorder.snapshot()["ocr"][MODEL]
+        self.assertEqual(series["errors"], {"ConnectionError": 1})
+        self.assertEqual(series["attempts"], {1: 1})
+
+    def test_invalid_quiz_answer_is_a_validation_failure(self):
+        with patch.object(gemini.client.models, "generate_content", return_value=_response("x")):
+            with self.assertRaises(Exception):
+                gemini.ai_generate_quiz("An article.")
+
+        series = self.recorder.snapshot()["quiz"][MODEL]
+        self.assertEqual(series["failures"], {"validation": 2})
+        self.assertEqual(series["attempts"], {2: 1})
+
+    def test_structure_rejections_are_counted_by_reason(self):
+        tree = {"text": "She reads.", "role": "ROOT", "type": "word", "label": "主詞"}
+        answers = [_response({"nope": 1}), _response(tree), _response(tree)]
+        with patch.object(gemini.client.models, "generate_content", side_effect=answers):
+            with self.assertRaises(Exception):
+                gemini.ai_analyze_structure("A different sentence.")
+
+        series = self.recorder.snapshot()["parse"][settings.gemini_adv_model]
+        self.assertEqual(series["failures"], {"validation": 1, "reconstruction": 2})
+        self.assertEqual(series["attempts"], {gemini._STRUCTURE_ATTEMPTS: 1})
+
+
+class AdminMetricsRouteTests(unittest.TestCase):
+    def test_metrics_expose_every_counter_group(self):
+        recorder = GeminiMetrics()
+        recorder.record_degraded("parse", settings.gemini_adv_model)
+
+        with patch.object(metrics, "gemini", recorder):
+            body = asyncio.run(admin_route.get_metrics(_admin={"id": "admin-1"}))
+
+        self.assertEqual(body["gemini"]["parse"][settings.gemini_adv_model]["degraded"], 1)
+        self.assertEqual(
+            set(body),
+            {
+                "gemini",
+                "admission",
+                "single_flight",
+                "vocab_hedging",
+                "prompt_cache",
+                "spacy_caches",
+                "structure_cache",
+                "structure_failures",
+                "structure_revalidation",
+                "study_pack",
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
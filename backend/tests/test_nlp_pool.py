@@ -0,0 +1,57 @@
+import os
+import pickle
+import threading
+import unittest
+from unittest.mock import patch
+
+import spacy
+from fastapi import HTTPException
+from spacy.tokens import Doc
+
+from app.core.config import settings
+from app.services import nlp, nlp_pool
+
+
+class OffloadTests(unittest.TestCase):
+    def test_disabled_pool_runs_in_process(self):
+        with patch.object(settings, "spacy_workers", 0):
+            self.assertEqual(nlp_pool.offload(os.getpid), os.getpid())
+
+    def test_full_queue_is_rejected_with_503(self):
+        with (
+            patch.object(settings, "spacy_workers", 2),
+            patch.object(settings, "spacy_queue_timeout", 0),
+            patch.object(nlp_pool, "_slots", threading.BoundedSemaphore(1)) as slots,
+            patch.object(nlp_pool, "_get_pool") as get_pool,
+            self.assertLogs("app.services.nlp_pool", level="WARNING"),
+        ):
+            slots.acquire()
+            with self.assertRaises(HTTPException) as ctx:
+                nlp_pool.offload(os.getpid)
+
+        self.assertEqual(ctx.exception.status_code, 503)
+        get_pool.assert_not_called()
+
+
+class TokenTablePickleTests(unittest.TestCase):
+    def test_labels_survive_without_the_string_store(self):
+        doc = Doc(
+            spacy.blank("en").vocab,
+            words=["She", "reads", "."],
+            heads=[1, 1, 1],
+            deps=["nsubj", "ROOT", "punct"],
+            pos=["PRON", "VERB", "PUNCT"],
+            tags=["PRP", "VBZ", "."],
+        )
+        table = nlp.TokenTable(doc)
+
+        restored = pickle.loads(pickle.dumps(table))
+
+        self.assertIsInstance(restored._strings, dict)
+        self.assertEqual([row["dep"] for row in restored], ["nsubj", "ROOT", "punct"])
+        self.assertEqual([row["tag"] for row in restored], ["PRP", "VBZ", "."])
+        self.assertTrue(restored.has_dep({"nsubj"}).any())
+
+
+if __name__ == "__main__":
+    unittest.main()
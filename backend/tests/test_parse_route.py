@@ -1,10 +1,11 @@
+import asyncio
 import unittest
 from unittest.mock import patch
 
 from fastapi import HTTPException
 
 from app.routes import parse as parse_route
-from app.models.parse import ParseRequest
+from app.models.parse import ParseBatchRequest, ParseRequest
 
 USER = {"id": "user-1"}
 USAGE = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
@@ -26,11 +27,11 @@ STRUCTURE = {
 
 class ParseRouteTests(unittest.TestCase):
     def _call(self, sentence="She reads books."):
-        return parse_route.parse(ParseRequest(sentence=sentence), user=USER)
+        return asyncio.run(parse_route.parse(ParseRequest(sentence=sentence), user=USER))
 
     def test_fresh_analysis_logs_usage(self):
         with (
-            patch.object(parse_route, "get_structure", return_value=(STRUCTURE, USAGE)),
+            patch.object(parse_route, "get_structure_async", return_value=(STRUCTURE, USAGE)),
             patch.object(parse_route, "log_api_usage") as log,
         ):
             res = self._call()
@@ -43,7 +44,7 @@ class ParseRouteTests(unittest.TestCase):
 
     def test_cache_hit_does_not_log_usage(self):
         with (
-            patch.object(parse_route, "get_structure", return_value=(STRUCTURE, None)),
+            patch.object(parse_route, "get_structure_async", return_value=(STRUCTURE, None)),
             patch.object(parse_route, "log_api_usage") as log,
         ):
             res = self._call()
@@ -55,7 +56,7 @@ class ParseRouteTests(unittest.TestCase):
         with (
             patch.object(
                 parse_route,
-                "get_structure",
+                "get_structure_async",
                 side_effect=HTTPException(422, "分析句構只適用於完整的句子"),
             ),
             patch.object(parse_route, "log_api_usage") as log,
@@ -68,7 +69,7 @@ class ParseRouteTests(unittest.TestCase):
 
     def test_ai_failure_propagates(self):
         with (
-            patch.object(parse_route, "get_structure", side_effect=HTTPException(502, "boom")),
+            patch.object(parse_route, "get_structure_async", side_effect=HTTPException(502, "boom")),
             patch.object(parse_route, "log_api_usage") as log,
         ):
             with self.assertRaises(HTTPException) as raised:
@@ -78,5 +79,35 @@ class ParseRouteTests(unittest.TestCase):
         log.assert_not_called()
 
 
+class ParseBatchRouteTests(unittest.TestCase):
+    def test_results_and_errors_in_order_with_usage_logged_once(self):
+        outcomes = [(STRUCTURE, None), (None, HTTPException(422, "分析句構只適用於完整的句子"))]
+        with (
+            patch.object(parse_route, "get_structures_async", return_value=(outcomes, USAGE)),
+            patch.object(parse_route, "log_api_usage") as log,
+        ):
+            res = asyncio.run(
+                parse_route.parse_batch(
+                    ParseBatchRequest(sentences=["She reads books.", "In the morning."]), user=USER
+                )
+            )
+
+        log.assert_called_once()
+        self.assertEqual(log.call_args.args[3], USAGE)
+        first, second = res.results
+        self.assertEqual((first.structure.pattern, first.sentence_type), ("SVO", "simple"))
+        self.assertEqual((second.status_code, second.error), (422, "分析句構只適用於完整的句子"))
+        self.assertIsNone(second.structure)
+
+    def test_all_cached_batch_logs_nothing(self):
+        with (
+            patch.object(parse_route, "get_structures_async", return_value=([(STRUCTURE, None)], None)),
+            patch.object(parse_route, "log_api_usage") as log,
+        ):
+            asyncio.run(parse_route.parse_batch(ParseBatchRequest(sentences=["x"]), user=USER))
+
+        log.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+from google.genai import errors
+
+from app.core.config import settings
+from app.services import gemini
+from app.services.prompt_cache import CachedPrefix
+from tests.fakes import FakeGeminiClient
+
+SENTENCE = "She reads books."
+TREE = {
+    "text": SENTENCE,
+    "role": "ROOT",
+    "type": "clause",
+    "label": "主要子句",
+    "pattern": "SVO",
+    "children": [
+        {"text": "She", "role": "S", "type": "word", "label": "主詞"},
+        {"text": "reads", "role": "V", "type": "word", "label": "動詞"},
+        {"text": "books", "role": "O", "type": "word", "label": "受詞"},
+        {"text": ".", "role": "PUNCT", "type": "word", "label": "標點"},
+    ],
+}
+
+
+class StructurePromptCacheTests(unittest.TestCase):
+    def _analyze(self, client, enabled=True, runs=1, use_async=False):
+        cache = CachedPrefix("structure-prompt-test", gemini._STRUCTURE_PROMPT)
+        with (
+            patch.object(settings, "gemini_prompt_cache", enabled),
+            patch.object(gemini, "client", client),
+            patch.object(gemini, "_STRUCTURE_PROMPT_CACHE", cache),
+        ):
+            for _ in range(runs):
+                if use_async:
+                    result = asyncio.run(gemini.ai_analyze_structure_async(SENTENCE))
+                else:
+                    result = gemini.ai_analyze_structure(SENTENCE)
+        return result, cache
+
+    def test_cached_prompt_sends_only_the_sentence(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+
+        (tree, usage), cache = self._analyze(client, runs=2)
+
+        self.assertEqual(tree["pattern"], "SVO")
+        self.assertEqual(len(client.caches_created), 1)
+        self.assertEqual(client.caches_created[0]["config"].contents, [gemini._STRUCTURE_PROMPT])
+        self.assertEqual([r["contents"] for r in client.requests], [SENTENCE, SENTENCE])
+        self.assertEqual(client.requests[0]["config"]["cached_content"], "cachedContents/0")
+        self.assertEqual(usage["cached_prompt_tokens"], len(gemini._STRUCTURE_PROMPT) // 4)
+        self.assertGreater(usage["prompt_tokens"], usage["cached_prompt_tokens"])
+
+    def test_async_variant_uses_the_cache_too(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+
+        (_, usage), _ = self._analyze(client, use_async=True)
+
+        self.assertEqual(len(client.caches_created), 1)
+        self.assertEqual(client.requests[0]["contents"], SENTENCE)
+        self.assertIn("cached_prompt_tokens", usage)
+
+    def test_disabled_cache_sends_the_prompt_inline(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+
+        (_, usage), _ = self._analyze(client, enabled=False)
+
+        self.assertEqual(client.caches_created, [])
+        self.assertEqual(client.requests[0]["contents"], gemini._STRUCTURE_PROMPT + SENTENCE)
+        self.assertNotIn("cached_content", client.requests[0]["config"])
+        self.assertNotIn("cached_prompt_tokens", usage)
+
+    def test_unavailable_cache_falls_back_inline_and_backs_off(self):
+        client = FakeGeminiClient(
+            lambda contents: json.dumps(TREE), create_error=RuntimeError("caching not supported")
+        )
+
+        (tree, usage), cache = self._analyze(client, runs=2)
+
+        self.assertEqual(tree["pattern"], "SVO")
+        self.assertEqual(cache.failures, 1)
+        self.assertEqual(
+            [r["contents"] for r in client.requests], [gemini._STRUCTURE_PROMPT + SENTENCE] * 2
+        )
+        self.assertNotIn("cached_prompt_tokens", usage)
+
+    def test_rejected_handle_is_dropped_and_the_attempt_resent_inline(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+        real_create = client.caches.create
+
+        def create_then_expire(**kwargs):
+            cached = real_create(**kwargs)
+            client.live_caches.clear()
+            return cached
+
+        client.caches.create = create_then_expire
+
+        (tree, usage), cache = self._analyze(client)
+
+        self.assertEqual(tree["pattern"], "SVO")
+        self.assertEqual(
+            [r["contents"] for r in client.requests], [SENTENCE, gemini._STRUCTURE_PROMPT + SENTENCE]
+        )
+        self.assertFalse(cache.stats()["live"])
+        self.assertNotIn("cached_prompt_tokens", usage)
+
+    def test_rejected_handle_is_deleted_before_a_new_one_is_created(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+        cache = CachedPrefix("structure-prompt-test", gemini._STRUCTURE_PROMPT)
+
+        with patch.object(settings, "gemini_prompt_cache", True):
+            name = cache.ensure(client, settings.gemini_adv_model)
+            cache.invalidate(name)
+            fresh = cache.ensure(client, settings.gemini_adv_model)
+
+        self.assertEqual(client.caches_deleted, [name])
+        self.assertNotEqual(fresh, name)
+        self.assertEqual(cache.created, 2)
+
+    def test_rate_limit_on_a_cached_request_is_not_a_rejected_handle(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+
+        def rate_limited(**kwargs):
+            client.requests.append(kwargs)
+            raise errors.ClientError(429, {"error": {"code": 429, "message": "RESOURCE_EXHAUSTED"}})
+
+        client.models.generate_content = rate_limited
+
+        with self.assertRaises(HTTPException):
+            _, cache = self._analyze(client)
+
+        # One cached request, no inline resend, the handle kept.
+        self.assertEqual([r["contents"] for r in client.requests], [SENTENCE])
+        self.assertEqual(client.caches_deleted, [])
+        self.assertEqual(len(client.caches_created), 1)
+
+    def test_handle_near_expiry_is_extended(self):
+        client = FakeGeminiClient(lambda contents: json.dumps(TREE))
+        cache = CachedPrefix("structure-prompt-test", gemini._STRUCTURE_PROMPT)
+
+        with patch.object(settings, "gemini_prompt_cache", True):
+            name = cache.ensure(client, settings.gemini_adv_model)
+            cache._expires = time.monotonic() + 1
+            self.assertEqual(cache.ensure(client, settings.gemini_adv_model), name)
+
+        self.assertEqual(client.cache_updates, [name])
+        self.assertEqual((cache.created, cache.refreshed), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
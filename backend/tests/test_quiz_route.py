@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 from unittest.mock import patch
 
@@ -39,16 +40,18 @@ SESSION_DETAIL = {
 
 class QuizGenerateTests(unittest.TestCase):
     def _call(self, regenerate=False):
-        return quiz_route.quiz_generate(
-            QuizGenerateRequest(session_id="session-1", regenerate=regenerate),
-            user=USER,
+        return asyncio.run(
+            quiz_route.quiz_generate(
+                QuizGenerateRequest(session_id="session-1", regenerate=regenerate),
+                user=USER,
+            )
         )
 
     def test_cache_hit_skips_ai_and_usage(self):
         with (
             patch.object(quiz_route, "get_session_detail", return_value=SESSION_DETAIL),
             patch.object(quiz_route, "get_quiz_questions", return_value=QUESTIONS),
-            patch.object(quiz_route, "ai_generate_quiz") as generate,
+            patch.object(quiz_route, "ai_generate_quiz_async") as generate,
             patch.object(quiz_route, "log_api_usage") as log,
             patch.object(quiz_route, "replace_quiz_questions") as replace,
         ):
@@ -63,7 +66,7 @@ class QuizGenerateTests(unittest.TestCase):
         with (
             patch.object(quiz_route, "get_session_detail", return_value=SESSION_DETAIL),
             patch.object(quiz_route, "get_quiz_questions", return_value=[]),
-            patch.object(quiz_route, "ai_generate_quiz", return_value=(QUESTIONS, USAGE)) as generate,
+            patch.object(quiz_route, "ai_generate_quiz_async", return_value=(QUESTIONS, USAGE)) as generate,
             patch.object(quiz_route, "log_api_usage") as log,
             patch.object(quiz_route, "replace_quiz_questions") as replace,
         ):
@@ -81,7 +84,7 @@ class QuizGenerateTests(unittest.TestCase):
         with (
             patch.object(quiz_route, "get_session_detail", return_value=SESSION_DETAIL),
             patch.object(quiz_route, "get_quiz_questions", return_value=QUESTIONS) as cached,
-            patch.object(quiz_route, "ai_generate_quiz", return_value=(QUESTIONS, USAGE)) as generate,
+            patch.object(quiz_route, "ai_generate_quiz_async", return_value=(QUESTIONS, USAGE)) as generate,
             patch.object(quiz_route, "log_api_usage"),
             patch.object(quiz_route, "replace_quiz_questions"),
         ):
@@ -98,7 +101,7 @@ class QuizGenerateTests(unittest.TestCase):
                 return_value={"session": {}, "text": "  ", "sentences": []},
             ),
             patch.object(quiz_route, "get_quiz_questions", return_value=[]),
-            patch.object(quiz_route, "ai_generate_quiz") as generate,
+            patch.object(quiz_route, "ai_generate_quiz_async") as generate,
         ):
             with self.assertRaises(HTTPException) as raised:
                 self._call()
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.single_flight import SingleFlight
+
+
+class SingleFlightTests(unittest.TestCase):
+    def test_concurrent_threads_share_one_call(self):
+        group = SingleFlight("test-threads")
+        release = threading.Event()
+        calls = []
+
+        def upstream(value):
+            calls.append(value)
+            release.wait(5)
+            return value * 2
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(group.do, "key", upstream, 21) for _ in range(4)]
+            while group.stats()["leaders"] + group.stats()["coalesced"] < 4:
+                time.sleep(0.001)
+            release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual(calls, [21])
+        self.assertEqual(sorted(results), [(42, False)] + [(42, True)] * 3)
+        self.assertEqual(group.stats(), {"leaders": 1, "coalesced": 3, "in_flight": 0})
+
+    def test_waiters_get_the_leaders_exception(self):
+        group = SingleFlight("test-errors")
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise ValueError("upstream failed")
+
+        async def run():
+            return await asyncio.gather(
+                group.do_async("key", upstream),
+                group.do_async("key", upstream),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(run())
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(group.stats()["coalesced"], 1)
+
+    def test_cancelled_leader_does_not_cancel_the_shared_call(self):
+        group = SingleFlight("test-cancel")
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            leader = asyncio.ensure_future(group.do_async("key", upstream))
+            await asyncio.sleep(0)
+            waiter = asyncio.ensure_future(group.do_async("key", upstream))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await waiter
+
+        self.assertEqual(asyncio.run(run()), ("done", True))
+        self.assertEqual(calls, [1])
+
+    def test_finished_calls_are_not_cached(self):
+        group = SingleFlight("test-sequential")
+        group.do("key", lambda: 1)
+        value, joined = group.do("key", lambda: 2)
+
+        self.assertEqual((value, joined), (2, False))
+        self.assertEqual(group.stats()["leaders"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
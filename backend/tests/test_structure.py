@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import json
 import unittest
@@ -304,7 +305,7 @@ class ReconstructionTests(unittest.TestCase):
             "label": "介系詞片語",
             "children": [
                 gemini._phrase_word_node(token)
-                for token in gemini.analyze_tokens(text)
+                for token in nlp.analyze_tokens(text)
             ],
         }
 
@@ -418,12 +419,12 @@ class ValidatorAlignmentTests(unittest.TestCase):
             "he never allowed those challenges to define him",
             'embracing his "inner child" helps him prepare for complex roles',
         ):
-            tokens = gemini.analyze_tokens(clause)
+            tokens = nlp.analyze_tokens(clause)
             self.assertEqual(gemini._infer_clause_pattern(tokens), "SVOC", clause)
 
     def test_clausal_object_pattern_is_svo(self):
         for clause in ("She wants to leave early", "He said that she left"):
-            tokens = gemini.analyze_tokens(clause)
+            tokens = nlp.analyze_tokens(clause)
             self.assertEqual(gemini._infer_clause_pattern(tokens), "SVO", clause)
 
     def test_clause_fallback_marks_only_the_root_verb_group_as_v(self):
@@ -465,6 +466,19 @@ class AnalyzeStructureTests(unittest.TestCase):
         self.assertEqual([c["role"] for c in result["children"]], ["S", "V", "O", "PUNCT"])
         self.assertIn("total_tokens", usage)
 
+    def test_async_variant_matches_the_sync_one(self):
+        with patch.object(
+            gemini.client.models, "generate_content", return_value=_response(VALID_TREE)
+        ):
+            expected = gemini.ai_analyze_structure("She reads books.")
+        with patch.object(
+            gemini.client.aio.models, "generate_content", return_value=_response(VALID_TREE)
+        ) as gen:
+            result = asyncio.run(gemini.ai_analyze_structure_async("She reads books."))
+
+        gen.assert_awaited_once()
+        self.assertEqual(result, expected)
+
     def test_invalid_schema_raises_after_retries(self):
         bad = {"text": "x", "role": "SUBJECT", "type": "word", "label": "主詞"}
         with patch.object(
@@ -601,6 +615,30 @@ class AnalyzeStructureTests(unittest.TestCase):
         # A clause arriving childless is retried before the spaCy fill ships.
         self.assertEqual(gen.call_count, gemini._STRUCTURE_ATTEMPTS)
 
+    def test_switched_off_sentence_context_expands_from_node_parses(self):
+        sentence = EMPTY_NESTED_CLAUSE_TREE["text"]
+        with (
+            patch.object(nlp.settings, "parse_sentence_context", False),
+            patch.object(nlp, "SentenceContext") as context,
+            patch.object(nlp, "analyze_tokens", wraps=nlp.analyze_tokens) as alone,
+            patch.object(
+                gemini.client.models,
+                "generate_content",
+                return_value=_response(EMPTY_NESTED_CLAUSE_TREE),
+            ),
+        ):
+            result, _ = gemini.ai_analyze_structure(sentence)
+
+        # The previous behavior: every node text is parsed on its own.
+        context.assert_not_called()
+        clause = result["children"][6]["children"][1]
+        self.assertIn(clause["text"], [call.args[0] for call in alone.call_args_list])
+        self.assertEqual(
+            [child["role"] for child in clause["children"][:5]],
+            ["MARK", "S", "V", "V", "ADV"],
+        )
+        self.assertIsNone(gemini._nesting_issue(result))
+
 
 class ReportedRegressionTests(unittest.TestCase):
     """Regressions reported from real PDF-sourced sentences."""
@@ -717,6 +755,7 @@ class ReportedRegressionTests(unittest.TestCase):
 class GetStructureCacheTests(unittest.TestCase):
     def setUp(self):
         structure._MEM_CACHE.clear()
+        structure._FAILURES.clear()
 
     def test_empty_sentence_is_rejected_without_calling_ai(self):
         with (
@@ -821,6 +860,310 @@ class GetStructureCacheTests(unittest.TestCase):
 
         ai.assert_called_once()
 
+    def test_concurrent_misses_share_one_analysis(self):
+        usage = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+
+        async def analyze(sentence):
+            await asyncio.sleep(0.01)
+            return VALID_TREE, usage
+
+        async def two_readers():
+            return await asyncio.gather(
+                structure.get_structure_async("She reads books."),
+                structure.get_structure_async("She reads books."),
+            )
+
+        with (
+            patch.object(structure, "is_complete_sentence", return_value=True),
+            patch.object(structure, "get_cached_parse", return_value=None),
+            patch.object(structure, "ai_analyze_structure_async", side_effect=analyze) as ai,
+            patch.object(structure, "save_parse") as save,
+        ):
+            results = asyncio.run(two_readers())
+
+        ai.assert_awaited_once()
+        save.assert_called_once()
+        self.assertEqual([tree for tree, _ in results], [VALID_TREE, VALID_TREE])
+        # Only the caller that made the Gemini call bills it.
+        self.assertEqual([bill for _, bill in results], [usage, None])
+
+
+class GetStructuresBatchTests(unittest.TestCase):
+    def setUp(self):
+        structure._MEM_CACHE.clear()
+        structure._FAILURES.clear()
+
+    def _batch(self, sentences, complete, stored, analyze):
+        with (
+            patch.object(structure, "are_complete_sentences", return_value=complete) as check,
+            patch.object(structure, "get_cached_parses", return_value=stored) as lookup,
+            patch.object(structure, "ai_analyze_structure_async", side_effect=analyze) as ai,
+            patch.object(structure, "save_parses") as save,
+        ):
+            outcomes, usage = asyncio.run(structure.get_structures_async(sentences))
+        return outcomes, usage, check, lookup, ai, save
+
+    def test_one_check_one_lookup_one_save(self):
+        usage = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+        hit = structure._hash("Cached one.")
+        other = {**VALID_TREE, "text": "Other."}
+
+        async def analyze(sentence):
+            if sentence == "Broken.":
+                raise HTTPException(status_code=502, detail="bad tree")
+            return VALID_TREE, usage
+
+        outcomes, total, check, lookup, ai, save = self._batch(
+            ["She reads books.", "In the morning.", "Cached  one.", "Broken.", "She reads books."],
+            complete=[True, False, True, True],
+            stored={hit: other},
+            analyze=analyze,
+        )
+
+        check.assert_called_once_with(["She reads books.", "In the morning.", "Cached one.", "Broken."])
+        lookup.assert_called_once()
+        self.assertEqual(len(lookup.call_args.args[0]), 3)
+        self.assertEqual(ai.await_count, 2)
+        self.assertEqual([tree for tree, _ in outcomes], [VALID_TREE, None, other, None, VALID_TREE])
+        self.assertEqual(outcomes[1][1].status_code, 422)
+        self.assertEqual(outcomes[3][1].status_code, 502)
+        self.assertEqual(total, usage)
+        (rows,), _ = save.call_args
+        self.assertEqual([row["sentence"] for row in rows], ["She reads books."])
+        self.assertEqual(rows[0]["prompt_version"], structure.PARSE_PROMPT_VERSION)
+
+    def test_memory_hits_skip_supabase_and_bill_nothing(self):
+        key = (structure._hash("She reads books."), structure.PARSE_PROMPT_VERSION)
+        structure._MEM_CACHE.put(key, VALID_TREE)
+
+        outcomes, usage, _, lookup, ai, save = self._batch(
+            ["She reads books."], complete=[True], stored={}, analyze=None
+        )
+
+        self.assertEqual(outcomes, [(VALID_TREE, None)])
+        self.assertIsNone(usage)
+        lookup.assert_not_called()
+        ai.assert_not_called()
+        save.assert_not_called()
+
+
+class NegativeCacheTests(unittest.TestCase):
+    def setUp(self):
+        structure._MEM_CACHE.clear()
+        structure._FAILURES.clear()
+        self.addCleanup(structure._FAILURES.clear)
+
+    def _rejected(self, sentence):
+        raise gemini.StructureAnalysisError("Gemini structure analysis did not reproduce the sentence.")
+
+    def test_incomplete_sentence_is_remembered_without_rerunning_spacy(self):
+        with (
+            patch.object(structure, "is_complete_sentence", return_value=False) as check,
+            patch.object(structure, "get_cached_parse") as l2,
+        ):
+            for _ in range(2):
+                with self.assertRaises(HTTPException) as raised:
+                    structure.get_structure("In the morning.")
+
+        check.assert_called_once()
+        l2.assert_not_called()
+        self.assertEqual(raised.exception.status_code, 422)
+        self.assertIsNone(raised.exception.headers)
+
+    def test_exhausted_analysis_backs_off_exponentially_and_is_never_saved(self):
+        clock = [1000.0]
+        with (
+            patch.object(structure.time, "monotonic", side_effect=lambda: clock[0]),
+            patch.object(structure, "is_complete_sentence", return_value=True),
+            patch.object(structure, "get_cached_parse", return_value=None),
+            patch.object(structure, "ai_analyze_structure", side_effect=self._rejected) as ai,
+            patch.object(structure, "save_parse") as save,
+            patch.object(structure.settings, "parse_failure_backoff", 30),
+            patch.object(structure.settings, "parse_failure_backoff_max", 50),
+        ):
+            with self.assertRaises(HTTPException):
+                structure.get_structure("A pathological sentence.")
+            with self.assertRaises(HTTPException) as raised:
+                structure.get_structure("A pathological sentence.")
+            self.assertEqual(ai.call_count, 1)
+            self.assertEqual(raised.exception.status_code, 502)
+            self.assertEqual(raised.exception.headers, {"Retry-After": "30"})
+
+            clock[0] += 31  # expired: analyzed again, fails again
+            with self.assertRaises(HTTPException):
+                structure.get_structure("A pathological sentence.")
+            with self.assertRaises(HTTPException) as raised:
+                structure.get_structure("A pathological sentence.")
+            self.assertEqual(ai.call_count, 2)
+            self.assertEqual(raised.exception.headers, {"Retry-After": "50"})  # 60, capped
+
+        save.assert_not_called()
+        self.assertEqual(structure.failure_cache_stats(), {"entries": 1, "served": 2})
+
+    def test_request_errors_are_not_remembered_and_success_forgets(self):
+        request_error = HTTPException(status_code=502, detail="Gemini API request failed: reset")
+        key = (structure._hash("She reads books."), structure.PARSE_PROMPT_VERSION)
+        with (
+            patch.object(structure, "is_complete_sentence", return_value=True),
+            patch.object(structure, "get_cached_parse", return_value=None),
+            patch.object(
+                structure,
+                "ai_analyze_structure",
+                side_effect=[request_error, (VALID_TREE, {"total_tokens": 1})],
+            ) as ai,
+            patch.object(structure, "save_parse"),
+        ):
+            with self.assertRaises(HTTPException):
+                structure.get_structure("She reads books.")
+            result, _ = structure.get_structure("She reads books.")
+
+        self.assertEqual(ai.call_count, 2)
+        self.assertEqual(result, VALID_TREE)
+
+        structure._FAILURES.record(key, gemini.StructureAnalysisError("rejected"))
+        structure._FAILURES.forget(key)
+        structure._FAILURES.check(key)  # does not raise
+
+    def test_batch_skips_remembered_sentences(self):
+        structure._FAILURES.record(
+            (structure._hash("In the morning."), structure.PARSE_PROMPT_VERSION),
+            HTTPException(status_code=422, detail=structure.INCOMPLETE_SENTENCE_MESSAGE),
+        )
+        with (
+            patch.object(structure, "are_complete_sentences", return_value=[False]) as check,
+            patch.object(structure, "get_cached_parses", return_value={}),
+            patch.object(structure, "ai_analyze_structure_async", side_effect=self._rejected),
+            patch.object(structure, "save_parses") as save,
+        ):
+            outcomes, usage = asyncio.run(
+                structure.get_structures_async(["In the morning.", "On Monday.", "A bad one."])
+            )
+            # Both failures are now remembered: nothing reaches spaCy or Gemini.
+            asyncio.run(structure.get_structures_async(["On Monday.", "A bad one."]))
+
+        check.assert_called_once_with(["On Monday.", "A bad one."])
+        self.assertEqual([error.status_code for _, error in outcomes], [422, 422, 502])
+        self.assertIsNone(usage)
+        save.assert_not_called()
+
+
+class StaleFallbackTests(unittest.TestCase):
+    def setUp(self):
+        structure._MEM_CACHE.clear()
+        structure._FAILURES.clear()
+        self.revalidations = structure._Revalidator(max_queued=2)
+        patchers = [
+            patch.object(structure, "_REVALIDATIONS", self.revalidations),
+            patch.object(self.revalidations, "_start"),  # run steps by hand
+            patch.object(structure.settings, "parse_stale_fallback", True),
+            patch.object(structure, "is_complete_sentence", return_value=True),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_old_version_is_served_and_reanalyzed_in_the_background(self):
+        old_tree = {**VALID_TREE, "label": "old"}
+        old = (structure.PARSE_PROMPT_VERSION - 1, old_tree)
+        with (
+            patch.object(structure, "get_latest_parse", return_value=old) as l2,
+            patch.object(structure, "ai_analyze_structure", return_value=(VALID_TREE, {"total_tokens": 1})) as ai,
+            patch.object(structure, "save_parse") as save,
+        ):
+            first = structure.get_structure("She reads books.")
+            second = structure.get_structure("She reads books.")
+            ai.assert_not_called()
+            self.assertEqual(self.revalidations.stats()["pending"], 1)  # queued once
+
+            self.revalidations._run_one()
+            third = structure.get_structure("She reads books.")
+
+        self.assertEqual(first, (old_tree, None))
+        self.assertEqual(second, (old_tree, None))
+        self.assertEqual(third, (VALID_TREE, None))  # from L1
+        self.assertEqual(l2.call_count, 2)
+        l2.assert_called_with(ANY, structure.PARSE_PROMPT_VERSION)
+        ai.assert_called_once_with("She reads books.")
+        self.assertEqual(save.call_args.kwargs["prompt_version"], structure.PARSE_PROMPT_VERSION)
+        self.assertEqual(self.revalidations.stats()["refreshed"], 1)
+
+    def test_rejected_reanalysis_keeps_the_old_tree_without_retrying(self):
+        old = (structure.PARSE_PROMPT_VERSION - 1, VALID_TREE)
+        rejected = gemini.StructureAnalysisError("Gemini structure analysis is malformed.")
+        with (
+            patch.object(structure, "get_latest_parse", return_value=old),
+            patch.object(structure, "ai_analyze_structure", side_effect=rejected),
+            patch.object(structure, "save_parse") as save,
+        ):
+            structure.get_structure("She reads books.")
+            self.revalidations._run_one()
+            result = structure.get_structure("She reads books.")
+
+        self.assertEqual(result, (VALID_TREE, None))
+        save.assert_not_called()
+        stats = self.revalidations.stats()
+        self.assertEqual((stats["failed"], stats["pending"], stats["queued"]), (1, 0, 1))
+
+    def test_full_queue_drops_and_current_rows_are_not_requeued(self):
+        old = (structure.PARSE_PROMPT_VERSION - 1, VALID_TREE)
+        with patch.object(structure, "get_latest_parse", return_value=old):
+            for sentence in ("One reads.", "Two read.", "Three read."):
+                structure.get_structure(sentence)
+        current = (structure.PARSE_PROMPT_VERSION, VALID_TREE)
+        with patch.object(structure, "get_latest_parse", return_value=current):
+            structure.get_structure("Four read.")
+
+        stats = self.revalidations.stats()
+        self.assertEqual((stats["queued"], stats["dropped"], stats["pending"]), (2, 1, 2))
+
+    def test_batch_serves_old_rows_and_queues_them(self):
+        old_hash = structure._hash("Old one.")
+        with (
+            patch.object(structure, "are_complete_sentences", return_value=[True, True]),
+            patch.object(
+                structure,
+                "get_latest_parses",
+                return_value={old_hash: (structure.PARSE_PROMPT_VERSION - 1, VALID_TREE)},
+            ),
+            patch.object(structure, "ai_analyze_structure_async", return_value=(VALID_TREE, {"total_tokens": 1})) as ai,
+            patch.object(structure, "save_parses"),
+        ):
+            outcomes, _ = asyncio.run(structure.get_structures_async(["Old one.", "New one."]))
+
+        self.assertEqual(outcomes, [(VALID_TREE, None), (VALID_TREE, None)])
+        ai.assert_awaited_once_with("New one.")
+        self.assertEqual(self.revalidations.stats()["pending"], 1)
+
+
+class StructureMemoryCacheTests(unittest.TestCase):
+    def setUp(self):
+        structure._MEM_CACHE.clear()
+        self.addCleanup(structure._MEM_CACHE.clear)
+
+    def test_admin_can_inspect_and_clear_the_cache(self):
+        from app.routes import admin as admin_route
+
+        key = (structure._hash("She reads books."), structure.PARSE_PROMPT_VERSION)
+        structure._MEM_CACHE.put(key, VALID_TREE)
+        structure._MEM_CACHE.get(key)
+
+        view = admin_route.inspect_structure_cache(limit=5, _admin={"id": "admin-1"})
+        self.assertEqual(view["stats"]["entries"], 1)
+        self.assertEqual(view["stats"]["hits"], 1)
+        self.assertGreater(view["stats"]["bytes"], 0)
+        self.assertEqual(view["recent"][0]["sentence"], "She reads books.")
+        self.assertEqual(view["recent"][0]["sentence_hash"], key[0])
+
+        cleared = admin_route.clear_structure_cache(_admin={"id": "admin-1"})
+        self.assertEqual(cleared["cleared"]["entries"], 1)
+        self.assertEqual(len(structure._MEM_CACHE), 0)
+
+    def test_cache_is_bounded_by_bytes(self):
+        self.assertEqual(structure._MEM_CACHE.max_entries, 0)
+        self.assertEqual(
+            structure._MEM_CACHE.max_bytes, structure.settings.structure_cache_max_mb * 1024 * 1024
+        )
+
 
 def _clause(text, role, label, pattern=None, children=None):
     node = {"text": text, "role": role, "type": "clause", "label": label}
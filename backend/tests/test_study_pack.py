@@ -0,0 +1,187 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.models.session import SaveSessionRequest
+from app.routes import session as session_route
+from app.services import study_pack
+from app.services.study_pack import StudyPackPipeline
+
+USER = {"id": "user-1"}
+USAGE = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+
+
+async def _drain(pipeline, timeout=5.0):
+    """Wait until every pack has finished (steps run on real threadpool
+    threads, so this polls instead of counting loop turns), then stop the
+    workers."""
+    deadline = time.monotonic() + timeout
+    while any(p.running or p.state in ("queued", "running") for p in pipeline._packs.values()):
+        if time.monotonic() > deadline:
+            raise AssertionError(f"study packs still running after {timeout}s")
+        await asyncio.sleep(0.01)
+    await pipeline.shutdown()
+
+
+class StudyPackPipelineTests(unittest.TestCase):
+    def _run(self, pipeline, submit):
+        async def main():
+            submit()
+            await _drain(pipeline)
+
+        asyncio.run(main())
+
+    def _recording_steps(self, order):
+        async def record(pack, payload, kind):
+            order.append((pack.user_id, kind, payload))
+            return "done"
+
+        return {
+            kind: (lambda pack, payload, kind=kind: record(pack, payload, kind))
+            for kind in study_pack.ARTIFACTS
+        }
+
+    def test_steps_rotate_over_users(self):
+        order = []
+        pipeline = StudyPackPipeline(workers=1)
+
+        def submit():
+            pipeline.submit("a", "s-a", "", ["A1.", "A2.", "A3."])
+            pipeline.submit("b", "s-b", "", ["B1."])
+
+        with patch.object(study_pack, "_STEPS", self._recording_steps(order)):
+            self._run(pipeline, submit)
+
+        self.assertEqual(
+            order[:4],
+            [("a", "structure", "A1."), ("b", "structure", "B1."), ("a", "structure", "A2."), ("b", "tts", "B1.")],
+        )
+        self.assertEqual(len(order), 8)
+        self.assertEqual(pipeline.progress("b", "s-b")["state"], "done")
+
+    def test_resave_cancels_the_earlier_pack(self):
+        order = []
+        pipeline = StudyPackPipeline(workers=2)
+        progress = {}
+
+        def submit():
+            pipeline.submit("a", "s-1", "", ["Old one.", "Old two."])
+            old = pipeline._packs[("a", "s-1")]
+            pipeline.submit("a", "s-1", "", ["New one.", "New one."])
+            progress["old"] = old.progress()
+
+        with patch.object(study_pack, "_STEPS", self._recording_steps(order)):
+            self._run(pipeline, submit)
+
+        self.assertEqual(progress["old"]["state"], "cancelled")
+        self.assertEqual(order, [("a", "structure", "New one."), ("a", "tts", "New one.")])
+        self.assertEqual(pipeline.progress("a", "s-1")["finished"], 2)
+
+    def test_progress_counts_done_skipped_and_failed(self):
+        pipeline = StudyPackPipeline(workers=2)
+
+        async def structure(sentence):
+            if sentence == "In the morning.":
+                raise HTTPException(status_code=422, detail="incomplete")
+            return {"text": sentence}, USAGE
+
+        async def speech(text):
+            raise RuntimeError("edge-tts returned no audio")
+
+        with (
+            patch.object(study_pack, "get_structure_async", side_effect=structure),
+            patch.object(study_pack, "synthesize_speech", side_effect=speech),
+            patch.object(study_pack, "get_quiz_questions", return_value=[{"question": "?"}]),
+            patch.object(study_pack, "ai_generate_quiz_async") as quiz,
+            patch.object(study_pack, "log_api_usage") as log,
+        ):
+            self._run(
+                pipeline,
+                lambda: pipeline.submit("a", "s-1", "She reads books.", ["She reads books.", "In the morning."]),
+            )
+
+        progress = pipeline.progress("a", "s-1")
+        self.assertEqual(progress["state"], "done")
+        self.assertEqual(progress["total"], 5)
+        artifacts = progress["artifacts"]
+        self.assertEqual(artifacts["structure"], {"total": 2, "done": 1, "skipped": 1, "failed": 0})
+        self.assertEqual(artifacts["tts"], {"total": 2, "done": 0, "skipped": 0, "failed": 2})
+        self.assertEqual(artifacts["quiz"], {"total": 1, "done": 0, "skipped": 1, "failed": 0})
+        # Cached questions are kept; the fresh tree is billed to the owner.
+        quiz.assert_not_called()
+        log.assert_called_once()
+        self.assertEqual(log.call_args.args[:2], ("a", "parse"))
+
+    def test_step_interrupted_by_shutdown_cancels_the_pack(self):
+        pipeline = StudyPackPipeline(workers=1)
+
+        async def main():
+            started = asyncio.Event()
+
+            async def slow(pack, payload):
+                started.set()
+                await asyncio.sleep(60)
+                return "done"
+
+            with patch.object(study_pack, "_STEPS", {kind: slow for kind in study_pack.ARTIFACTS}):
+                pipeline.submit("a", "s-1", "", ["One."])
+                await asyncio.wait_for(started.wait(), 5)
+                await pipeline.shutdown()
+
+        asyncio.run(main())
+
+        progress = pipeline.progress("a", "s-1")
+        self.assertEqual(progress["state"], "cancelled")
+        self.assertEqual(progress["finished"], 0)
+
+
+class SessionRouteStudyPackTests(unittest.TestCase):
+    def test_save_queues_delete_cancels_and_progress_is_per_user(self):
+        pipeline = StudyPackPipeline(workers=1)
+        req = SaveSessionRequest(
+            text="She reads books.",
+            sentences=[{"id": 1, "original": "She reads books.", "translation": "她讀書。"}],
+        )
+        saved = {"saved_at": "now", "session": {"id": "s-1"}}
+
+        async def main():
+            result = await session_route.save_session_route(req, user=USER)
+            queued = await session_route.study_pack_progress("s-1", user=USER)
+            await session_route.delete_session_route("s-1", user=USER)
+            await pipeline.shutdown()
+            return result, queued
+
+        with (
+            patch.object(session_route, "study_packs", pipeline),
+            patch.object(session_route.settings, "study_pack", True),
+            patch.object(session_route, "save_session", return_value=saved),
+            patch.object(session_route, "delete_session"),
+        ):
+            result, queued = asyncio.run(main())
+            with self.assertRaises(HTTPException) as raised:
+                asyncio.run(session_route.study_pack_progress("s-1", user={"id": "someone-else"}))
+
+        self.assertEqual(result, saved)
+        self.assertEqual((queued["state"], queued["total"]), ("queued", 3))
+        self.assertEqual(pipeline.progress("user-1", "s-1")["state"], "cancelled")
+        self.assertEqual(raised.exception.status_code, 404)
+
+    def test_save_without_study_pack_queues_nothing(self):
+        pipeline = StudyPackPipeline(workers=1)
+        req = SaveSessionRequest(text="She reads books.")
+
+        with (
+            patch.object(session_route, "study_packs", pipeline),
+            patch.object(session_route.settings, "study_pack", False),
+            patch.object(session_route, "save_session", return_value={"session": {"id": "s-1"}}),
+        ):
+            asyncio.run(session_route.save_session_route(req, user=USER))
+
+        self.assertIsNone(pipeline.progress("user-1", "s-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -100,5 +100,27 @@ class SessionGroupTests(unittest.TestCase):
         self.assertEqual(result["group_id"], "g1")
 
 
+class LatestParsesTests(unittest.TestCase):
+    def test_rows_are_read_in_pages_and_the_newest_version_wins(self):
+        pages = [
+            [
+                {"sentence_hash": "a", "prompt_version": 3, "structure": {"v": 3}},
+                {"sentence_hash": "a", "prompt_version": 2, "structure": {"v": 2}},
+            ],
+            [{"sentence_hash": "b", "prompt_version": 1, "structure": {"v": 1}}],
+        ]
+
+        with (
+            patch.object(supabase, "_PARSE_PAGE", 2),
+            patch.object(supabase, "_request_json", side_effect=pages) as request_json,
+        ):
+            latest = supabase.get_latest_parses(["a", "b"], 3)
+
+        self.assertEqual(latest, {"a": (3, {"v": 3}), "b": (1, {"v": 1})})
+        urls = [call.args[1] for call in request_json.call_args_list]
+        self.assertIn("limit=2&offset=0", urls[0])
+        self.assertIn("limit=2&offset=2", urls[1])
+
+
 if __name__ == "__main__":
     unittest.main()
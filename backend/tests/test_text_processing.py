@@ -1,13 +1,19 @@
+import asyncio
+import json
 import unittest
 from types import SimpleNamespace
 from unittest.mock import patch
 
+import spacy
 from fastapi import HTTPException
+from spacy.tokens import Doc
 
+from app.core.config import settings
 from app.models.vocab import VocabOptions
 from app.services import gemini
 from app.services.gemini import _strip_echoed_indices
-from app.services.nlp import is_complete_sentence, split_sentences
+from app.services import nlp
+from app.services.nlp import is_complete_sentence, iter_sentences, split_sentences
 
 
 class SentenceSplittingTests(unittest.TestCase):
@@ -45,6 +51,209 @@ class SentenceSplittingTests(unittest.TestCase):
             ["The next sentence."],
         )
 
+    def test_streamed_sentences_match_the_list(self):
+        text = (
+            "Read the passage. Then answer.\n"
+            "113.\nWhat is correct?\nA. One\nB. Two\n"
+            "114. Second question? (A) Red (B) Blue\n"
+            "115."
+        )
+
+        self.assertEqual(list(iter_sentences(text)), split_sentences(text))
+
+
+class _CountingModel:
+    """Stands in for the spaCy model with a tokenizer-only pipeline."""
+
+    pipe_names: list[str] = []
+
+    def __init__(self):
+        self.parsed: list[str] = []
+        self._blank = spacy.blank("en")
+
+    def __call__(self, text, disable=()):
+        self.parsed.append(text)
+        return self._blank.make_doc(text)
+
+    def pipe(self, texts, batch_size=None, disable=()):
+        for text in texts:
+            yield self(text)
+
+
+class ParseCacheTests(unittest.TestCase):
+    def setUp(self):
+        nlp.clear_caches()
+        self.model = _CountingModel()
+        patcher = patch.object(nlp, "_get_nlp", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(nlp.clear_caches)
+
+    def test_repeated_text_is_parsed_once(self):
+        nlp.analyze_tokens("She reads books.")
+        nlp.analyze_tokens("She reads books.")
+        nlp._parse("She reads books.")
+
+        self.assertEqual(self.model.parsed, ["She reads books."])
+        stats = nlp.cache_stats()
+        self.assertEqual(stats["tokens"]["hits"], 1)
+        self.assertEqual(stats["docs"]["hits"], 1)
+
+    def test_profiles_are_cached_separately(self):
+        nlp._parse("She reads books.", "syntax")
+        nlp._parse("She reads books.", "split")
+
+        self.assertEqual(len(self.model.parsed), 2)
+
+    def test_stream_parses_only_uncached_texts_in_order(self):
+        cached = nlp._parse("Two.", "split")
+        docs = list(nlp._parse_many(["One.", "Two.", "Three."], "split", 8))
+
+        self.assertEqual(self.model.parsed, ["Two.", "One.", "Three."])
+        self.assertIs(docs[1], cached)
+
+    def test_batch_completeness_check_parses_only_texts_with_letters(self):
+        self.model = _SentencizerModel()
+        with patch.object(nlp, "_get_nlp", return_value=self.model):
+            verdicts = nlp.are_complete_sentences(["One.", " ", "42", "Two."])
+
+        self.assertEqual(self.model.parsed, ["One.", "Two."])
+        self.assertEqual(len(verdicts), 4)
+        self.assertFalse(verdicts[1] or verdicts[2])
+
+
+class _SentencizerModel(_CountingModel):
+    """Counting stand-in that also marks rule-based sentence boundaries."""
+
+    def __init__(self):
+        super().__init__()
+        self._blank.add_pipe("sentencizer")
+
+    def __call__(self, text, disable=()):
+        self.parsed.append(text)
+        return self._blank(text)
+
+
+class LineMemoTests(unittest.TestCase):
+    def setUp(self):
+        nlp.clear_caches()
+        self.model = _SentencizerModel()
+        patcher = patch.object(nlp, "_get_nlp", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(nlp.clear_caches)
+
+    def test_only_edited_lines_are_parsed_again(self):
+        article = "She reads. He writes.\n114.\nWhat is correct?\nA. One\nB. Two"
+        first = split_sentences(article)
+        nlp._DOC_CACHE.clear()  # the memo alone must cover repeats
+        self.model.parsed.clear()
+
+        self.assertEqual(split_sentences(article), first)
+        self.assertEqual(self.model.parsed, [])
+
+        edited = article.replace("He writes.", "He writes often.")
+        split_sentences(edited)
+        self.assertEqual(self.model.parsed, ["She reads. He writes often."])
+        self.assertEqual(nlp.cache_stats()["lines"]["hits"], 3)
+
+    def test_split_docs_stay_out_of_the_doc_cache(self):
+        split_sentences("She reads. He writes.\nThey sing.")
+
+        self.assertEqual(nlp.cache_stats()["docs"]["entries"], 0)
+        self.assertEqual(nlp.cache_stats()["lines"]["entries"], 2)
+
+    def test_memoized_line_still_takes_a_carried_label(self):
+        split_sentences("What is correct?")
+
+        self.assertEqual(
+            split_sentences("114.\nWhat is correct?"),
+            ["114. What is correct?"],
+        )
+
+
+class ScriptFastPathTests(unittest.TestCase):
+    def setUp(self):
+        nlp.clear_caches()
+        self.model = _CountingModel()
+        patcher = patch.object(nlp, "_get_nlp", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cjk_line_is_carried_as_a_label_onto_the_next_sentence(self):
+        self.model = _SentencizerModel()
+        with patch.object(nlp, "_get_nlp", return_value=self.model):
+            sentences = split_sentences("She reads.\n老師補充：請注意。\nHe writes.")
+
+        # As when every line went through spaCy, minus the parse of the CJK line.
+        self.assertEqual(sentences, ["She reads.", "老師補充：請注意。 He writes."])
+        self.assertEqual(self.model.parsed, ["She reads.", "He writes."])
+
+    def test_question_number_and_cjk_line_stay_one_trailing_label(self):
+        self.assertEqual(split_sentences("114.\n下列何者正確？"), ["114. 下列何者正確？"])
+        self.assertEqual(self.model.parsed, [])
+
+    def test_letterless_lines_become_labels_without_parsing(self):
+        self.assertEqual(split_sentences("— 3 —\n12 / 30"), ["— 3 — 12 / 30"])
+        self.assertEqual(self.model.parsed, [])
+
+
+class _ParsedSentenceModel(_CountingModel):
+    """Returns a hand-parsed Doc for one sentence; other texts stay flat."""
+
+    sentence = "I think he runs fast."
+
+    def __call__(self, text, disable=()):
+        if text != self.sentence:
+            return super().__call__(text, disable)
+        self.parsed.append(text)
+        return Doc(
+            self._blank.vocab,
+            words=["I", "think", "he", "runs", "fast", "."],
+            spaces=[True, True, True, True, False, False],
+            heads=[1, 1, 3, 1, 3, 1],
+            deps=["nsubj", "ROOT", "nsubj", "ccomp", "advmod", "punct"],
+            pos=["PRON", "VERB", "PRON", "VERB", "ADV", "PUNCT"],
+        )
+
+
+class SentenceContextTests(unittest.TestCase):
+    def setUp(self):
+        nlp.clear_caches()
+        self.model = _ParsedSentenceModel()
+        patcher = patch.object(nlp, "_get_nlp", return_value=self.model)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(nlp.clear_caches)
+
+    def test_node_text_is_projected_from_the_sentence_parse(self):
+        with nlp.sentence_context(self.model.sentence):
+            tokens = nlp.context_tokens("he runs fast")
+
+        self.assertEqual(self.model.parsed, [self.model.sentence])
+        self.assertEqual([row["dep"] for row in tokens], ["nsubj", "ROOT", "advmod"])
+        self.assertEqual([row["is_root"] for row in tokens], [False, True, False])
+        self.assertEqual([row["start"] for row in tokens], [0, 3, 8])
+        self.assertTrue(tokens[1]["has_subject"])
+
+    def test_unlocatable_node_text_is_parsed_alone(self):
+        with nlp.sentence_context(self.model.sentence) as context:
+            nlp.context_tokens("she runs")
+            nlp.context_tokens("runs fas")
+
+        self.assertEqual(self.model.parsed, ["she runs", self.model.sentence, "runs fas"])
+        self.assertEqual((context.projected, context.parsed), (0, 2))
+
+    def test_switched_off_context_parses_node_texts_alone(self):
+        with (
+            patch.object(settings, "parse_sentence_context", False),
+            nlp.sentence_context(self.model.sentence) as context,
+        ):
+            nlp.context_tokens("he runs fast")
+
+        self.assertIsNone(context)
+        self.assertEqual(self.model.parsed, ["he runs fast"])
+
 
 class CompleteSentenceTests(unittest.TestCase):
     def test_declarative_and_question_are_complete(self):
@@ -101,6 +310,12 @@ class CompleteSentenceTests(unittest.TestCase):
         self.assertTrue(is_complete_sentence('"Who came to the party?"'))
         self.assertTrue(is_complete_sentence("“Who came to the party?”"))
 
+    def test_batch_check_matches_the_single_check(self):
+        texts = ["She reads books", "In the morning.", "", "Are you ready?", "123", "Live"]
+        self.assertEqual(
+            nlp.are_complete_sentences(texts), [is_complete_sentence(text) for text in texts]
+        )
+
 
 class TranslationCleanupTests(unittest.TestCase):
     def test_decimal_values_are_not_treated_as_indices(self):
@@ -125,7 +340,7 @@ class TranslationCleanupTests(unittest.TestCase):
 class TranslationRequestTests(unittest.TestCase):
     def test_translation_input_uses_json_without_prompt_indices(self):
         response = SimpleNamespace(
-            text='["翻譯一", "翻譯二"]',
+            text='{"0": "翻譯一", "1": "翻譯二"}',
             usage_metadata=None,
         )
 
@@ -139,13 +354,13 @@ class TranslationRequestTests(unittest.TestCase):
             )
 
         prompt = generate_content.call_args.kwargs["contents"]
-        self.assertIn('["First sentence.", "Second sentence."]', prompt)
+        self.assertIn('{"0": "First sentence.", "1": "Second sentence."}', prompt)
         self.assertNotIn("0. First sentence.", prompt)
         self.assertEqual(translations, ["翻譯一", "翻譯二"])
         self.assertEqual(usage["total_tokens"], 0)
 
     def test_translation_length_mismatch_is_rejected(self):
-        response = SimpleNamespace(text='["only one"]', usage_metadata=None)
+        response = SimpleNamespace(text='{"0": "only one"}', usage_metadata=None)
 
         with (
             patch.object(
@@ -160,6 +375,64 @@ class TranslationRequestTests(unittest.TestCase):
         self.assertEqual(raised.exception.status_code, 502)
         self.assertIn("expected 2, got 1", raised.exception.detail)
 
+    def test_missing_items_are_re_requested_alone(self):
+        def answer(text, tokens):
+            meta = SimpleNamespace(
+                prompt_token_count=tokens, candidates_token_count=0, total_token_count=tokens
+            )
+            return SimpleNamespace(text=text, usage_metadata=meta)
+
+        with patch.object(
+            gemini.client.models,
+            "generate_content",
+            side_effect=[
+                answer('{"0": "一", "1": "", "2": "三"}', 30),
+                answer('{"1": "二"}', 10),
+            ],
+        ) as generate_content:
+            translations, usage = gemini.ai_translate_list(["One.", "Two.", "Three."])
+
+        self.assertEqual(translations, ["一", "二", "三"])
+        repair = generate_content.call_args_list[1].kwargs
+        self.assertIn('{"1": "Two."}', repair["contents"])
+        self.assertNotIn("One.", repair["contents"])
+        self.assertEqual(repair["config"]["response_json_schema"]["required"], ["1"])
+        self.assertEqual(usage["total_tokens"], 40)
+        self.assertEqual(usage["repair_saved_tokens"], 20)
+
+    def test_merged_neighbours_are_both_re_requested(self):
+        answer = {"0": "一二", "1": "一二", "2": "三"}
+        self.assertEqual(
+            gemini._unanswered_items(answer, [0, 1, 2], ["One.", "Two.", "Three."]),
+            [0, 1],
+        )
+        # Repeated input sentences may legitimately share a translation.
+        self.assertEqual(
+            gemini._unanswered_items({"0": "是", "1": "是"}, [0, 1], ["Yes.", "Yes."]),
+            [],
+        )
+
+    def test_same_translation_of_different_sentences_is_kept_after_the_repair(self):
+        def answer(text):
+            return SimpleNamespace(text=text, usage_metadata=None)
+
+        with patch.object(
+            gemini.client.models,
+            "generate_content",
+            side_effect=[
+                answer('{"0": "是。", "1": "是。", "2": "好。"}'),
+                answer('{"0": "是。", "1": "是。"}'),
+            ],
+        ) as generate_content:
+            translations, _ = gemini.ai_translate_list(["Yes.", "Yeah.", "OK."])
+
+        self.assertEqual(translations, ["是。", "是。", "好。"])
+        self.assertEqual(generate_content.call_count, 2)
+        self.assertEqual(
+            gemini._unanswered_items({"0": "是", "1": "是"}, [0, 1], ["Yes.", "Yeah."], merges=False),
+            [],
+        )
+
     def test_empty_translation_input_returns_an_aligned_tuple(self):
         self.assertEqual(
             gemini.ai_translate_list([]),
@@ -174,6 +447,127 @@ class TranslationRequestTests(unittest.TestCase):
         )
 
 
+class ChunkedTranslationTests(unittest.TestCase):
+    @staticmethod
+    def _answer(contents, fail_once: set):
+        """Fake Gemini: translates the input array; each sentence in
+        `fail_once` makes its chunk's first answer one item short."""
+        payload = contents.split("Input JSON object:\n", 1)[1].split("\n\nCRITICAL", 1)[0]
+        items = json.loads(payload)
+        translations = {key: sentence.upper() for key, sentence in items.items()}
+        if fail_once & set(items.values()) and "CRITICAL" not in contents:
+            translations.popitem()
+        meta = SimpleNamespace(
+            prompt_token_count=10 * len(items),
+            candidates_token_count=5 * len(items),
+            total_token_count=15 * len(items),
+        )
+        return SimpleNamespace(text=json.dumps(translations), usage_metadata=meta)
+
+    def test_only_the_mismatched_chunk_is_retried(self):
+        sentences = [f"sentence {i}." for i in range(7)]
+        with (
+            patch.object(gemini, "_TRANSLATE_CHUNK_SENTENCES", 3),
+            patch.object(
+                gemini.client.models,
+                "generate_content",
+                side_effect=lambda model, contents, config: self._answer(
+                    contents, {"sentence 4."}
+                ),
+            ) as generate_content,
+        ):
+            translations, usage = gemini.ai_translate_list(sentences)
+
+        self.assertEqual(translations, [sentence.upper() for sentence in sentences])
+        # Three chunks (3 + 3 + 1) plus a repair of the middle chunk's one
+        # dropped item, which saves 45 - 15 tokens over a full retry.
+        self.assertEqual(generate_content.call_count, 4)
+        self.assertEqual(
+            usage,
+            {
+                "prompt_tokens": 80,
+                "response_tokens": 40,
+                "total_tokens": 120,
+                "repair_saved_tokens": 30,
+            },
+        )
+
+    def test_chunks_are_bounded_by_characters(self):
+        long_sentence = "x" * 4000
+        with patch.object(gemini, "_TRANSLATE_CHUNK_CHARS", 5000):
+            chunks = gemini._translation_chunks(["a.", long_sentence, long_sentence, "b."])
+
+        self.assertEqual(chunks, [["a.", long_sentence], [long_sentence, "b."]])
+
+    def test_failing_chunk_fails_the_whole_list(self):
+        response = SimpleNamespace(text='{"0": "only one"}', usage_metadata=None)
+        with (
+            patch.object(gemini, "_TRANSLATE_CHUNK_SENTENCES", 2),
+            patch.object(gemini.client.models, "generate_content", return_value=response),
+            self.assertRaises(HTTPException) as raised,
+        ):
+            gemini.ai_translate_list(["One.", "Two.", "Three.", "Four."])
+
+        self.assertEqual(raised.exception.status_code, 502)
+
+    def test_async_variant_matches_the_sync_one(self):
+        sentences = [f"sentence {i}." for i in range(7)]
+
+        async def answer(model, contents, config):
+            return self._answer(contents, {"sentence 4."})
+
+        with (
+            patch.object(gemini, "_TRANSLATE_CHUNK_SENTENCES", 3),
+            patch.object(gemini.client.aio.models, "generate_content", side_effect=answer) as aio,
+            patch.object(gemini.client.models, "generate_content") as blocking,
+        ):
+            translations, usage = asyncio.run(gemini.ai_translate_list_async(sentences))
+
+        blocking.assert_not_called()
+        self.assertEqual(translations, [sentence.upper() for sentence in sentences])
+        self.assertEqual(aio.call_count, 4)
+        self.assertEqual(usage["total_tokens"], 120)
+
+    def test_async_request_failure_is_a_502(self):
+        with (
+            patch.object(
+                gemini.client.aio.models, "generate_content", side_effect=RuntimeError("down")
+            ),
+            self.assertRaises(HTTPException) as raised,
+        ):
+            asyncio.run(gemini.ai_translate_list_async(["One."]))
+
+        self.assertEqual(raised.exception.status_code, 502)
+        self.assertIn("down", raised.exception.detail)
+
+
+class PipelinedTranslationTests(unittest.TestCase):
+    def test_chunks_keep_order_and_sum_usage(self):
+        def fake_translate(chunk, target_lang, mode):
+            usage = {"prompt_tokens": 2, "response_tokens": 1, "total_tokens": 3}
+            return [sentence.upper() for sentence in chunk], usage
+
+        sentences = (f"sentence {i}." for i in range(5))
+        with (
+            patch.object(gemini, "_PIPELINE_CHUNK_SIZE", 2),
+            patch.object(gemini, "_translate_chunk", side_effect=fake_translate) as translate,
+        ):
+            originals, translations, usage = gemini.ai_translate_pipelined(sentences)
+
+        self.assertEqual(originals, [f"sentence {i}." for i in range(5)])
+        self.assertEqual(translations, [f"SENTENCE {i}." for i in range(5)])
+        self.assertEqual([len(call.args[0]) for call in translate.call_args_list], [2, 2, 1])
+        self.assertEqual(usage, {"prompt_tokens": 6, "response_tokens": 3, "total_tokens": 9})
+
+    def test_empty_stream_makes_no_requests(self):
+        with patch.object(gemini, "_translate_chunk") as translate:
+            result = gemini.ai_translate_pipelined(iter(()))
+
+        translate.assert_not_called()
+        # No Gemini call was made, so there is no usage to log.
+        self.assertEqual(result, ([], [], None))
+
+
 class VocabLookupTests(unittest.TestCase):
     def test_lookup_preserves_selected_text_and_clears_unrequested_fields(self):
         response = SimpleNamespace(
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.models.translate import TranslateRequest
+from app.routes import translate as translate_route
+from app.services import gemini, nlp, nlp_pool
+
+USER = {"id": "user-1"}
+USAGE = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+SENTENCES = [f"Sentence {i}." for i in range(10)]
+
+
+class TranslateStreamRouteTests(unittest.TestCase):
+    def _stream(self, translate):
+        async def run():
+            response = await translate_route.translate_stream(
+                TranslateRequest(text=" ".join(SENTENCES)), user=USER
+            )
+            return [json.loads(line) async for line in response.body_iterator]
+
+        with (
+            patch.object(translate_route, "split_sentences", return_value=SENTENCES),
+            patch.object(translate_route, "get_translations_async", side_effect=translate),
+            patch.object(gemini, "_TRANSLATE_CHUNK_SENTENCES", 3),
+            patch.object(translate_route, "log_api_usage") as log,
+        ):
+            return asyncio.run(run()), log
+
+    def test_pairs_stream_in_order_and_usage_is_logged_once(self):
+        async def translate(chunk, target_lang, mode):
+            # Later chunks finish first; the stream must still be in id order.
+            await asyncio.sleep(0.01 if chunk[0] == SENTENCES[0] else 0)
+            return [sentence.upper() for sentence in chunk], USAGE
+
+        lines, log = self._stream(translate)
+
+        self.assertEqual([line["id"] for line in lines], list(range(10)))
+        self.assertEqual([line["original"] for line in lines], SENTENCES)
+        self.assertEqual(lines[4]["translation"], "SENTENCE 4.")
+        log.assert_called_once()
+        # First chunk of 4, then chunks of 3: three Gemini batches billed.
+        self.assertEqual(log.call_args.args[3], {key: value * 3 for key, value in USAGE.items()})
+
+    def test_first_chunk_failure_is_an_http_error(self):
+        async def translate(chunk, target_lang, mode):
+            raise HTTPException(status_code=502, detail="AI translation failed")
+
+        with self.assertRaises(HTTPException) as raised:
+            self._stream(translate)
+
+        self.assertEqual(raised.exception.status_code, 502)
+
+    def test_later_failure_ends_the_stream_with_an_error_line(self):
+        async def translate(chunk, target_lang, mode):
+            if SENTENCES[7] in chunk:
+                raise HTTPException(status_code=502, detail="AI translation failed")
+            return chunk, None
+
+        lines, log = self._stream(translate)
+
+        self.assertEqual([line.get("id") for line in lines[:-1]], list(range(7)))
+        self.assertEqual(lines[-1], {"error": "AI translation failed"})
+        log.assert_not_called()
+
+    def test_chunks_translated_around_a_failure_are_still_billed(self):
+        async def translate(chunk, target_lang, mode):
+            if SENTENCES[4] in chunk:
+                raise HTTPException(status_code=502, detail="AI translation failed")
+            # The last chunk is still running when the middle one fails.
+            await asyncio.sleep(0.01 if SENTENCES[9] in chunk else 0)
+            return chunk, USAGE
+
+        lines, log = self._stream(translate)
+
+        self.assertEqual(lines[-1], {"error": "AI translation failed"})
+        log.assert_called_once()
+        self.assertEqual(log.call_args.args[3], {key: value * 2 for key, value in USAGE.items()})
+
+
+class TranslatePipelinedRouteTests(unittest.TestCase):
+    def test_failed_chunk_still_bills_the_translated_ones(self):
+        def translate(chunk, target_lang, mode):
+            if SENTENCES[0] in chunk:
+                raise HTTPException(status_code=502, detail="AI translation failed")
+            return chunk, USAGE
+
+        with (
+            patch.object(translate_route, "iter_sentences", return_value=iter(SENTENCES)),
+            patch.object(translate_route, "get_translations", side_effect=translate) as chunks,
+            patch.object(gemini, "_PIPELINE_CHUNK_SIZE", 3),
+            patch.object(translate_route, "log_api_usage") as log,
+            self.assertRaises(HTTPException),
+        ):
+            asyncio.run(
+                translate_route.translate(
+                    TranslateRequest(text=" ".join(SENTENCES), pipelined=True), user=USER
+                )
+            )
+
+        self.assertEqual(chunks.call_count, 4)
+        log.assert_called_once()
+        self.assertEqual(log.call_args.args[3], {key: value * 3 for key, value in USAGE.items()})
+
+    def test_pooled_split_does_not_parse_in_process(self):
+        with (
+            patch.object(nlp_pool, "enabled", return_value=True),
+            patch.object(nlp_pool, "offload", return_value=SENTENCES) as offload,
+            patch.object(nlp, "_get_nlp", side_effect=AssertionError("parsed in-process")),
+            patch.object(translate_route, "get_translations", side_effect=lambda c, t, m: (c, None)),
+        ):
+            response = asyncio.run(
+                translate_route.translate(
+                    TranslateRequest(text=" ".join(SENTENCES), pipelined=True), user=USER
+                )
+            )
+
+        offload.assert_called_once_with(nlp._split_sentences, " ".join(SENTENCES))
+        self.assertEqual([pair.original for pair in response.sentences], SENTENCES)
+
+
+if __name__ == "__main__":
+    unittest.main()
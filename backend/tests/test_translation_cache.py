@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi import HTTPException
+
+from app.services import translation_cache
+
+USAGE = {"prompt_tokens": 1, "response_tokens": 2, "total_tokens": 3}
+
+
+def _translate(sentences, target_lang, mode):
+    return [f"<{sentence}>" for sentence in sentences], USAGE
+
+
+class TranslationCacheTests(unittest.TestCase):
+    def setUp(self):
+        translation_cache._MEM_CACHE.clear()
+
+    def _get(self, sentences, stored=None, translate=_translate):
+        with (
+            patch.object(
+                translation_cache, "get_cached_translations", return_value=stored or {}
+            ) as l2,
+            patch.object(translation_cache, "ai_translate_list", side_effect=translate) as ai,
+            patch.object(translation_cache, "save_translations") as save,
+        ):
+            result = translation_cache.get_translations(sentences, "zh-TW", "normal")
+        return result, l2, ai, save
+
+    def test_only_misses_are_translated_and_saved(self):
+        key = translation_cache._hash("Cached one.", "zh-TW", "normal")
+        (translations, usage), l2, ai, save = self._get(
+            ["Cached one.", "New one.", "New one."], stored={key: "舊的"}
+        )
+
+        self.assertEqual(translations, ["舊的", "<New one.>", "<New one.>"])
+        self.assertEqual(usage, USAGE)
+        ai.assert_called_once_with(["New one."], "zh-TW", "normal")
+        rows = save.call_args.args[0]
+        self.assertEqual([row["sentence"] for row in rows], ["New one."])
+        self.assertEqual(rows[0]["translation"], "<New one.>")
+
+    def test_memory_hits_skip_supabase_and_gemini(self):
+        self._get(["She reads books."])
+        (translations, usage), l2, ai, save = self._get(["She  reads​ books. "])
+
+        self.assertEqual(translations, ["<She reads books.>"])
+        self.assertIsNone(usage)
+        l2.assert_not_called()
+        ai.assert_not_called()
+        save.assert_not_called()
+
+    def test_key_covers_language_mode_and_prompt_version(self):
+        base = translation_cache._hash("Hi.", "zh-TW", "normal")
+        self.assertNotEqual(base, translation_cache._hash("Hi.", "ja", "normal"))
+        self.assertNotEqual(base, translation_cache._hash("Hi.", "zh-TW", "simple"))
+        with patch.object(translation_cache, "TRANSLATE_PROMPT_VERSION", 99):
+            self.assertNotEqual(base, translation_cache._hash("Hi.", "zh-TW", "normal"))
+
+    def test_line_breaks_are_part_of_the_key(self):
+        self.assertEqual(
+            translation_cache._normalize(" (A)  one \n (B) two "), "(A) one\n(B) two"
+        )
+
+    def test_failed_translation_caches_nothing(self):
+        def fail(sentences, target_lang, mode):
+            raise HTTPException(status_code=502, detail="AI translation failed")
+
+        with self.assertRaises(HTTPException):
+            self._get(["New one."], translate=fail)
+        self.assertEqual(len(translation_cache._MEM_CACHE), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -55,6 +55,7 @@ class TtsRouteTests(unittest.TestCase):
 class TtsCacheTests(unittest.TestCase):
     def setUp(self):
         tts_service.AUDIO_CACHE.clear()
+        tts_service.PACK_AUDIO.clear()
         FakeCommunicate.calls = 0
 
     def test_second_call_hits_cache(self):
@@ -78,3 +79,17 @@ class TtsCacheTests(unittest.TestCase):
         self.assertNotIn(
             f"{tts_service.settings.tts_voice}|one", tts_service.AUDIO_CACHE
         )
+
+    def test_precomputed_audio_survives_played_audio_evictions(self):
+        with patch.object(tts_service, "_MAX_ENTRIES", 1), patch.object(
+            tts_service.edge_tts, "Communicate", FakeCommunicate
+        ):
+            asyncio.run(tts_service.synthesize_speech("pack", precompute=True))
+            asyncio.run(tts_service.synthesize_speech("one"))
+            asyncio.run(tts_service.synthesize_speech("two"))
+            audio = asyncio.run(tts_service.synthesize_speech("pack"))
+
+        self.assertEqual(audio, b"fake-mp3-bytes")
+        self.assertEqual(FakeCommunicate.calls, 3)
+        self.assertNotIn(f"{tts_service.settings.tts_voice}|pack", tts_service.AUDIO_CACHE)
+
@@ -0,0 +1,20 @@
+-- Persistent cache for sentence translations, the translate counterpart of
+-- sentence_parses. Keyed by a hash of (normalized sentence, target_lang, mode,
+-- model, TRANSLATE_PROMPT_VERSION), so changing any of them misses cleanly and
+-- stale rows are never served. Shared across users: the same textbook passage
+-- or forked article is translated by Gemini once.
+CREATE TABLE IF NOT EXISTS sentence_translations (
+  id               UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  translation_hash TEXT NOT NULL UNIQUE,
+  prompt_version   INT  NOT NULL,
+  model            TEXT NOT NULL,
+  target_lang      TEXT NOT NULL,
+  mode             TEXT NOT NULL,
+  sentence         TEXT NOT NULL,
+  translation      TEXT NOT NULL,
+  created_at       TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Backend-only (service role bypasses RLS); no policies denies direct client
+-- access, as for sentence_parses.
+ALTER TABLE sentence_translations ENABLE ROW LEVEL SECURITY;